@@ -1,11 +1,49 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
+import hashlib
+import inspect
+import json
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
+from cbam_quest.cache import figure_cache, freeze
+from cbam_quest.cube import HORIZON, ImpactCube
+from cbam_quest.embedded import can_stock_by_origin
+from cbam_quest.engine import BASELINE_EMISSIONS, calculate_carbon_footprint
+from cbam_quest.figures import (
+    create_benchmark_radar,
+    create_cbam_heatmap,
+    create_decarbonization_roadmap,
+    create_embedded_emissions_chart,
+    create_fee_trajectory_chart,
+    create_material_breakdown_chart,
+    create_peer_radar,
+    create_portfolio_roadmap,
+    create_scenario_comparison_chart,
+    create_scenario_results_chart,
+    create_sobol_chart,
+    create_tornado_chart,
+    create_what_if_charts,
+    write_what_if_component,
+)
+from cbam_quest.ingest import load_baselines
+from cbam_quest.lookup import load_or_build
+from cbam_quest.metrics import RerunMetrics, registry as metrics_registry
+from cbam_quest.montecarlo import MonteCarloRun
+from cbam_quest.optimizer import optimize_levers
+from cbam_quest.peers import LOWER, PeerFile
+from cbam_quest.prices import AuctionHistory
+from cbam_quest.reference import INDUSTRY_BENCHMARKS, REGIONS, registry as reference_registry
+from cbam_quest.roadmap import generate_roadmap_phases
+from cbam_quest.store import AUCTION, MANUAL, ScenarioStore
+from cbam_quest.sku import SkuFootprintFile
+from cbam_quest.sensitivity import FACTORS, LEVER_SPREAD, PRICE_SPREAD, analyze as analyze_sensitivity
+from cbam_quest.trajectory import price_path, simulate as simulate_trajectory
+from cbam_quest.whatif import build_grid as build_what_if_grid, encode as encode_what_if, max_errors, nearest_state
+
 # Set page configuration
 st.set_page_config(
     page_title="CBAM Quest: Aluminum Decarbonization Planner",
@@ -171,17 +209,191 @@ hr {
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def load_scenario_table():
+    """Map the precomputed scenario table once per server process"""
+    return load_or_build()
+
+scenario_table = load_scenario_table()
+
+@st.cache_resource
+def load_plant_baselines(records_path):
+    """Aggregate the plant record file once per server process"""
+    return load_baselines(records_path) if records_path else None
+
+@st.cache_resource
+def load_impact_cube(records_path):
+    """Build the region x year x CN code impact cube once per server process"""
+    baselines = load_plant_baselines(records_path)
+    return ImpactCube.from_baselines(baselines) if baselines is not None else None
+
+# Reference datasets are shared by every session in this server process
+reference_registry.load_all()
+
+@st.cache_resource
+def load_scenario_store(store_path):
+    """Open the saved scenario database once per server process"""
+    return ScenarioStore(store_path) if store_path else ScenarioStore()
+
+scenario_store = load_scenario_store(os.environ.get("CBAM_QUEST_STORE"))
+
+@st.cache_resource
+def load_auction_history(auctions_path):
+    """Open the EU ETS auction history once per server process"""
+    return AuctionHistory(auctions_path) if auctions_path else None
+
+# Weekly CBAM certificate prices; each rerun only reads auctions appended since the last
+auction_history = load_auction_history(os.environ.get("CBAM_QUEST_AUCTIONS"))
+if auction_history is not None:
+    auction_history.refresh()
+
+@st.cache_resource
+def load_sku_footprints(bom_path):
+    """Track the SKU bill of materials once per server process"""
+    return SkuFootprintFile(bom_path) if bom_path else None
+
+# Per-SKU footprints; a rerun only recomputes SKUs or materials that changed
+sku_footprints = load_sku_footprints(os.environ.get("CBAM_QUEST_BOM"))
+if sku_footprints is not None:
+    sku_footprints.sync()
+
+@st.cache_resource
+def load_peer_benchmarks(peers_path):
+    """Index the peer facility dataset once per server process"""
+    return PeerFile(peers_path) if peers_path else None
+
+# Sorted per-metric peer indexes; a rerun only indexes peers appended since the last
+peer_benchmarks = load_peer_benchmarks(os.environ.get("CBAM_QUEST_PEERS"))
+if peer_benchmarks is not None:
+    peer_benchmarks.sync()
+
+@st.cache_resource
+def load_what_if_component():
+    """Write the offline what-if component's static files and declare it once per server process"""
+    cache_dir = Path(os.environ.get("CBAM_QUEST_CACHE", Path(__file__).resolve().parent / ".cache"))
+    return components.declare_component("what_if", path=write_what_if_component(cache_dir / "what_if_component"))
+
+# Served as static files, so browsers fetch plotly.js for the OFFLINE WHAT-IF card once
+what_if_component = load_what_if_component()
+
+@st.cache_resource
+def load_card_pool(workers):
+    """Threads that compute card data for every session in this server process"""
+    return ThreadPoolExecutor(workers, thread_name_prefix="card-data") if workers > 1 else None
+
+# Stale cards compute their data side by side; 0 or 1 worker computes them in page order
+card_pool = load_card_pool(int(os.environ.get("CBAM_QUEST_CARD_WORKERS", min(4, os.cpu_count() or 1))))
+
+# Plant-level import and production records (CSV or Parquet)
+plant_baselines = load_plant_baselines(os.environ.get("CBAM_QUEST_RECORDS"))
+impact_cube = load_impact_cube(os.environ.get("CBAM_QUEST_RECORDS"))
+
 # Title
 st.markdown("<h1 style='text-align: center; font-size: 52px;'>🎮 CBAM QUEST: ALUMINUM DECARBONIZATION PLANNER 🎮</h1>", unsafe_allow_html=True)
 
 # UI Components Functions
-def pixel_card(title, content_function):
-    """Create a pixel-art styled card with title and content"""
+def card_key(data_function, inputs):
+    """The inputs named in the data function's signature, and their cache key"""
+    card_inputs = {name: inputs[name] for name in inspect.signature(data_function).parameters}
+    return card_inputs, freeze(card_inputs)
+
+def card_job(data_function, card_inputs):
+    """Run a data function on a pool thread, counting the figure cache lookups it made there"""
+    hits, misses = figure_cache.thread_info()
+    data = data_function(**card_inputs)
+    new_hits, new_misses = figure_cache.thread_info()
+    return data, new_hits - hits, new_misses - misses
+
+def prefetch_cards(cards, inputs):
+    """Start the data functions of every stale card on the card pool
+
+    Figure building is mostly Python while the simulations behind it run in
+    numpy, which releases the GIL, so independent cards overlap. Each card
+    then waits for its own result in page order.
+    """
+    if card_pool is None:
+        return
+    card_data = st.session_state.setdefault("card_data", {})
+    for title, data_function in cards:
+        card_inputs, key = card_key(data_function, inputs)
+        if title not in card_data or card_data[title][0] != key:
+            card_data[title] = (key, card_pool.submit(card_job, data_function, card_inputs))
+
+def pixel_card(title, content_function, data_function, inputs):
+    """Create a pixel-art styled card with title and content
+
+    ``data_function`` is called with the inputs named in its signature, and
+    only when one of them changed since this session's previous rerun.
+    Otherwise the card is redrawn from the data it computed last time.
+    A result still being computed by ``prefetch_cards`` is waited for.
+    """
+    card_inputs, key = card_key(data_function, inputs)
+    
+    card_data = st.session_state.setdefault("card_data", {})
+    recompute = title not in card_data or card_data[title][0] != key
+    pending = not recompute and isinstance(card_data[title][1], Future)
+    
+    if render_metrics is None:
+        if recompute:
+            card_data[title] = (key, data_function(**card_inputs))
+        elif pending:
+            card_data[title] = (key, resolve_card(title)[0])
+        render_card(title, content_function, card_data[title][1])
+        return
+    
+    with render_metrics.card(title, data_cached=not (recompute or pending)) as timing:
+        if recompute:
+            with timing.phase("data"):
+                card_data[title] = (key, data_function(**card_inputs))
+        elif pending:
+            # Only the wait is timed: the rest overlapped with earlier cards
+            with timing.phase("data"):
+                data, hits, misses = resolve_card(title)
+            card_data[title] = (key, data)
+            timing.record["figure_cache_hits"] += hits
+            timing.record["figure_cache_misses"] += misses
+        with timing.phase("render"):
+            render_card(title, content_function, card_data[title][1])
+
+def resolve_card(title):
+    """Wait for a prefetched card; a failed one is dropped so the next rerun retries it"""
+    card_data = st.session_state["card_data"]
+    try:
+        return card_data[title][1].result()
+    except BaseException:
+        del card_data[title]
+        raise
+
+def render_card(title, content_function, data):
+    """Draw the card frame around the content function's output"""
     st.markdown('<div class="metric-container">', unsafe_allow_html=True)
     st.markdown(f"<h2>{title}</h2>", unsafe_allow_html=True)
-    content_function()
+    content_function(data)
     st.markdown('</div>', unsafe_allow_html=True)
 
+def plotly_chart(fig):
+    """Send a figure to the browser, recording its payload when instrumented"""
+    if render_metrics is not None:
+        render_metrics.observe_figure(fig)
+    st.plotly_chart(fig, use_container_width=True)
+
+def render_metrics_panel(rerun):
+    """Show this rerun's per-card timings as a table"""
+    rows = [
+        "| CARD | DATA ms | RENDER ms | SERIALIZE ms | PAYLOAD KB | CACHE |",
+        "|---|---|---|---|---|---|",
+    ]
+    for record in rerun.cards:
+        cache = "hit" if record["data_cached"] else "miss"
+        cache += f" (fig {record['figure_cache_hits']}/{record['figure_cache_hits'] + record['figure_cache_misses']})"
+        rows.append(
+            f"| {record['card']} | {record['data_s'] * 1000:.1f} | {record['render_s'] * 1000:.1f} "
+            f"| {record['serialize_s'] * 1000:.1f} | {record['payload_bytes'] / 1024:.1f} | {cache} |"
+        )
+    total = sum(record["data_s"] + record["render_s"] for record in rerun.cards)
+    rows.append(f"\nTotal card time: {total * 1000:.1f} ms")
+    st.markdown("\n".join(rows))
+
 def achievement_badge(title, condition, threshold):
     """Display an achievement badge if condition meets threshold"""
     if condition >= threshold:
@@ -202,11 +414,12 @@ def achievement_badge(title, condition, threshold):
 def retro_slider(label, min_val, max_val, default_val, key):
     """Create a slider with retro styling"""
     st.markdown(f"<p>{label}</p>", unsafe_allow_html=True)
+    # Seed the default through session state so callbacks can move the slider
+    st.session_state.setdefault(key, default_val)
     return st.slider(
         label, 
         min_value=min_val, 
         max_value=max_val, 
-        value=default_val,
         key=key,
         label_visibility="collapsed"
     )
@@ -239,384 +452,389 @@ def display_achievements(achievements):
         if "description" in achievement:
             st.markdown(f"<p><small>{achievement['description']}</small></p>", unsafe_allow_html=True)
 
-# Data Processing Functions
-def calculate_carbon_footprint(recycled_content, renewable_energy, process_efficiency):
-    """Calculate carbon footprint based on parameters"""
-    baseline = 2.1  # kg CO2e
-    
-    recycled_impact = (recycled_content - 40) * 0.01  # 40% is baseline
-    energy_impact = renewable_energy * 0.005
-    efficiency_impact = process_efficiency * 0.003
-    
-    footprint = baseline - recycled_impact - energy_impact - efficiency_impact
-    return max(0.5, min(3.0, footprint))  # Constrain between 0.5-3.0
-
-def calculate_implementation_costs(recycled_content, renewable_energy, process_efficiency):
-    """Calculate implementation costs based on parameters"""
-    recycled_cost = (recycled_content - 40) * 0.02 if recycled_content > 40 else 0
-    energy_cost = renewable_energy * 0.03
-    efficiency_cost = process_efficiency * 0.02
-    
-    total_cost = recycled_cost + energy_cost + efficiency_cost
-    return max(0.5, min(5.0, total_cost))  # Constrain between 0.5-5.0
-
-def generate_roadmap_phases(recycled_content, renewable_energy, process_efficiency):
-    """Generate roadmap phases based on parameters"""
-    phases = {
-        "PHASE 1 (2025-2027)": [
-            f"Increase recycled content to {min(recycled_content + 15, 100)}%",
-            f"Transition {min(renewable_energy + 20, 100)}% energy to renewable sources",
-            "Optimize transportation logistics (-15% emissions)"
-        ],
-        "PHASE 2 (2027-2029)": [
-            f"Implement AI-driven process efficiency (+{min(process_efficiency + 15, 100)}%)",
-            "Develop supplier certification program",
-            "Convert 75% of facilities to low-carbon operations"
-        ],
-        "PHASE 3 (2029-2031)": [
-            "Deploy advanced metal recovery technologies",
-            "Achieve carbon neutrality at flagship plants",
-            "Implement circular economy business model"
-        ],
-        "TARGET (2031-2033)": [
-            "Achieve 90% recycled content across product lines",
-            "100% renewable energy for all operations",
-            "Full carbon neutrality across value chain"
-        ]
-    }
-    
-    return phases
-
-# Visualization Functions
-def create_cbam_heatmap(target_regions, carbon_price):
-    """Create a heatmap of CBAM impacts"""
-    regions = ["Europe", "UK", "Middle East", "Asia", "North America"]
-    years = [2026, 2027, 2028, 2029, 2030]
-    
-    # Create sample data
-    z = []
-    for i, region in enumerate(regions):
-        row = []
-        for year in years:
-            # Higher impact for earlier years and European regions
-            impact = 5 - i * 0.8 - (year - 2026) * 0.3
-            impact = max(0, min(5, impact))  # Constrain between 0-5
-            row.append(impact)
-        z.append(row)
-    
-    # Create heatmap
-    fig = go.Figure(data=go.Heatmap(
-        z=z,
-        x=years,
-        y=regions,
-        colorscale=[
-            [0, "#FFE1DE"], [0.2, "#FFCCC2"], 
-            [0.4, "#FFA799"], [0.6, "#FF8577"], 
-            [0.8, "#FF6F61"], [1, "#C8412E"]
-        ],
-        showscale=False
-    ))
-    
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(family='VT323', size=14),
-        margin=dict(l=40, r=40, t=10, b=10),
-    )
-    
-    return fig
+def apply_lever_solution(solution):
+    """Move the IMPACT SIMULATOR sliders to an optimizer solution"""
+    st.session_state["recycled_slider"] = solution.recycled_content
+    st.session_state["energy_slider"] = solution.renewable_energy
+    st.session_state["efficiency_slider"] = solution.process_efficiency
 
-def create_decarbonization_roadmap(recycled_content, renewable_energy, process_efficiency):
-    """Create a roadmap chart"""
-    years = [2025, 2027, 2029, 2031, 2033]
-    
-    # Calculate reduction trajectory based on sliders
-    avg_improvement = (recycled_content + renewable_energy + process_efficiency) / 300
-    reductions = [
-        100,  # Start at baseline
-        max(10, 100 - avg_improvement * 25),  # Phase 1
-        max(10, 100 - avg_improvement * 50),  # Phase 2
-        max(10, 100 - avg_improvement * 75),  # Phase 3
-        max(10, 100 - avg_improvement * 100)  # Target
-    ]
-    
-    fig = go.Figure()
-    
-    # Add timeline base
-    fig.add_shape(
-        type="line",
-        x0=years[0], y0=50,
-        x1=years[-1], y1=50,
-        line=dict(color="#FF6F61", width=4)
+def save_scenario(name, inputs):
+    """Store the current settings under ``name``"""
+    scenario_store.save(
+        name=name or "Untitled",
+        carbon_price=inputs["carbon_price"],
+        target_regions=inputs["target_regions"],
+        recycled_content=inputs["recycled_content"],
+        renewable_energy=inputs["renewable_energy"],
+        process_efficiency=inputs["process_efficiency"],
+        baseline_emissions=inputs["baseline_emissions"],
+        carbon_prices=inputs["carbon_prices"],
+        price_source=inputs["price_source"]
     )
+
+# Range and step of the manual carbon price slider (€/tCO₂e)
+CARBON_PRICE_RANGE = (50, 150, 5)
+
+def apply_saved_scenario(scenario, region_options):
+    """Move the CBAM SETTINGS and IMPACT SIMULATOR controls to a saved scenario
+
+    The saved price is restored on the manual slider, snapped to its step and
+    range, since one saved from auction history can be any value.
+    """
+    low, high, step = CARBON_PRICE_RANGE
+    st.session_state["price_source"] = "Manual"
+    st.session_state["carbon_price_slider"] = int(min(high, max(low, step * round(scenario.carbon_price / step))))
+    st.session_state["target_regions"] = [region for region in scenario.regions if region in region_options]
+    st.session_state["recycled_slider"] = int(scenario.recycled_content)
+    st.session_state["energy_slider"] = int(scenario.renewable_energy)
+    st.session_state["efficiency_slider"] = int(scenario.process_efficiency)
+
+# Card Data Functions
+# Each card's data function declares the dashboard inputs it reads through its
+# parameters; pixel_card only calls it again when one of those inputs changes.
+def cbam_heatmap_data(target_regions, carbon_price, carbon_prices, year_range, reference_version):
+    if impact_cube is None:
+        return {"figure": create_cbam_heatmap(target_regions, carbon_price), "product_fees": None}
     
-    # Add milestone points
-    for i, year in enumerate(years):
-        fig.add_trace(go.Scatter(
-            x=[year],
-            y=[50],
-            mode="markers",
-            marker=dict(size=15, color=["#FF6F61", "#FF8577", "#FFA799", "#FFCCC2", "#FFE1DE"][i]),
-            showlegend=False
-        ))
-    
-    # Add reduction line
-    fig.add_trace(go.Scatter(
-        x=years,
-        y=[55 - r * 0.4 for r in reductions],  # Position above timeline
-        mode="lines+markers",
-        line=dict(color="white", width=3, dash="dash"),
-        marker=dict(size=10, color="white"),
-        showlegend=False
-    ))
-    
-    # Add year labels
-    for i, year in enumerate(years):
-        fig.add_annotation(
-            x=year,
-            y=35,  # Position below timeline
-            text=str(year),
-            showarrow=False,
-            font=dict(family="Space Mono", size=12, color="white")
-        )
-    
-    # Add milestone flags
-    for i, year in enumerate(years):
-        height = 20 - reductions[i] * 0.15  # Higher flag for better reduction
-        flag_color = ["#FF6F61", "#FF8577", "#FFA799", "#FFCCC2", "#FFE1DE"][i]
-        
-        # Flag pole
-        fig.add_shape(
-            type="rect",
-            x0=year-2, y0=50,
-            x1=year+2, y1=50+height,
-            fillcolor=flag_color,
-            line=dict(color=flag_color)
-        )
-        
-        # Flag triangle
-        fig.add_shape(
-            type="path",
-            path=f"M {year-2} {50+height} L {year+2} {50+height} L {year} {50+height+10} Z",
-            fillcolor=flag_color,
-            line=dict(color=flag_color)
-        )
-    
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(family='VT323', size=14),
-        margin=dict(l=40, r=40, t=10, b=10),
-        xaxis=dict(
-            showgrid=False,
-            zeroline=False,
-            showticklabels=False,
-            range=[2024, 2034]
+    # Slices of the precomputed cube; show the most exposed regions if none are targeted
+    regions = target_regions or impact_cube.top_regions(15, year_range)
+    regional_emissions = impact_cube.region_year_slice(regions, year_range)
+    # Each year priced along the carbon price path
+    year_prices = dict(zip(HORIZON, carbon_prices))
+    cube_prices = tuple(year_prices[year] for year in impact_cube.years)
+    return {
+        "figure": create_cbam_heatmap(
+            target_regions,
+            carbon_price,
+            regional_emissions,
+            carbon_prices=tuple(year_prices[year] for year in regional_emissions[1])
         ),
-        yaxis=dict(
-            showgrid=False,
-            zeroline=False,
-            showticklabels=False,
-            range=[0, 100]
-        )
+        "product_fees": impact_cube.fees_by_product(cube_prices, regions, year_range),
+    }
+
+def carbon_intensity_data(recycled_content, renewable_energy, process_efficiency, sku_version,
+                          reference_version):
+    # Default-value embedded emissions of can stock (CN 7612 90) from each origin
+    origins, embedded = can_stock_by_origin(recycled_content)
+    footprints = sku_footprints.footprints if sku_footprints is not None else None
+    return {
+        "breakdown_figure": create_material_breakdown_chart(),
+        "embedded_figure": create_embedded_emissions_chart(
+            origins=tuple("Default" if origin == "*" else origin for origin in origins),
+            direct=tuple(embedded["direct_emissions"].tolist()),
+            indirect=tuple(embedded["indirect_emissions"].tolist()),
+            precursor=tuple(embedded["precursor_emissions"].tolist())
+        ),
+        "carbon_footprint": calculate_carbon_footprint(
+            recycled_content=recycled_content,
+            renewable_energy=renewable_energy,
+            process_efficiency=process_efficiency
+        ),
+        "recycled_content": recycled_content,
+        # Searched and ranked by the content function
+        "sku_footprints": footprints,
+        "sku_summary": footprints.summary() if footprints is not None else None,
+    }
+
+def decarbonization_roadmap_data(recycled_content, renewable_energy, process_efficiency,
+                                 carbon_price, carbon_prices, baseline_emissions):
+    trajectory = simulate_trajectory(
+        recycled_content=recycled_content,
+        renewable_energy=renewable_energy,
+        process_efficiency=process_efficiency,
+        carbon_price=carbon_price,
+        baseline_emissions=baseline_emissions,
+        carbon_prices=carbon_prices
     )
-    
-    return fig
+    emissions_percent = trajectory.emissions / trajectory.baseline_emissions * 100
+    return {
+        "figure": create_decarbonization_roadmap(
+            years=tuple(trajectory.years.tolist()),
+            emissions_percent=tuple(emissions_percent.tolist()),
+            fees=tuple(trajectory.fees.tolist())
+        ),
+        "phases": generate_roadmap_phases(
+            recycled_content=recycled_content,
+            renewable_energy=renewable_energy,
+            process_efficiency=process_efficiency,
+            trajectory=trajectory
+        ),
+    }
 
-def create_benchmark_radar(recycled_content, renewable_energy, process_efficiency):
-    """Create a radar chart comparing to industry benchmarks"""
-    categories = ["Recycled %", "Energy", "Transport", "Process", "Materials"]
+def portfolio_roadmap_data(target_regions, recycled_content, renewable_energy,
+                           process_efficiency, carbon_price, carbon_prices):
+    # Every plant in the target regions (all plants if none selected), simulated in one call
+    plant_emissions = plant_baselines.by_plant()
+    plant_regions = plant_baselines.plant_regions().reindex(plant_emissions.index)
+    if target_regions:
+        selected = plant_regions.isin(target_regions).to_numpy()
+        plant_emissions, plant_regions = plant_emissions[selected], plant_regions[selected]
     
-    # Calculate our performance based on sliders
-    # Scale from 0-100 to 0-5 for radar chart
-    our_values = [
-        recycled_content / 20,  # Recycled content (0-5)
-        renewable_energy / 20,   # Energy (0-5)
-        3.5,  # Transport (fixed value for demo)
-        process_efficiency / 20,  # Process (0-5)
-        4.2   # Materials (fixed value for demo)
+    trajectory = simulate_trajectory(
+        recycled_content=recycled_content,
+        renewable_energy=renewable_energy,
+        process_efficiency=process_efficiency,
+        carbon_price=carbon_price,
+        baseline_emissions=plant_emissions.to_numpy(),
+        carbon_prices=carbon_prices
+    )
+    return {
+        "figure": create_portfolio_roadmap(
+            years=tuple(trajectory.years.tolist()),
+            groups=tuple(plant_regions),
+            plant_emissions=tuple(map(tuple, trajectory.emissions.tolist()))
+        ),
+        "plants": len(plant_emissions),
+        "fees": float(trajectory.fees.sum()),
+    }
+
+def benchmarking_data(recycled_content, renewable_energy, process_efficiency, peer_version, sku_version,
+                      reference_version):
+    # Axes with a peer metric are ranked against the peer dataset when one is loaded
+    benchmarks = reference_registry.get(INDUSTRY_BENCHMARKS)
+    peers = peer_benchmarks.benchmarks if peer_benchmarks is not None else None
+    covered = [
+        row for row, metric in enumerate(benchmarks["peer_metric"])
+        if peers is not None and peers.peers(metric)
     ]
-    
-    # Industry average (placeholder)
-    industry_values = [3.0, 2.5, 2.2, 2.8, 2.3]
-    
-    fig = go.Figure()
-    
-    # Add industry average
-    fig.add_trace(go.Scatterpolar(
-        r=industry_values,
-        theta=categories,
-        fill='toself',
-        fillcolor='rgba(255,133,119,0.2)',
-        line=dict(color="#FF8577", width=2, dash="dash"),
-        name="Industry Average"
-    ))
-    
-    # Add our performance
-    fig.add_trace(go.Scatterpolar(
-        r=our_values,
-        theta=categories,
-        fill='toself',
-        fillcolor='rgba(255,111,97,0.5)',
-        line=dict(color="#FF6F61", width=3),
-        name="Crown"
-    ))
-    
-    fig.update_layout(
-        polar=dict(
-            radialaxis=dict(
-                visible=True,
-                range=[0, 5],
-                tickvals=[1, 2, 3, 4, 5],
-                ticktext=['1', '2', '3', '4', '5'],
-                tickangle=0,
-                gridcolor='rgba(255, 255, 255, 0.2)',
-                linecolor='rgba(255, 255, 255, 0.2)'
-            ),
-            angularaxis=dict(
-                gridcolor='rgba(255, 255, 255, 0.2)',
-                linecolor='rgba(255, 255, 255, 0.2)'
+    if len(covered) < 3:
+        return {
+            "figure": create_benchmark_radar(
+                recycled_content=recycled_content,
+                renewable_energy=renewable_energy,
+                process_efficiency=process_efficiency
             ),
-            bgcolor='rgba(0,0,0,0)'
-        ),
-        showlegend=True,
-        legend=dict(
-            x=0.5,
-            y=1.2,
-            xanchor="center",
-            orientation="h",
-            font=dict(family="Space Mono", size=12, color="white")
+            "peers": None,
+        }
+    
+    slider_values = {
+        "recycled_content": recycled_content,
+        "renewable_energy": renewable_energy,
+        "process_efficiency": process_efficiency,
+    }
+    # The average SKU footprint stands in for the fixed value when a bill of materials is loaded
+    sku_summary = sku_footprints.footprints.summary() if sku_footprints is not None else None
+    if sku_summary is not None and not np.isnan(sku_summary["mean"]):
+        slider_values["can_footprint"] = sku_summary["mean"]
+    
+    categories, values, lower_is_better, results = [], [], [], []
+    for row in covered:
+        metric = benchmarks["peer_metric"][row]
+        value = float(slider_values.get(metric, benchmarks["company_value"][row]))
+        lower = benchmarks["direction"][row] == LOWER
+        categories.append(str(benchmarks["category"][row]))
+        values.append(value)
+        lower_is_better.append(lower)
+        results.append(peers.compare({metric: value}, {metric: benchmarks["direction"][row]})[metric])
+    return {
+        "figure": create_peer_radar(
+            categories=tuple(categories),
+            values=tuple(values),
+            percentiles=tuple(result.percentile for result in results),
+            p10=tuple(result.p10 for result in results),
+            p25=tuple(result.p25 for result in results),
+            p50=tuple(result.p50 for result in results),
+            p75=tuple(result.p75 for result in results),
+            p90=tuple(result.p90 for result in results),
+            lower_is_better=tuple(lower_is_better),
+            peers=tuple(result.peers for result in results)
         ),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(family='VT323', size=14),
-        margin=dict(l=40, r=40, t=40, b=40),
+        "peers": dict(zip(categories, results)),
+    }
+
+def scenario_results_data(recycled_content, renewable_energy, process_efficiency,
+                          carbon_price, carbon_prices, baseline_emissions):
+    # Calculate projected emissions and financial impact based on sliders
+    scenario = scenario_table.lookup(
+        recycled_content=recycled_content,
+        renewable_energy=renewable_energy,
+        process_efficiency=process_efficiency,
+        carbon_price=carbon_price,
+        baseline_emissions=baseline_emissions
     )
-    
-    return fig
-
-def create_scenario_results_chart(baseline_emissions, projected_emissions):
-    """Create a bar chart comparing baseline and projected emissions"""
-    fig = go.Figure()
-    
-    # Add baseline bar
-    fig.add_trace(go.Bar(
-        x=["Baseline"],
-        y=[baseline_emissions],
-        name="Baseline",
-        marker_color="#C8412E",
-        text=[f"{baseline_emissions:,} tCO₂e"],
-        textposition="outside",
-        textfont=dict(family="Space Mono", size=12, color="white")
-    ))
-    
-    # Add projected bar
-    fig.add_trace(go.Bar(
-        x=["Projected"],
-        y=[projected_emissions],
-        name="Projected",
-        marker_color="#FF6F61",
-        text=[f"{int(projected_emissions):,} tCO₂e"],
-        textposition="outside",
-        textfont=dict(family="Space Mono", size=12, color="white")
-    ))
-    
-    # Calculate and display reduction arrow
-    reduction = baseline_emissions - projected_emissions
-    reduction_percent = (reduction / baseline_emissions) * 100
-    
-    fig.add_annotation(
-        x=0.5,
-        y=baseline_emissions + 5000,
-        text=f"↓ {reduction:,.0f} tCO₂e ({reduction_percent:.1f}%)",
-        showarrow=False,
-        font=dict(family="VT323", size=18, color="#FF6F61")
+    trajectory = simulate_trajectory(
+        recycled_content=recycled_content,
+        renewable_energy=renewable_energy,
+        process_efficiency=process_efficiency,
+        carbon_price=carbon_price,
+        baseline_emissions=baseline_emissions,
+        carbon_prices=carbon_prices
     )
-    
-    fig.update_layout(
-        showlegend=False,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(family='VT323', size=14),
-        margin=dict(l=10, r=10, t=40, b=10),
-        xaxis=dict(
-            title="",
-            tickfont=dict(family="Space Mono", size=12, color="white")
+    return {
+        "scenario": scenario,
+        "figure": create_scenario_results_chart(
+            baseline_emissions=baseline_emissions,
+            projected_emissions=scenario.projected_emissions
         ),
-        yaxis=dict(
-            title="Emissions (tCO₂e)",
-            titlefont=dict(family="Space Mono", size=12, color="white"),
-            tickfont=dict(family="Space Mono", size=10, color="white"),
-            gridcolor='rgba(255, 255, 255, 0.1)'
-        )
+        "trajectory_figure": create_fee_trajectory_chart(
+            years=tuple(trajectory.years.tolist()),
+            baseline_fees=tuple(trajectory.baseline_fees.tolist()),
+            fees=tuple(trajectory.fees.tolist())
+        ),
+        "horizon_fees": (float(trajectory.baseline_fees.sum()), float(trajectory.fees.sum())),
+        "horizon_net_savings": float(trajectory.net_savings.sum()),
+        # Simulated lazily by the content function so estimates can stream in
+        "uncertainty": MonteCarloRun(
+            recycled_content=recycled_content,
+            renewable_energy=renewable_energy,
+            process_efficiency=process_efficiency,
+            carbon_price=carbon_price,
+            baseline_emissions=baseline_emissions,
+            workers=int(os.environ.get("CBAM_QUEST_MC_WORKERS", os.cpu_count()))
+        ),
+    }
+
+@st.cache_resource(max_entries=4)
+def load_what_if_grid(carbon_prices, baseline_emissions):
+    """Build the what-if grid and charts once per price path and baseline, whatever the levers"""
+    grid = build_what_if_grid(carbon_prices, baseline_emissions)
+    payload = encode_what_if(grid)
+    roadmap, results = create_what_if_charts(payload)
+    args = {
+        "grid_id": hashlib.blake2b(payload.encode("ascii"), digest_size=8).hexdigest(),
+        "grid": json.loads(payload),
+        "roadmap": json.loads(roadmap.to_json()),
+        "results": json.loads(results.to_json()),
+    }
+    return grid, len(payload), args
+
+def what_if_data(recycled_content, renewable_energy, process_efficiency,
+                 carbon_prices, baseline_emissions):
+    # Every lever combination on a coarse grid, looked up in the browser
+    grid, payload_bytes, args = load_what_if_grid(carbon_prices, baseline_emissions)
+    args = {**args, "start": list(nearest_state(grid, recycled_content, renewable_energy, process_efficiency))}
+    return {
+        "args": args,
+        # Component arguments go to the browser as JSON on every rerun that draws the card
+        "update_bytes": len(json.dumps(args)),
+        "payload_bytes": payload_bytes,
+        "states": len(grid.levels) ** 3,
+        "step": float(grid.levels[1] - grid.levels[0]),
+        "max_errors": max_errors(grid),
+    }
+
+SENSITIVITY_FACTOR_LABELS = {
+    "recycled_content": "Recycled Content",
+    "renewable_energy": "Renewable Energy",
+    "process_efficiency": "Process Efficiency",
+    "carbon_price": "Carbon Price",
+}
+SENSITIVITY_OUTPUT_LABELS = {"projected_fees": "CBAM Fees", "net_savings": "Net Savings"}
+
+def scenario_comparison_data(compared_scenarios):
+    # Saved outputs and trajectories are read back as stored, never recomputed
+    scenarios = scenario_store.compare(compared_scenarios)
+    return {
+        "figure": create_scenario_comparison_chart(
+            names=tuple(f"{scenario.name} #{scenario.id}" for scenario in scenarios),
+            years=tuple(scenarios[0].trajectory["years"].tolist()) if scenarios else (),
+            fees=tuple(tuple(scenario.trajectory["fees"].tolist()) for scenario in scenarios)
+        ),
+        "table": pd.DataFrame({
+            "Scenario": [f"{scenario.name} #{scenario.id}" for scenario in scenarios],
+            "Regions": [", ".join(scenario.regions) for scenario in scenarios],
+            "Carbon Price (€/t)": [scenario.carbon_price for scenario in scenarios],
+            "Price Source": [scenario.price_source.title() for scenario in scenarios],
+            "Recycled %": [scenario.recycled_content for scenario in scenarios],
+            "Renewable %": [scenario.renewable_energy for scenario in scenarios],
+            "Efficiency %": [scenario.process_efficiency for scenario in scenarios],
+            "Implementation Cost (€M)": [scenario.implementation_cost for scenario in scenarios],
+            "Net Savings (€M/yr)": [scenario.net_savings for scenario in scenarios],
+            f"CBAM Fees {HORIZON[0]}-{HORIZON[-1]} (€M)": [scenario.total_fees for scenario in scenarios],
+        }),
+    }
+
+def sensitivity_data(recycled_content, renewable_energy, process_efficiency,
+                     carbon_price, baseline_emissions):
+    sensitivity = analyze_sensitivity(
+        recycled_content=recycled_content,
+        renewable_energy=renewable_energy,
+        process_efficiency=process_efficiency,
+        carbon_price=carbon_price,
+        baseline_emissions=baseline_emissions
     )
+    factors = tuple(SENSITIVITY_FACTOR_LABELS[factor] for factor in FACTORS)
     
-    return fig
+    data = {}
+    for output, label in SENSITIVITY_OUTPUT_LABELS.items():
+        result = sensitivity[output]
+        data[label] = {
+            "tornado_figure": create_tornado_chart(
+                factors, result.base, result.low, result.high, f"{label} (€M)"
+            ),
+            "sobol_figure": create_sobol_chart(factors, result.first_order, result.total_order),
+            "top_driver": max(zip(result.total_order, factors))[1],
+            "samples": result.samples,
+        }
+    return data
 
 # Card Content Functions
-def cbam_heatmap_content():
-    st.plotly_chart(
-        create_cbam_heatmap(target_regions, carbon_price),
-        use_container_width=True
-    )
+def cbam_heatmap_content(data):
+    plotly_chart(data["figure"])
+    
+    # CBAM fees per aluminium CN code over the selected regions and years
+    if data["product_fees"]:
+        for cn_code, fees in data["product_fees"].items():
+            st.markdown(f"<p>CN {cn_code}: €{fees:.1f}M</p>", unsafe_allow_html=True)
 
-def carbon_intensity_content():
+def carbon_intensity_content(data):
     st.markdown("<h3>Material Components</h3>", unsafe_allow_html=True)
     
     # Material breakdown chart
-    component_data = {
-        "Component": ["Aluminum", "Coatings", "Inks", "Other"],
-        "Percentage": [68, 12, 8, 12],
-        "Color": ["#FF6F61", "#FF8577", "#FFA799", "#FFCCC2"]
-    }
+    plotly_chart(data["breakdown_figure"])
     
-    st.plotly_chart(
-        px.bar(
-            component_data,
-            x="Percentage",
-            y="Component",
-            orientation='h',
-            color="Component",
-            color_discrete_map=dict(zip(component_data["Component"], component_data["Color"])),
-            labels={"Percentage": "% of Total Weight"}
-        ).update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(family='VT323', size=14),
-            showlegend=False
-        ),
-        use_container_width=True
-    )
+    # Embedded emissions by origin, with recycled scrap replacing primary precursors
+    st.markdown("<h3>Embedded Emissions by Origin (CN 7612 90)</h3>", unsafe_allow_html=True)
+    plotly_chart(data["embedded_figure"])
     
     # Carbon footprint
-    carbon_footprint = calculate_carbon_footprint(
-        recycled_content=recycled_content,
-        renewable_energy=renewable_energy,
-        process_efficiency=process_efficiency
-    )
-    
+    carbon_footprint = data["carbon_footprint"]
     st.markdown(f"<h3 style='text-align: center; color: #FF6F61;'>CARBON FOOTPRINT: {carbon_footprint:.2f} kg CO₂e</h3>", unsafe_allow_html=True)
     
     # Recycled content slider display
     st.markdown("<p>Recycled Content:</p>", unsafe_allow_html=True)
-    st.progress(recycled_content/100)
+    st.progress(data["recycled_content"]/100)
+    
+    # Every SKU in the bill of materials
+    summary = data["sku_summary"]
+    if summary is not None:
+        footprints = data["sku_footprints"]
+        st.markdown("<h3>SKU FOOTPRINTS:</h3>", unsafe_allow_html=True)
+        st.markdown(
+            f"<p>{summary['skus']:,} SKUs · {summary['mean']:.1f} g CO₂e per can on average "
+            f"({summary['min']:.1f} to {summary['max']:.1f})</p>",
+            unsafe_allow_html=True
+        )
+        col_search, col_view, col_count = st.columns([2, 2, 1])
+        with col_search:
+            query = st.text_input("Search SKU", key="sku_search")
+        with col_view:
+            view = st.selectbox("Show", options=["Highest Footprint", "Lowest Footprint"], key="sku_view")
+        with col_count:
+            count = st.number_input("Top N", min_value=5, max_value=500, value=10, step=5, key="sku_top_n")
+        
+        if query:
+            table, matches = footprints.search(query, limit=count)
+            st.markdown(f"<p>{matches:,} matching SKUs</p>", unsafe_allow_html=True)
+        else:
+            table = footprints.top(count, largest=view == "Highest Footprint")
+        st.dataframe(
+            table.reset_index().rename(columns={
+                "sku": "SKU",
+                "footprint_g": "g CO₂e / can",
+                "mass_g": "Mass (g)",
+                "recycled_share": "Recycled Share",
+                "missing_factor": "Missing Factor",
+            }),
+            hide_index=True,
+            use_container_width=True
+        )
 
-def decarbonization_roadmap_content():
-    st.plotly_chart(
-        create_decarbonization_roadmap(
-            recycled_content=recycled_content,
-            renewable_energy=renewable_energy,
-            process_efficiency=process_efficiency
-        ),
-        use_container_width=True
-    )
+def decarbonization_roadmap_content(data):
+    plotly_chart(data["figure"])
     
     # Phase details
-    phases = generate_roadmap_phases(
-        recycled_content=recycled_content,
-        renewable_energy=renewable_energy,
-        process_efficiency=process_efficiency
-    )
+    phases = data["phases"]
     
     selected_phase = st.selectbox(
         "Select Phase for Details",
@@ -629,41 +847,40 @@ def decarbonization_roadmap_content():
     for action in phases[selected_phase]:
         st.markdown(f"• {action}", unsafe_allow_html=True)
 
-def benchmarking_content():
-    st.plotly_chart(
-        create_benchmark_radar(
-            recycled_content=recycled_content,
-            renewable_energy=renewable_energy,
-            process_efficiency=process_efficiency
-        ),
-        use_container_width=True
+def portfolio_roadmap_content(data):
+    plotly_chart(data["figure"])
+    st.markdown(
+        f"<p>{data['plants']:,} plants · {HORIZON[0]}-{HORIZON[-1]} CBAM Fees: €{data['fees']:.1f}M</p>",
+        unsafe_allow_html=True
     )
 
-def scenario_results_content():
+def benchmarking_content(data):
+    plotly_chart(data["figure"])
+    
+    # Percentile rank on each axis: the share of peers we outperform
+    if data["peers"]:
+        st.markdown(
+            "".join(
+                f"<p>{category}: P{result.percentile:.0f} · {result.value:.1f} vs peer median "
+                f"{result.p50:.1f} ({result.peers:,} peers)</p>"
+                for category, result in data["peers"].items()
+            ),
+            unsafe_allow_html=True
+        )
+
+def scenario_results_content(data):
     col_chart, col_impact = st.columns([3, 2])
     
-    # Calculate projected emissions based on sliders
-    projected_emissions = baseline_emissions - (baseline_emissions * (recycled_content + renewable_energy + process_efficiency) / 300)
+    scenario = data["scenario"]
+    baseline_cbam_fees = scenario.baseline_fees
+    projected_cbam_fees = scenario.projected_fees
+    implementation_cost = scenario.implementation_cost
+    net_savings = scenario.net_savings  # Implementation cost amortized over 3 years
     
-    # Financial impact
-    baseline_cbam_fees = baseline_emissions * carbon_price / 1000000  # Convert to millions
-    projected_cbam_fees = projected_emissions * carbon_price / 1000000  # Convert to millions
-    implementation_cost = calculate_implementation_costs(
-        recycled_content=recycled_content,
-        renewable_energy=renewable_energy,
-        process_efficiency=process_efficiency
-    )
-    net_savings = baseline_cbam_fees - projected_cbam_fees - implementation_cost/3  # Amortized over 3 years
-    
-    # Emissions chart
+    # Emissions chart and yearly fees as free allocation is phased out
     with col_chart:
-        st.plotly_chart(
-            create_scenario_results_chart(
-                baseline_emissions=baseline_emissions,
-                projected_emissions=projected_emissions
-            ),
-            use_container_width=True
-        )
+        plotly_chart(data["figure"])
+        plotly_chart(data["trajectory_figure"])
     
     # Financial impact
     with col_impact:
@@ -672,6 +889,23 @@ def scenario_results_content():
         st.markdown(f"<p>Implementation Cost: €{implementation_cost:.1f}M</p>", unsafe_allow_html=True)
         st.markdown(f"<p>Net Savings: €{net_savings:.1f}M/year</p>", unsafe_allow_html=True)
         
+        baseline_horizon_fees, horizon_fees = data["horizon_fees"]
+        st.markdown(f"<h3>{HORIZON[0]}-{HORIZON[-1]} PHASE-IN:</h3>", unsafe_allow_html=True)
+        st.markdown(f"<p>CBAM Fees: €{baseline_horizon_fees:.1f}M → €{horizon_fees:.1f}M</p>", unsafe_allow_html=True)
+        st.markdown(f"<p>Net Savings: €{data['horizon_net_savings']:.1f}M</p>", unsafe_allow_html=True)
+        
+        # Carbon price and lever uncertainty, refined as simulation shards finish
+        st.markdown("<h3>UNCERTAINTY (P10 / P50 / P90):</h3>", unsafe_allow_html=True)
+        bands_placeholder = st.empty()
+        for estimate in data["uncertainty"].estimates():
+            fees, savings = estimate.projected_fees, estimate.net_savings
+            bands_placeholder.markdown(
+                f"<p>CBAM Fees: €{fees.p10:.1f}M / €{fees.p50:.1f}M / €{fees.p90:.1f}M</p>"
+                f"<p>Net Savings: €{savings.p10:.1f}M / €{savings.p50:.1f}M / €{savings.p90:.1f}M</p>"
+                f"<p><small>{estimate.draws:,} of {estimate.total_draws:,} draws</small></p>",
+                unsafe_allow_html=True
+            )
+        
         # Unlock achievement if significant savings
         if net_savings >= 1.0:
             achievement_badge(
@@ -680,6 +914,44 @@ def scenario_results_content():
                 1.0  # Threshold for achievement
             )
 
+def what_if_content(data):
+    what_if_component(**data["args"], key="what_if_component", default=None)
+    errors = data["max_errors"]
+    st.markdown(
+        f"<p><small>{data['states']:,} lever states every {data['step']:.0f} points · "
+        f"{data['payload_bytes'] / 1024:.0f} KB quantized grid, {data['update_bytes'] / 1024:.0f} KB sent per update "
+        f"(plotly.js is loaded once and cached) · "
+        f"±{errors['emissions_percent']:.2f}% emissions, ±€{errors['fees']:.3f}M fees</small></p>",
+        unsafe_allow_html=True
+    )
+
+def scenario_comparison_content(data):
+    plotly_chart(data["figure"])
+    st.dataframe(data["table"], hide_index=True, use_container_width=True)
+
+def sensitivity_content(data):
+    output = st.radio(
+        "Sensitivity Output",
+        options=list(data.keys()),
+        horizontal=True,
+        key="sensitivity_output"
+    )
+    result = data[output]
+    
+    col_tornado, col_sobol = st.columns(2)
+    with col_tornado:
+        st.markdown("<h3>TORNADO:</h3>", unsafe_allow_html=True)
+        plotly_chart(result["tornado_figure"])
+    with col_sobol:
+        st.markdown("<h3>SOBOL INDICES:</h3>", unsafe_allow_html=True)
+        plotly_chart(result["sobol_figure"])
+    
+    st.markdown(
+        f"<p>Top Driver: {result['top_driver']}</p>"
+        f"<p><small>{result['samples']:,} model evaluations within ±{LEVER_SPREAD} points and ±€{PRICE_SPREAD}/t of the current setting</small></p>",
+        unsafe_allow_html=True
+    )
+
 # Sidebar with game controller aesthetic
 with st.sidebar:
     st.markdown("<h2>CONTROL PANEL</h2>", unsafe_allow_html=True)
@@ -687,18 +959,62 @@ with st.sidebar:
     # CBAM Settings section
     control_panel_section("CBAM SETTINGS")
     
-    carbon_price = st.slider(
-        "Carbon Price (€/tCO₂e)",
-        min_value=50,
-        max_value=150,
-        value=90,
-        step=5
-    )
+    price_source = "Manual"
+    if auction_history is not None and len(auction_history.weekly()):
+        price_source = st.radio(
+            "Carbon Price Source",
+            options=["Auction History", "Manual"],
+            horizontal=True,
+            key="price_source"
+        )
+    
+    if price_source == "Auction History":
+        # This week's CBAM certificate price and a forward path for later years
+        carbon_price = round(auction_history.certificate_price(), 2)
+        st.markdown(
+            f"<p>Certificate Price: €{carbon_price:.2f}/t "
+            f"<small>(auctions of week {auction_history.weekly().index[-1]:%Y-%m-%d})</small></p>",
+            unsafe_allow_html=True
+        )
+        forward_path = st.selectbox(
+            "Forward Price Path",
+            options=["Flat", "Historical Trend"],
+            key="forward_price_path"
+        )
+        carbon_prices = tuple(
+            round(price, 2)
+            for price in auction_history.forward_path("fitted" if forward_path == "Historical Trend" else 0.0).tolist()
+        )
+    else:
+        st.session_state.setdefault("carbon_price_slider", 90)
+        carbon_price = st.slider(
+            "Carbon Price (€/tCO₂e)",
+            min_value=CARBON_PRICE_RANGE[0],
+            max_value=CARBON_PRICE_RANGE[1],
+            step=CARBON_PRICE_RANGE[2],
+            key="carbon_price_slider"
+        )
+        carbon_prices = tuple(price_path(carbon_price).tolist())
     
+    if impact_cube is not None:
+        region_options = list(impact_cube.regions)
+    else:
+        region_options = reference_registry.get(REGIONS)["region"].tolist()
+    
+    st.session_state.setdefault(
+        "target_regions", ["Europe"] if "Europe" in region_options else region_options[:1]
+    )
     target_regions = st.multiselect(
         "Target Regions",
-        options=["Europe", "UK", "Middle East", "Asia", "North America"],
-        default=["Europe"]
+        options=region_options,
+        key="target_regions"
+    )
+    
+    year_range = st.slider(
+        "CBAM Years",
+        min_value=HORIZON[0],
+        max_value=HORIZON[-1],
+        value=(HORIZON[0], HORIZON[-1])
     )
     
     # Roadmap Progress section
@@ -749,43 +1065,206 @@ with st.sidebar:
     )
     
     # Calculate CBAM fee reduction based on sliders
-    baseline_emissions = 125000  # tCO2e - would be calculated from data in real app
-    recycled_impact = baseline_emissions * (recycled_content - 40) / 100 * 0.005  # Example formula
-    energy_impact = baseline_emissions * renewable_energy / 100 * 0.003
-    efficiency_impact = baseline_emissions * process_efficiency / 100 * 0.002
-    
-    total_reduction = recycled_impact + energy_impact + efficiency_impact
-    cbam_reduction = total_reduction * carbon_price / 1000  # Convert to millions of euros
+    if plant_baselines is not None:
+        # Latest year's emissions across the target regions (all regions if none selected)
+        baseline_emissions = plant_baselines.total(regions=target_regions)  # tCO2e
+    else:
+        baseline_emissions = BASELINE_EMISSIONS  # tCO2e - sample baseline without record data
+    cbam_reduction = scenario_table.lookup(
+        recycled_content=recycled_content,
+        renewable_energy=renewable_energy,
+        process_efficiency=process_efficiency,
+        carbon_price=carbon_price,
+        baseline_emissions=baseline_emissions
+    ).fee_reduction  # Millions of euros
     
     st.markdown("<p>CBAM Fee Reduction:</p>", unsafe_allow_html=True)
     st.markdown(f"<p style='font-family: VT323, monospace; font-size: 24px; color: #FF6F61;'>- €{cbam_reduction:.2f}M</p>", unsafe_allow_html=True)
+    
+    # Precomputes the lever grid so the what-if charts redraw in the browser
+    what_if_mode = st.checkbox("Offline What-If Mode", key="what_if_mode")
+    
+    # Optimizer section
+    control_panel_section("OPTIMIZER")
+    
+    optimizer_target = st.selectbox(
+        "Optimize For",
+        options=["Off", "Footprint Target", "CBAM Fee Budget"],
+        key="optimizer_target"
+    )
+    
+    if optimizer_target != "Off":
+        if optimizer_target == "Footprint Target":
+            target_value = st.number_input("Max Footprint (kg CO₂e)", 0.5, 3.0, 1.5, 0.05)
+            solution = optimize_levers(carbon_price, target_footprint=target_value, baseline_emissions=baseline_emissions)
+        else:
+            target_value = st.number_input("Max CBAM Fees (€M)", 0.0, 100.0, 5.0, 0.5)
+            solution = optimize_levers(carbon_price, fee_budget=target_value, baseline_emissions=baseline_emissions)
+        
+        if solution is None:
+            st.info("🔒 No lever setting reaches this target")
+        else:
+            st.markdown(
+                f"<p>Cheapest Path: {solution.recycled_content}% recycled, "
+                f"{solution.renewable_energy}% renewable, {solution.process_efficiency}% efficiency</p>"
+                f"<p>Implementation Cost: €{solution.implementation_cost:.2f}M</p>",
+                unsafe_allow_html=True
+            )
+            st.button("APPLY TO SIMULATOR", on_click=apply_lever_solution, args=(solution,))
+    
+    # Saved scenarios section
+    control_panel_section("SAVED SCENARIOS")
+    
+    scenario_name = st.text_input("Scenario Name", key="scenario_name")
+    st.button(
+        "SAVE SCENARIO",
+        on_click=save_scenario,
+        args=(scenario_name, {
+            "carbon_price": carbon_price,
+            "carbon_prices": carbon_prices,
+            "price_source": AUCTION if price_source == "Auction History" else MANUAL,
+            "target_regions": target_regions,
+            "recycled_content": recycled_content,
+            "renewable_energy": renewable_energy,
+            "process_efficiency": process_efficiency,
+            "baseline_emissions": baseline_emissions,
+        })
+    )
+    
+    # Most recent saves, narrowed to the target region when exactly one is selected
+    saved_scenarios = {
+        scenario.id: scenario
+        for scenario in scenario_store.list(region=target_regions[0] if len(target_regions) == 1 else None)
+    }
+    if saved_scenarios:
+        def describe_scenario(scenario_id):
+            scenario = saved_scenarios[scenario_id]
+            return f"{scenario.name} (€{scenario.carbon_price:.0f}/t, #{scenario.id})"
+        
+        loaded_scenario = st.selectbox(
+            "Saved Scenario",
+            options=list(saved_scenarios),
+            format_func=describe_scenario,
+            key="loaded_scenario"
+        )
+        st.button(
+            "LOAD SCENARIO",
+            on_click=apply_saved_scenario,
+            args=(saved_scenarios[loaded_scenario], region_options)
+        )
+        compared_scenarios = st.multiselect(
+            "Compare Scenarios",
+            options=list(saved_scenarios),
+            format_func=describe_scenario,
+            key="compared_scenarios"
+        )
+    else:
+        st.info("No saved scenarios yet")
+        compared_scenarios = []
+    
+    # Debug section
+    control_panel_section("DEBUG")
+    
+    # Exporting to CBAM_QUEST_METRICS_FILE (.prom for Prometheus, otherwise JSON lines) keeps instrumentation on
+    metrics_file = os.environ.get("CBAM_QUEST_METRICS_FILE")
+    show_metrics = st.checkbox("Render Metrics", value=bool(os.environ.get("CBAM_QUEST_METRICS")))
+    render_metrics = RerunMetrics() if show_metrics or metrics_file else None
+    metrics_panel = st.empty()
+    
+    # Shared reference datasets loaded in this server process
+    reference_memory = reference_registry.memory_usage()
+    st.markdown(
+        f"<p>Reference Data: {len(reference_memory)} datasets, "
+        f"{sum(reference_memory.values()) / 1024:.1f} KB shared</p>",
+        unsafe_allow_html=True
+    )
+    st.button("RELOAD REFERENCE DATA", on_click=reference_registry.reload)
+
+# Inputs the dashboard cards can depend on
+dashboard_inputs = {
+    "carbon_price": carbon_price,
+    "carbon_prices": carbon_prices,
+    "target_regions": target_regions,
+    "recycled_content": recycled_content,
+    "renewable_energy": renewable_energy,
+    "process_efficiency": process_efficiency,
+    "baseline_emissions": baseline_emissions,
+    "year_range": year_range,
+    "compared_scenarios": compared_scenarios,
+    "sku_version": sku_footprints.footprints.version if sku_footprints is not None else None,
+    "peer_version": peer_benchmarks.benchmarks.version if peer_benchmarks is not None else None,
+    "reference_version": reference_registry.version,
+}
+
+# Every card on the page this rerun, in page order
+dashboard_cards = [
+    ("CBAM IMPACT HEATMAP", cbam_heatmap_data),
+    ("CARBON INTENSITY CALCULATOR", carbon_intensity_data),
+    ("DECARBONIZATION ROADMAP", decarbonization_roadmap_data),
+    ("INDUSTRY BENCHMARKING", benchmarking_data),
+]
+if plant_baselines is not None:
+    dashboard_cards.append(("PORTFOLIO ROADMAP", portfolio_roadmap_data))
+if what_if_mode:
+    dashboard_cards.append(("OFFLINE WHAT-IF", what_if_data))
+dashboard_cards.append(("DECARBONIZATION SCENARIO RESULTS", scenario_results_data))
+if compared_scenarios:
+    dashboard_cards.append(("SCENARIO COMPARISON", scenario_comparison_data))
+dashboard_cards.append(("LEVER SENSITIVITY", sensitivity_data))
+prefetch_cards(dashboard_cards, dashboard_inputs)
 
 # Main content area
 col1, col2 = st.columns(2)
 
 with col1:
     # CBAM Impact Heatmap
-    pixel_card("CBAM IMPACT HEATMAP", cbam_heatmap_content)
+    pixel_card("CBAM IMPACT HEATMAP", cbam_heatmap_content, cbam_heatmap_data, dashboard_inputs)
     
     # Carbon Intensity Calculator
-    pixel_card("CARBON INTENSITY CALCULATOR", carbon_intensity_content)
+    pixel_card("CARBON INTENSITY CALCULATOR", carbon_intensity_content, carbon_intensity_data, dashboard_inputs)
 
 with col2:
     # Decarbonization Roadmap
-    pixel_card("DECARBONIZATION ROADMAP", decarbonization_roadmap_content)
+    pixel_card("DECARBONIZATION ROADMAP", decarbonization_roadmap_content, decarbonization_roadmap_data, dashboard_inputs)
     
     # Industry Benchmarking
-    pixel_card("INDUSTRY BENCHMARKING", benchmarking_content)
+    pixel_card("INDUSTRY BENCHMARKING", benchmarking_content, benchmarking_data, dashboard_inputs)
+
+# Every plant's trajectory when plant records are loaded
+if plant_baselines is not None:
+    pixel_card("PORTFOLIO ROADMAP", portfolio_roadmap_content, portfolio_roadmap_data, dashboard_inputs)
 
 # Bottom section - Scenario Results
 st.markdown("<h2>DECARBONIZATION SCENARIO RESULTS</h2>", unsafe_allow_html=True)
 
+# Lever sliders that redraw the results and roadmap without a server round trip
+if what_if_mode:
+    pixel_card("OFFLINE WHAT-IF", what_if_content, what_if_data, dashboard_inputs)
+
 # Scenario results card
-pixel_card("DECARBONIZATION SCENARIO RESULTS", scenario_results_content)
+pixel_card("DECARBONIZATION SCENARIO RESULTS", scenario_results_content, scenario_results_data, dashboard_inputs)
+
+# Saved scenarios side by side
+if compared_scenarios:
+    pixel_card("SCENARIO COMPARISON", scenario_comparison_content, scenario_comparison_data, dashboard_inputs)
+
+# Which lever matters most around the current setting
+pixel_card("LEVER SENSITIVITY", sensitivity_content, sensitivity_data, dashboard_inputs)
 
 # Footer
 st.markdown("<hr>", unsafe_allow_html=True)
 st.markdown(
     "<p style='text-align: center;'>Created for Crown Holdings - Sustainability Data Analyst Internship</p>", 
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+# Render metrics for this rerun
+if render_metrics is not None:
+    metrics_registry.observe(
+        render_metrics,
+        jsonl_path=metrics_file if metrics_file and not metrics_file.endswith(".prom") else None,
+        prometheus_path=metrics_file if metrics_file and metrics_file.endswith(".prom") else None
+    )
+    if show_metrics:
+        with metrics_panel.container():
+            render_metrics_panel(render_metrics)
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""Measure cold-start import time of the headless model package.
+
+Each sample imports the module in a fresh interpreter, so nothing is already
+cached in ``sys.modules``. Fails if the median exceeds the budget or if the
+import drags in the UI stack.
+
+    python benchmarks/import_time.py [--budget-ms 100] [--runs 10]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("streamlit", "plotly", "pandas", "numpy")
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+{module}.calculate_carbon_footprint(60, 40, 50)
+loaded = [m for m in {heavy!r} if m in sys.modules]
+print(elapsed * 1000, ",".join(loaded))
+"""
+
+
+def measure(module, runs):
+    """Return (import times in ms, heavy modules loaded) over ``runs`` fresh interpreters"""
+    samples = []
+    loaded = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=ROOT, check=True, capture_output=True, text=True,
+        ).stdout.split()
+        samples.append(float(output[0]))
+        if len(output) > 1:
+            loaded.update(output[1].split(","))
+    return samples, sorted(loaded)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="cbam_quest")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    args = parser.parse_args(argv)
+
+    samples, loaded = measure(args.module, args.runs)
+    median = statistics.median(samples)
+    print(f"import {args.module}: median {median:.1f} ms, "
+          f"min {min(samples):.1f} ms, max {max(samples):.1f} ms over {args.runs} runs")
+    if loaded:
+        print(f"heavy modules loaded: {', '.join(loaded)}")
+
+    if median > args.budget_ms or loaded:
+        print(f"FAIL: budget is {args.budget_ms:.0f} ms with no heavy imports")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
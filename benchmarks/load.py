@@ -0,0 +1,400 @@
+"""Load-test the dashboard with many concurrent sessions.
+
+Every simulated analyst opens ``app.py``, then keeps moving a random slider,
+multiselect or selectbox and waits for the rerun to finish. Sessions run
+concurrently against either
+
+* the headless AppTest harness: one thread per session in this process,
+  sharing the process-wide caches just as sessions of one server do, or
+* a Streamlit server, over the same websocket protocol the browser uses
+  (``--url``, or ``--launch`` to start one on a free port). This needs the
+  ``websockets`` package.
+
+For each number of sessions it reports p50/p95/p99 rerun latency, reruns per
+second across all sessions and the resident memory added per session
+(this process, or the server's given ``--server-pid`` or ``--launch``).
+Results can be saved as JSON and compared against a saved run like
+``suite.py``, flagging latency or throughput regressions.
+
+    python benchmarks/load.py --sessions 1 5 10 --reruns 10
+    python benchmarks/load.py --launch --sessions 10 20 --output benchmarks/results/load.json
+    python benchmarks/load.py --launch --sessions 10 20 --baseline benchmarks/results/load.json
+"""
+import argparse
+import asyncio
+import collections
+import datetime
+import gc
+import json
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+APP = ROOT / "app.py"
+INTERACTIONS = ("slider", "multiselect", "selectbox")
+PERCENTILES = (50, 95, 99)
+LAUNCH_TIMEOUT = 60
+
+
+def rss_bytes(pid="self"):
+    """Resident set size of a process from /proc (Linux); None elsewhere"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def random_value(widget, kind, rng):
+    """A random new value for a slider, multiselect or selectbox"""
+    if kind == "slider":
+        # Read from the element proto: a server session's widgets carry no current value
+        steps = int(round((widget.max - widget.min) / widget.step))
+        draw = [widget.min + widget.step * rng.randint(0, steps) for _ in range(2)]
+        cast = int if widget.proto.data_type == widget.proto.INT else float
+        if len(widget.proto.default) > 1:
+            return tuple(cast(value) for value in sorted(draw))
+        return cast(draw[0])
+    if kind == "multiselect":
+        return rng.sample(list(widget.options), rng.randint(0, min(3, len(widget.options))))
+    return rng.choice(list(widget.options))
+
+
+def interact(tree, rng, exclude=()):
+    """Set a random widget in an element tree to a random value; returns it and a label for it"""
+    candidates = [
+        (kind, widget)
+        for kind in INTERACTIONS
+        for widget in getattr(tree, kind)
+        if (widget.key or widget.label) not in exclude and (kind != "selectbox" or widget.options)
+    ]
+    kind, widget = rng.choice(candidates)
+    widget.set_value(random_value(widget, kind, rng))
+    return widget, f"{kind}:{widget.key or widget.label}"
+
+
+# Headless harness
+
+def run_harness(sessions, reruns, think_time, seed, exclude):
+    """Drive ``sessions`` AppTest sessions from their own threads"""
+    from streamlit.testing.v1 import AppTest
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    apps = [AppTest.from_file(str(APP), default_timeout=600) for _ in range(sessions)]
+    start_barrier = threading.Barrier(sessions)
+
+    def session(app, index):
+        rng = random.Random(seed + index)
+        start_barrier.wait()
+        for rerun in range(reruns + 1):
+            if rerun:
+                time.sleep(rng.uniform(0, think_time))
+                action = interact(app, rng, exclude)[1]
+            else:
+                action = "open"
+            started = time.perf_counter()
+            app.run()
+            elapsed = time.perf_counter() - started
+            with lock:
+                if rerun:
+                    latencies.append(elapsed)
+                if app.exception:
+                    errors.append(f"{action}: {app.exception[0].message}")
+
+    threads = [threading.Thread(target=session, args=(app, i)) for i, app in enumerate(apps)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Measured while every session is still open
+    return latencies, errors, time.perf_counter() - started, apps
+
+
+# Streamlit server
+
+class _RemoteRunner:
+    """Stands in for AppTest's runner so a widget that was just set can serialize its state.
+
+    Options arrive from the server already formatted, so every widget formats
+    its values with ``str``.
+    """
+
+    def __init__(self):
+        from streamlit.runtime.state.common import TESTING_KEY
+
+        self._session_state = {TESTING_KEY: collections.defaultdict(lambda: str)}
+        self._cleared_form_ids = set()
+
+
+class ServerSession:
+    """One browser-like session over the Streamlit websocket protocol"""
+
+    def __init__(self, url):
+        self.url = url.rstrip("/") + "/_stcore/stream"
+        self.websocket = None
+        self.tree = None
+        # Like the browser, send the last value of every widget moved so far on each rerun
+        self.widget_states = {}
+        self._cache = {}
+
+    async def open(self):
+        import websockets
+
+        self.websocket = await websockets.connect(self.url, max_size=None)
+        return await self.rerun()
+
+    def set_widget(self, widget):
+        self.widget_states[widget.id] = widget._widget_state
+
+    async def rerun(self):
+        """Request a rerun and wait for it to finish; returns an error message or None"""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.testing.v1.element_tree import parse_tree_from_messages
+
+        request = BackMsg()
+        request.rerun_script.query_string = ""
+        request.rerun_script.widget_states.widgets.extend(self.widget_states.values())
+        await self.websocket.send(request.SerializeToString())
+
+        deltas = []
+        while True:
+            message = ForwardMsg()
+            message.ParseFromString(await self.websocket.recv())
+            if message.ref_hash:
+                # Large messages already sent to this session arrive as a reference
+                cached = ForwardMsg()
+                cached.CopyFrom(self._cache[message.ref_hash])
+                cached.metadata.CopyFrom(message.metadata)
+                message = cached
+            elif message.metadata.cacheable:
+                self._cache[message.hash] = message
+            kind = message.WhichOneof("type")
+            if kind == "delta":
+                deltas.append(message)
+            elif kind == "script_finished":
+                self.tree = parse_tree_from_messages(deltas)
+                self.tree._runner = _RemoteRunner()
+                exceptions = self.tree.exception
+                return exceptions[0].message if len(exceptions) else None
+
+    async def close(self):
+        if self.websocket is not None:
+            await self.websocket.close()
+
+
+def run_server(url, sessions, reruns, think_time, seed, exclude):
+    """Drive ``sessions`` websocket sessions of a running server concurrently"""
+    latencies, errors = [], []
+
+    async def session(client, index):
+        rng = random.Random(seed + index)
+        error = await client.open()
+        if error:
+            errors.append(f"open: {error}")
+        for _ in range(reruns):
+            await asyncio.sleep(rng.uniform(0, think_time))
+            widget, action = interact(client.tree, rng, exclude)
+            client.set_widget(widget)
+            started = time.perf_counter()
+            error = await client.rerun()
+            latencies.append(time.perf_counter() - started)
+            if error:
+                errors.append(f"{action}: {error}")
+
+    async def main():
+        clients = [ServerSession(url) for _ in range(sessions)]
+        started = time.perf_counter()
+        await asyncio.gather(*(session(client, i) for i, client in enumerate(clients)))
+        return time.perf_counter() - started, clients
+
+    loop = asyncio.new_event_loop()
+    elapsed, clients = loop.run_until_complete(main())
+    # Sessions stay connected until the server's memory has been sampled
+    return latencies, errors, elapsed, (loop, clients)
+
+
+def close_server_sessions(handle):
+    async def close_all(clients):
+        await asyncio.gather(*(client.close() for client in clients))
+
+    loop, clients = handle
+    loop.run_until_complete(close_all(clients))
+    loop.close()
+
+
+def launch_server(port):
+    """Start ``streamlit run app.py`` headless on ``port`` and wait until it is healthy"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", str(APP), "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + LAUNCH_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError(f"streamlit did not start on port {port} within {LAUNCH_TIMEOUT}s")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def summarize(sessions, latencies, errors, elapsed, rss_before, rss_after):
+    samples = np.asarray(latencies)
+    result = {
+        "sessions": sessions,
+        "reruns": len(samples),
+        "errors": len(errors),
+        "elapsed_s": elapsed,
+        "throughput_per_s": len(samples) / elapsed if elapsed else 0.0,
+        **{f"p{p}_s": float(np.percentile(samples, p)) if len(samples) else None for p in PERCENTILES},
+        "rss_bytes": rss_after,
+        "rss_per_session_bytes": (rss_after - rss_before) / sessions
+        if rss_before is not None and rss_after is not None else None,
+    }
+    return result
+
+
+def compare(results, baseline, threshold):
+    """(level, metric) pairs whose p95 latency rose or throughput fell by more than ``threshold``"""
+    regressions = []
+    for level, result in results.items():
+        previous = baseline.get("results", {}).get(level)
+        if not previous:
+            continue
+        if result["p95_s"] and previous["p95_s"] and result["p95_s"] > previous["p95_s"] * (1 + threshold):
+            regressions.append((level, "p95_s"))
+        if result["throughput_per_s"] < previous["throughput_per_s"] / (1 + threshold):
+            regressions.append((level, "throughput_per_s"))
+    return regressions
+
+
+def _print_row(result):
+    rss = result["rss_per_session_bytes"]
+    print(f"{result['sessions']:>8} {result['reruns']:>7} {result['errors']:>6} "
+          + " ".join(f"{result[f'p{p}_s'] * 1000:9.0f}" if result[f"p{p}_s"] is not None else f"{'-':>9}"
+                     for p in PERCENTILES)
+          + f" {result['throughput_per_s']:9.2f}"
+          + (f" {result['rss_bytes'] / 2**20:9.0f} {rss / 2**20:10.1f}" if rss is not None else f" {'-':>9} {'-':>10}"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10],
+                        help="concurrent session counts to test, one run each")
+    parser.add_argument("--reruns", type=int, default=10, help="interactions per session")
+    parser.add_argument("--think-time", type=float, default=0.5,
+                        help="maximum random pause before each interaction (seconds)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--exclude", nargs="*", default=[], metavar="KEY",
+                        help="widget keys (or labels) never to touch")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="drive a running server, e.g. http://localhost:8501")
+    target.add_argument("--launch", action="store_true", help="start a server for the test")
+    parser.add_argument("--server-pid", type=int, help="server process to sample memory from with --url")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed p95 slowdown or throughput drop against the baseline (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+    exclude = set(args.exclude)
+
+    server = None
+    if args.launch:
+        port = _free_port()
+        server = launch_server(port)
+        args.url, args.server_pid = f"http://localhost:{port}", server.pid
+    mode = "server" if args.url else "harness"
+    pid = args.server_pid if args.url else "self"
+    ws_url = args.url.replace("http", "ws", 1) if args.url else None
+
+    try:
+        # One session first, so shared caches are warm before anything is measured
+        if ws_url:
+            handle = run_server(ws_url, 1, 1, 0, args.seed, exclude)[3]
+            close_server_sessions(handle)
+        else:
+            run_harness(1, 1, 0, args.seed, exclude)
+
+        print(f"{mode} mode, {args.reruns} reruns per session")
+        print(f"{'sessions':>8} {'reruns':>7} {'errors':>6} "
+              + " ".join(f"{f'p{p} ms':>9}" for p in PERCENTILES)
+              + f" {'reruns/s':>9} {'RSS MB':>9} {'MB/session':>10}")
+        results, all_errors = {}, []
+        for sessions in args.sessions:
+            gc.collect()
+            rss_before = rss_bytes(pid) if pid else None
+            if ws_url:
+                latencies, errors, elapsed, handle = run_server(
+                    ws_url, sessions, args.reruns, args.think_time, args.seed, exclude)
+                rss_after = rss_bytes(pid) if pid else None
+                close_server_sessions(handle)
+            else:
+                latencies, errors, elapsed, handle = run_harness(
+                    sessions, args.reruns, args.think_time, args.seed, exclude)
+                rss_after = rss_bytes(pid)
+                del handle
+            results[f"sessions={sessions}"] = summarize(
+                sessions, latencies, errors, elapsed, rss_before, rss_after)
+            _print_row(results[f"sessions={sessions}"])
+            all_errors.extend(errors)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    for error in all_errors[:10]:
+        print(f"ERROR {error}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mode": mode,
+            "reruns": args.reruns,
+            "think_time": args.think_time,
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare(results, baseline, args.threshold)
+        for level, metric in regressions:
+            before, after = baseline["results"][level][metric], results[level][metric]
+            print(f"REGRESSION {level} {metric}: {before:.3f} -> {after:.3f}")
+        if regressions:
+            return 1
+    return 1 if all_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
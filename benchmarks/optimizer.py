@@ -0,0 +1,70 @@
+"""Compare the pruned lever optimizer against exhaustive search.
+
+Checks that both solvers agree on feasibility and minimum implementation
+cost for a sweep of targets, then reports how long each takes.
+
+    python benchmarks/optimizer.py [--repeat 5]
+"""
+import argparse
+import itertools
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cbam_quest.optimizer import exhaustive_search, optimize_levers  # noqa: E402
+
+CARBON_PRICES = (50, 90, 150)
+TARGET_FOOTPRINTS = (None, 0.4, 0.5, 1.0, 1.55, 2.0, 3.0)
+FEE_BUDGETS = (None, 2.0, 5.0, 8.0, 12.0, 20.0)
+
+
+def _cases():
+    for price, footprint, budget in itertools.product(CARBON_PRICES, TARGET_FOOTPRINTS, FEE_BUDGETS):
+        if footprint is not None or budget is not None:
+            yield price, footprint, budget
+
+
+def _time(solver, case, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = solver(*case)
+        samples.append(time.perf_counter() - start)
+    return result, statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    mismatches = 0
+    pruned_times, exhaustive_times = [], []
+    for case in _cases():
+        pruned, pruned_time = _time(optimize_levers, case, args.repeat)
+        exhaustive, exhaustive_time = _time(exhaustive_search, case, args.repeat)
+        pruned_times.append(pruned_time)
+        exhaustive_times.append(exhaustive_time)
+
+        agree = (pruned is None) == (exhaustive is None) and (
+            pruned is None
+            or abs(pruned.implementation_cost - exhaustive.implementation_cost) < 1e-9
+        )
+        if not agree:
+            mismatches += 1
+            print(f"MISMATCH price={case[0]} footprint={case[1]} budget={case[2]}: "
+                  f"{pruned} vs {exhaustive}")
+
+    pruned_ms = statistics.median(pruned_times) * 1000
+    exhaustive_ms = statistics.median(exhaustive_times) * 1000
+    print(f"{len(pruned_times)} cases, {mismatches} mismatches")
+    print(f"pruned:     {pruned_ms:8.2f} ms median")
+    print(f"exhaustive: {exhaustive_ms:8.2f} ms median ({exhaustive_ms / pruned_ms:.0f}x slower)")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Time peer index builds, percentile lookups and appends.
+
+Builds the sorted per-metric indexes over a synthetic peer dataset, then
+times a percentile rank, a full set of quantile bands and a whole radar's
+``compare`` (what every dashboard rerun pays), against ``numpy`` scans of the
+same values. Appending a batch of new peers is timed against rebuilding the
+indexes from scratch, and the results are checked against ``numpy``.
+
+    python benchmarks/peers.py [--peers 1000000] [--append 1000] [--repeat 50]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from cbam_quest.peers import QUANTILES, PeerBenchmarks  # noqa: E402
+
+METRICS = ("recycled_content", "renewable_energy", "transport_intensity", "process_efficiency", "can_footprint")
+
+
+def peer_facilities(count, rng):
+    return pd.DataFrame({
+        "facility_id": np.arange(count).astype(str),
+        "recycled_content": rng.beta(3, 3, count) * 100,
+        "renewable_energy": rng.beta(2, 3, count) * 100,
+        "transport_intensity": rng.lognormal(3.7, 0.4, count),
+        "process_efficiency": rng.beta(4, 3, count) * 100,
+        "can_footprint": rng.normal(110, 15, count),
+    })
+
+
+def _time(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--peers", type=int, default=1_000_000)
+    parser.add_argument("--append", type=int, default=1000, help="peers per appended batch")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    peers = peer_facilities(args.peers, rng)
+
+    start = time.perf_counter()
+    benchmarks = PeerBenchmarks(METRICS)
+    benchmarks.append(peers)
+    print(f"build {args.peers:,} peers x {len(METRICS)} metrics   {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    values = {metric: float(peers[metric].iloc[0]) for metric in METRICS}
+    column = peers["recycled_content"].to_numpy()
+    cases = {
+        "percentile rank": lambda: benchmarks.percentile("recycled_content", 62.0),
+        "numpy rank scan": lambda: (column < 62.0).mean(),
+        "quantile bands": lambda: benchmarks.quantiles("recycled_content"),
+        "numpy quantiles": lambda: np.quantile(column, QUANTILES),
+        "compare all axes": lambda: benchmarks.compare(values),
+    }
+    for name, func in cases.items():
+        print(f"{name:<33} {_time(func, args.repeat) * 1e6:8.1f} us")
+
+    batch = peer_facilities(args.append, rng)
+    print(f"append {args.append:,} peers{'':<18} {_time(lambda: benchmarks.append(batch), 10) * 1000:8.2f} ms")
+    combined = pd.concat([peers, batch])
+    print(f"rebuild from scratch{'':<13} "
+          f"{_time(lambda: PeerBenchmarks(METRICS).append(combined), 3) * 1000:8.2f} ms")
+
+    # Each timed append above added the batch again
+    expected = np.concatenate([peers["can_footprint"].to_numpy()] + [batch["can_footprint"].to_numpy()] * 10)
+    assert benchmarks.peers("can_footprint") == len(expected)
+    assert np.allclose(benchmarks.quantiles("can_footprint"), np.quantile(expected, QUANTILES))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Scaling of the portfolio roadmap with the number of plants.
+
+For each portfolio size, simulates every plant's trajectory, builds the
+batched roadmap figure and serializes it, then reports build time,
+serialization time and payload size. Sizes up to ``--naive-max`` are also
+drawn the naive way, one Scatter trace per plant, for comparison.
+
+    python benchmarks/portfolio.py [--sizes 10 100 1000 10000] [--repeat 3]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import plotly.graph_objects as go  # noqa: E402
+
+from cbam_quest.figures import create_portfolio_roadmap  # noqa: E402
+from cbam_quest.trajectory import simulate  # noqa: E402
+
+REGIONS = 30
+
+
+def _portfolio(plants, seed=0):
+    rng = np.random.default_rng(seed)
+    baselines = rng.lognormal(8, 1, plants)
+    groups = tuple(f"Region {i:02d}" for i in rng.integers(0, REGIONS, plants))
+    return baselines, groups
+
+
+def _simulated(baselines, groups):
+    trajectory = simulate(60, 40, 50, 90, baselines)
+    return trajectory.years, groups, trajectory.emissions
+
+
+def _batched(years, groups, emissions):
+    builder = create_portfolio_roadmap.__wrapped__
+    return builder(tuple(years.tolist()), groups, tuple(map(tuple, emissions.tolist())))
+
+
+def _naive(years, groups, emissions):
+    fig = go.Figure()
+    for group, row in zip(groups, emissions):
+        fig.add_trace(go.Scatter(x=years.tolist(), y=row.tolist(), mode="lines", name=group))
+    return fig
+
+
+def _measure(build, years, groups, emissions, repeat):
+    build_times, serialize_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = build(years, groups, emissions)
+        build_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        payload = fig.to_json()
+        serialize_times.append(time.perf_counter() - start)
+    return statistics.median(build_times), statistics.median(serialize_times), len(payload), len(fig.data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--naive-max", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    # Warm up Plotly's validators so the first size isn't charged for them
+    _batched(*_simulated(*_portfolio(10)))
+
+    print(f"{'plants':>7} {'mode':>8} {'build ms':>9} {'json ms':>8} {'payload KB':>11} {'traces':>7}")
+    for plants in args.sizes:
+        years, groups, emissions = _simulated(*_portfolio(plants))
+        modes = [("batched", _batched)]
+        if plants <= args.naive_max:
+            modes.append(("naive", _naive))
+        for mode, build in modes:
+            build_s, serialize_s, payload, traces = _measure(build, years, groups, emissions, args.repeat)
+            print(f"{plants:>7} {mode:>8} {build_s * 1000:9.1f} {serialize_s * 1000:8.1f} "
+                  f"{payload / 1024:11.1f} {traces:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Time auction history ingestion and certificate price lookups.
+
+Writes a synthetic auction history with millions of timestamped clearing
+prices, then times the first full ingest, a refresh after one day of
+auctions is appended, a refresh with nothing new (what every dashboard rerun
+pays), reopening from the on-disk cache, and building forward price paths.
+
+    python benchmarks/prices.py [--auctions 5000000] [--repeat 20]
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from cbam_quest.prices import AuctionHistory  # noqa: E402
+
+START = pd.Timestamp("2013-01-01")
+SECONDS_PER_DAY = 86400
+
+
+def _auctions(count, days, rng):
+    offsets = np.sort(rng.integers(0, days * SECONDS_PER_DAY, count))
+    return pd.DataFrame({
+        "date": (START + pd.to_timedelta(offsets, unit="s")).strftime("%Y-%m-%dT%H:%M:%S"),
+        "auction_price": (70 * np.exp(np.cumsum(rng.normal(0, 0.0005, count)))).round(2),
+        "auction_volume": rng.integers(100_000, 4_000_000, count),
+    })
+
+
+def _time(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--auctions", type=int, default=5_000_000)
+    parser.add_argument("--days", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path, cache_dir = Path(tmp) / "auctions.csv", Path(tmp) / "cache"
+        _auctions(args.auctions, args.days, rng).to_csv(path, index=False)
+        size = path.stat().st_size
+
+        history = AuctionHistory(path, cache_dir=cache_dir)
+        start = time.perf_counter()
+        rows = history.refresh()
+        elapsed = time.perf_counter() - start
+        print(f"full ingest        {elapsed:8.2f} s   ({rows:,} auctions, {rows / elapsed:,.0f}/s, "
+              f"{size / elapsed / 2**20:.0f} MB/s)")
+
+        last_day = START + pd.Timedelta(days=args.days)
+        day = _auctions(args.auctions // args.days, 1, rng)
+        day["date"] = [last_day.strftime("%Y-%m-%dT") + value[11:] for value in day["date"]]
+        day.to_csv(path, mode="a", header=False, index=False)
+        start = time.perf_counter()
+        rows = history.refresh()
+        print(f"append one day     {(time.perf_counter() - start) * 1000:8.2f} ms  ({rows:,} auctions)")
+
+        cases = {
+            "refresh unchanged": history.refresh,
+            "reopen from cache": lambda: AuctionHistory(path, cache_dir=cache_dir).weekly(),
+            "certificate price": history.certificate_price,
+            "forward path": lambda: AuctionHistory(path, cache_dir=cache_dir).forward_path("fitted"),
+            "forward path cached": lambda: history.forward_path("fitted"),
+        }
+        for name, func in cases.items():
+            print(f"{name:<18} {_time(func, args.repeat) * 1000:8.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
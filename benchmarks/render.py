@@ -0,0 +1,109 @@
+"""Time figure construction, JSON serialization and reruns with and without the card pool.
+
+Builds the charts a lever change redraws one after another and then on a
+thread pool, serializes them with Plotly's ``json`` and ``orjson`` engines,
+and times slider reruns through Streamlit's headless harness with the card
+pool disabled (``CBAM_QUEST_CARD_WORKERS=0``) and enabled. Both rerun runs
+move the slider through the same values, so they draw the same charts.
+
+    python benchmarks/render.py [--workers 4] [--reruns 10] [--repeat 20]
+"""
+import argparse
+import itertools
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import plotly.io as pio  # noqa: E402
+
+from cbam_quest import figures  # noqa: E402
+
+
+def _uncached(builder):
+    """The raw builder behind the figure cache"""
+    return getattr(builder, "__wrapped__", builder)
+
+
+# The charts redrawn when a lever slider moves
+BUILDS = {
+    "roadmap": lambda: _uncached(figures.create_decarbonization_roadmap)(
+        tuple(range(2026, 2035)), (83, 74, 63, 54, 50, 50, 50, 50, 50), (0.2, 0.4, 0.7, 1.4, 2.7, 3.4, 4.1, 4.8, 5.6)),
+    "benchmark radar": lambda: _uncached(figures.create_benchmark_radar)(60, 40, 50),
+    "scenario results": lambda: _uncached(figures.create_scenario_results_chart)(125000, 62500.0),
+    "fee trajectory": lambda: _uncached(figures.create_fee_trajectory_chart)(
+        tuple(range(2026, 2035)), (0.3, 0.6, 1.1, 2.5, 5.5, 6.9, 8.3, 9.7, 11.3), (0.2, 0.4, 0.7, 1.4, 2.7, 3.4, 4.1, 4.8, 5.6)),
+    "tornado": lambda: _uncached(figures.create_tornado_chart)(
+        ("A", "B", "C", "D"), 5.6, (6.4, 6.4, 6.4, 4.1), (4.9, 4.9, 4.9, 7.2), "CBAM Fees (€M)"),
+    "sobol": lambda: _uncached(figures.create_sobol_chart)(
+        ("A", "B", "C", "D"), (0.13, 0.13, 0.13, 0.58), (0.14, 0.14, 0.14, 0.6)),
+}
+
+
+def _time(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def _serialize(figs, engine):
+    # What st.plotly_chart does with each figure
+    for fig in figs:
+        pio.to_json(fig.to_dict(), validate=False, engine=engine)
+
+
+def rerun_latency(workers, reruns):
+    """Median slider rerun, in seconds, with ``workers`` card pool threads"""
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["CBAM_QUEST_CARD_WORKERS"] = str(workers)
+    app = AppTest.from_file(str(ROOT / "app.py"), default_timeout=120)
+    app.run()
+    levels = itertools.cycle(range(0, 101, 7))
+    samples = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.slider(key="energy_slider").set_value(next(levels)).run()
+        samples.append(time.perf_counter() - start)
+        if app.exception:
+            raise RuntimeError(f"app.py raised during the benchmark: {app.exception[0].message}")
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--skip-reruns", action="store_true", help="only time figure builds and serialization")
+    args = parser.parse_args(argv)
+
+    builds = list(BUILDS.values())
+    with ThreadPoolExecutor(args.workers) as pool:
+        sequential = _time(lambda: [build() for build in builds], args.repeat)
+        pooled = _time(lambda: list(pool.map(lambda build: build(), builds)), args.repeat)
+    print(f"build {len(builds)} figures sequentially    {sequential * 1000:8.2f} ms")
+    print(f"build {len(builds)} figures on {args.workers} threads     {pooled * 1000:8.2f} ms")
+
+    figs = [build() for build in builds]
+    for engine in ("json", "orjson"):
+        print(f"serialize with {engine:<18} {_time(lambda: _serialize(figs, engine), args.repeat) * 1000:8.2f} ms")
+
+    if not args.skip_reruns:
+        before = rerun_latency(0, args.reruns)
+        after = rerun_latency(args.workers, args.reruns)
+        print(f"slider rerun, cards in page order {before * 1000:8.1f} ms")
+        print(f"slider rerun, {args.workers} card workers    {after * 1000:8.1f} ms ({before / after:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Throughput and peak memory of quarterly report generation.
+
+Writes synthetic declaration files of increasing size (a year of lines, a
+quarter of which fall in the reported quarter), then generates the XML and
+CSV report for each and prints lines per second alongside the peak memory
+traced while generating. The peak should stay flat as the file grows.
+
+    python benchmarks/report.py [--sizes 250000 1000000 4000000] [--chunk-rows 250000]
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from cbam_quest.report import generate_report  # noqa: E402
+
+CN_CODES = ("76129020", "76129080", "76061192", "76011000", "76069200")
+ORIGINS = ("CN", "TR", "AE", "IN", "NO", "XX")
+SUPPLIERS = 200
+
+
+def _declarations(path, lines, seed=0):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rng = np.random.default_rng(seed)
+    with pq.ParquetWriter(path, pa.schema([
+        ("cn_code", pa.string()), ("origin", pa.string()), ("supplier_id", pa.string()),
+        ("import_date", pa.timestamp("ns")), ("mass_tonnes", pa.float64()), ("supplier_direct", pa.float64()),
+    ])) as writer:
+        for first in range(0, lines, 1_000_000):
+            n = min(1_000_000, lines - first)
+            supplier_direct = rng.uniform(1.5, 9, n)
+            supplier_direct[rng.random(n) < 0.7] = np.nan
+            writer.write_table(pa.table({
+                "cn_code": rng.choice(CN_CODES, n),
+                "origin": rng.choice(ORIGINS, n),
+                "supplier_id": np.char.add("S", rng.integers(0, SUPPLIERS, n).astype(str)),
+                "import_date": pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D"),
+                "mass_tonnes": rng.lognormal(2, 1, n),
+                "supplier_direct": supplier_direct,
+            }))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250_000, 1_000_000, 4_000_000])
+    parser.add_argument("--chunk-rows", type=int, default=250_000)
+    parser.add_argument("--quarter", default="2026Q2")
+    args = parser.parse_args(argv)
+
+    print(f"{'lines':>10} {'reported':>10} {'seconds':>8} {'lines/s':>11} {'peak MB':>8} {'XML MB':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = Path(tmp) / f"declarations_{size}.parquet"
+            _declarations(path, size)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            xml_path, _, lines = generate_report(path, args.quarter, Path(tmp) / "reports",
+                                                 chunk_rows=args.chunk_rows)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{size:>10,} {lines:>10,} {elapsed:>8.2f} {size / elapsed:>11,.0f} "
+                  f"{peak / 2**20:>8.1f} {xml_path.stat().st_size / 2**20:>7.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Time the per-SKU footprint engine on a synthetic bill of materials.
+
+Builds a bill of materials for tens of thousands of can SKUs (body and end
+alloys, tab, lacquers, basecoat, ink and overvarnish), then times the full
+computation, a factor change for one material, replacing a few hundred
+SKUs, reloading an unchanged file's rows, and the card's top-N and search
+views. Each incremental result is checked against a full recompute.
+
+    python benchmarks/sku.py [--skus 50000] [--changed 500] [--repeat 20]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from cbam_quest.reference import MATERIAL_FACTORS, registry  # noqa: E402
+from cbam_quest.sku import SkuFootprints  # noqa: E402
+
+SIZES = ("250ML", "330ML", "355ML", "440ML", "500ML", "568ML")
+BODY_GRAMS = {"250ML": 8.5, "330ML": 10.5, "355ML": 11.0, "440ML": 12.8, "500ML": 14.0, "568ML": 15.5}
+# (material, grams per can, recycled share range) for the parts every SKU has
+PARTS = (
+    ("AA5182", 2.3, (0.2, 0.5)),  # end
+    ("AA5182", 0.25, (0.2, 0.5)),  # tab
+    ("internal_lacquer", 0.18, None),
+    ("external_basecoat", 0.1, None),
+    ("overvarnish", 0.05, None),
+)
+
+
+def bill_of_materials(skus, seed=0):
+    rng = np.random.default_rng(seed)
+    sizes = rng.choice(SIZES, skus)
+    codes = np.char.add(np.char.add("CAN-", sizes), np.char.add("-", np.char.zfill(np.arange(skus).astype(str), 6)))
+    frames = [pd.DataFrame({
+        "sku": codes,
+        "material": "AA3104",
+        "mass_g": np.array([BODY_GRAMS[size] for size in sizes]) * rng.uniform(0.95, 1.05, skus),
+        "recycled_share": rng.uniform(0.5, 0.9, skus),
+    })]
+    for material, grams, recycled in PARTS:
+        frames.append(pd.DataFrame({
+            "sku": codes,
+            "material": material,
+            "mass_g": grams * rng.uniform(0.8, 1.2, skus),
+            "recycled_share": rng.uniform(*recycled, skus) if recycled else 0.0,
+        }))
+    frames.append(pd.DataFrame({
+        "sku": codes,
+        "material": rng.choice(["ink_conventional", "ink_uv"], skus),
+        "mass_g": rng.uniform(0.01, 0.08, skus),  # ink coverage
+        "recycled_share": 0.0,
+    }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _time(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def _check(engine, bom, factors):
+    full = SkuFootprints(factors)
+    full.update_bom(bom, replace=True)
+    expected = full.results().reindex(engine.skus)
+    assert np.allclose(engine.results().to_numpy(dtype=float), expected.to_numpy(dtype=float), equal_nan=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--skus", type=int, default=50_000)
+    parser.add_argument("--changed", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    bom = bill_of_materials(args.skus)
+    factors = registry.get(MATERIAL_FACTORS)
+    print(f"{args.skus:,} SKUs, {len(bom):,} bill-of-materials lines")
+
+    def full():
+        engine = SkuFootprints(factors)
+        engine.update_bom(bom, replace=True)
+        return engine
+
+    print(f"{'full compute':<22} {_time(full, args.repeat) * 1000:8.2f} ms")
+    engine = full()
+
+    # Alternate the body alloy's primary factor so every repeat is a real change
+    alternatives = []
+    for scale in (1.05, 1.0):
+        columns = {name: np.array(factors[name]) for name in factors}
+        columns["primary"] = np.where(columns["material"] == "AA3104", columns["primary"] * scale, columns["primary"])
+        alternatives.append(columns)
+    step = iter(range(10**9))
+    print(f"{'one material factor':<22} {_time(lambda: engine.set_factors(alternatives[next(step) % 2]), args.repeat) * 1000:8.2f} ms")
+    engine.set_factors(factors)
+
+    rng = np.random.default_rng(1)
+    changed_skus = rng.choice(bom["sku"].unique(), args.changed, replace=False)
+    changed_rows = bom[bom["sku"].isin(changed_skus)].copy()
+
+    def update():
+        changed_rows["mass_g"] *= 1.01
+        engine.update_bom(changed_rows)
+
+    print(f"{f'{args.changed} SKUs changed':<22} {_time(update, args.repeat) * 1000:8.2f} ms")
+    bom.loc[changed_rows.index, "mass_g"] = changed_rows["mass_g"]
+    _check(engine, bom, factors)
+    print(f"{'unchanged file reload':<22} {_time(lambda: engine.update_bom(bom, replace=True), args.repeat) * 1000:8.2f} ms")
+
+    cases = {
+        "results table": engine.results,
+        "top 10": lambda: engine.top(10),
+        "bottom 100": lambda: engine.top(100, largest=False),
+        "search '330ML-0012'": lambda: engine.search("330ML-0012"),
+    }
+    for name, func in cases.items():
+        print(f"{name:<22} {_time(func, args.repeat) * 1000:8.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
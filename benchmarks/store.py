@@ -0,0 +1,85 @@
+"""Time the scenario store with tens of thousands of saved scenarios.
+
+Fills a throwaway database in batches, then times the queries the dashboard
+makes on every rerun: listing recent scenarios (unfiltered, by region, by
+carbon price) and loading a handful for comparison.
+
+    python benchmarks/store.py [--scenarios 50000] [--repeat 20]
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from cbam_quest.store import ScenarioStore  # noqa: E402
+
+REGIONS = ("Europe", "UK", "Middle East", "Asia", "North America")
+BATCH = 5000
+
+
+def _scenarios(count, rng):
+    prices = rng.integers(10, 31, count) * 5
+    levers = rng.integers(0, 101, (count, 3))
+    for i in range(count):
+        yield {
+            "name": f"Scenario {i}",
+            "carbon_price": int(prices[i]),
+            "target_regions": list(rng.choice(REGIONS, rng.integers(1, 3), replace=False)),
+            "recycled_content": int(levers[i, 0]),
+            "renewable_energy": int(levers[i, 1]),
+            "process_efficiency": int(levers[i, 2]),
+        }
+
+
+def _time(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "scenarios.sqlite"
+        store = ScenarioStore(path)
+
+        start = time.perf_counter()
+        scenarios = list(_scenarios(args.scenarios, rng))
+        ids = []
+        for first in range(0, len(scenarios), BATCH):
+            ids += store.save_many(scenarios[first:first + BATCH])
+        elapsed = time.perf_counter() - start
+        print(f"saved {len(ids):,} scenarios in {elapsed:.2f} s "
+              f"({len(ids) / elapsed:,.0f}/s, {path.stat().st_size / len(ids):.0f} bytes each)")
+
+        compared = [int(i) for i in rng.choice(ids, 5, replace=False)]
+        cases = {
+            "list recent": lambda: store.list(),
+            "list region": lambda: store.list(region="Asia"),
+            "list region + price": lambda: store.list(region="Asia", min_price=100, max_price=120),
+            "list price": lambda: store.list(min_price=145),
+            "load one": lambda: store.load(compared[0]),
+            "compare five": lambda: store.compare(compared),
+        }
+        for name, func in cases.items():
+            print(f"{name:<22} {_time(func, args.repeat) * 1000:8.2f} ms")
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
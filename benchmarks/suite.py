@@ -0,0 +1,206 @@
+"""Benchmark suite for the model functions, figure builders and full reruns.
+
+Each case is timed over several repeats and summarised by its median. Results
+are written as JSON so runs can be compared; with ``--baseline`` any case whose
+median is more than ``--threshold`` slower than the baseline is flagged and
+the exit status is non-zero.
+
+    python benchmarks/suite.py --output benchmarks/results/latest.json
+    python benchmarks/suite.py --baseline benchmarks/results/main.json --threshold 0.2
+"""
+import argparse
+import datetime
+import itertools
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+DECLARATION_LINES = 1_000_000
+LEVER_SETTINGS = list(itertools.product(range(0, 101, 25), range(0, 101, 25), range(0, 101, 25)))
+
+
+def _uncached(builder):
+    """The raw builder behind the figure cache"""
+    return getattr(builder, "__wrapped__", builder)
+
+
+def model_cases():
+    import numpy as np
+
+    import pandas as pd
+
+    from cbam_quest import engine
+    from cbam_quest.embedded import calculate as embedded_emissions
+    from cbam_quest.roadmap import generate_roadmap_phases
+    from cbam_quest.sensitivity import DEFAULT_SAMPLES, analyze
+    from cbam_quest.trajectory import simulate
+
+    def footprint():
+        for levers in LEVER_SETTINGS:
+            engine.calculate_carbon_footprint(*levers)
+
+    def costs():
+        for levers in LEVER_SETTINGS:
+            engine.calculate_implementation_costs(*levers)
+
+    def phases():
+        for levers in LEVER_SETTINGS:
+            generate_roadmap_phases(*levers)
+
+    def grid():
+        engine.evaluate_grid()
+
+    rng = np.random.default_rng(0)
+    declarations = pd.DataFrame({
+        "cn_code": rng.choice(["7601", "7604", "76061100", "7607", "76129020", "7616"], DECLARATION_LINES),
+        "origin": rng.choice(["CN", "IN", "AE", "NO", "TR", "CA", "RU", "ZA"], DECLARATION_LINES),
+        "mass_tonnes": rng.uniform(1, 50, DECLARATION_LINES),
+    })
+
+    def trajectories():
+        r, e, p = (np.array(levers) for levers in zip(*LEVER_SETTINGS))
+        simulate(r, e, p, np.full(r.shape, 90))
+
+    return {
+        f"model.calculate_carbon_footprint[x{len(LEVER_SETTINGS)}]": footprint,
+        f"model.calculate_implementation_costs[x{len(LEVER_SETTINGS)}]": costs,
+        f"model.generate_roadmap_phases[x{len(LEVER_SETTINGS)}]": phases,
+        "model.evaluate_grid[101^3x21]": grid,
+        f"model.trajectory_simulate[x{len(LEVER_SETTINGS)}]": trajectories,
+        f"model.embedded_calculate[{DECLARATION_LINES:,} lines]": lambda: embedded_emissions(declarations),
+        f"model.sensitivity_analyze[{DEFAULT_SAMPLES}x6]": lambda: analyze(60, 40, 50, 90),
+    }
+
+
+def figure_cases():
+    from cbam_quest import figures
+
+    return {
+        "figure.create_cbam_heatmap": lambda: _uncached(figures.create_cbam_heatmap)(["Europe"], 90),
+        "figure.create_decarbonization_roadmap": lambda: _uncached(figures.create_decarbonization_roadmap)(
+            tuple(range(2026, 2035)), (83, 74, 63, 54, 50, 50, 50, 50, 50), (0.2, 0.4, 0.7, 1.4, 2.7, 3.4, 4.1, 4.8, 5.6)),
+        "figure.create_fee_trajectory_chart": lambda: _uncached(figures.create_fee_trajectory_chart)(
+            tuple(range(2026, 2035)), (0.3, 0.6, 1.1, 2.5, 5.5, 6.9, 8.3, 9.7, 11.3), (0.2, 0.4, 0.7, 1.4, 2.7, 3.4, 4.1, 4.8, 5.6)),
+        "figure.create_benchmark_radar": lambda: _uncached(figures.create_benchmark_radar)(60, 40, 50),
+        "figure.create_scenario_results_chart": lambda: _uncached(figures.create_scenario_results_chart)(125000, 62500.0),
+        "figure.create_material_breakdown_chart": lambda: _uncached(figures.create_material_breakdown_chart)(),
+        "figure.create_tornado_chart": lambda: _uncached(figures.create_tornado_chart)(
+            ("A", "B", "C", "D"), 5.6, (6.4, 6.4, 6.4, 4.1), (4.9, 4.9, 4.9, 7.2), "CBAM Fees (€M)"),
+        "figure.create_sobol_chart": lambda: _uncached(figures.create_sobol_chart)(
+            ("A", "B", "C", "D"), (0.13, 0.13, 0.13, 0.58), (0.14, 0.14, 0.14, 0.6)),
+    }
+
+
+def rerun_cases():
+    """End-to-end script reruns through Streamlit's headless AppTest harness"""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(ROOT / "app.py"), default_timeout=120)
+    app.run()
+    energy_levels = itertools.cycle(range(0, 101))
+
+    def rerun_unchanged():
+        app.run()
+
+    def rerun_slider():
+        # A fresh slider value each time, so cards are recomputed rather than served from cache
+        app.slider(key="energy_slider").set_value(next(energy_levels)).run()
+
+    def check():
+        if app.exception:
+            raise RuntimeError(f"app.py raised during the benchmark: {app.exception[0].message}")
+
+    return {
+        "rerun.unchanged": lambda: (rerun_unchanged(), check()),
+        "rerun.slider_change": lambda: (rerun_slider(), check()),
+    }
+
+
+GROUPS = {"model": model_cases, "figure": figure_cases, "rerun": rerun_cases}
+
+
+def time_case(func, repeat, min_time=0.05):
+    """Median seconds per call, looping fast cases until each sample takes ``min_time``"""
+    func()  # warm up
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 10
+
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops)
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "loops": loops, "repeat": repeat}
+
+
+def compare(results, baseline, threshold):
+    """Names of cases whose median regressed by more than ``threshold`` (a fraction)"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous and result["median_s"] > previous["median_s"] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", nargs="+", choices=sorted(GROUPS), default=sorted(GROUPS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown against the baseline (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for group in args.groups:
+        try:
+            cases = GROUPS[group]()
+        except ImportError as e:
+            print(f"skipping {group} benchmarks: {e}")
+            continue
+        for name, func in cases.items():
+            results[name] = time_case(func, args.repeat)
+            print(f"{name:<55} {results[name]['median_s'] * 1000:10.3f} ms")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare(results, baseline, args.threshold)
+        for name in regressions:
+            before = baseline["results"][name]["median_s"] * 1000
+            after = results[name]["median_s"] * 1000
+            print(f"REGRESSION {name}: {before:.3f} ms -> {after:.3f} ms")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""CBAM Quest model and planning engines.
+
+The model API below is pure Python and cheap to import; NumPy is only loaded
+for array inputs. Figure builders live in ``cbam_quest.figures`` and pull in
+Plotly the first time one of them is accessed.
+"""
+import importlib
+
+from cbam_quest.engine import (
+    BASELINE_EMISSIONS,
+    ScenarioResults,
+    calculate_carbon_footprint,
+    calculate_implementation_costs,
+    calculate_scenario,
+    evaluate,
+    evaluate_grid,
+)
+from cbam_quest.roadmap import generate_roadmap_phases
+
+_LAZY_ATTRIBUTES = {
+    "create_benchmark_radar": "cbam_quest.figures",
+    "create_cbam_heatmap": "cbam_quest.figures",
+    "create_decarbonization_roadmap": "cbam_quest.figures",
+    "create_embedded_emissions_chart": "cbam_quest.figures",
+    "create_fee_trajectory_chart": "cbam_quest.figures",
+    "create_material_breakdown_chart": "cbam_quest.figures",
+    "create_peer_radar": "cbam_quest.figures",
+    "create_portfolio_roadmap": "cbam_quest.figures",
+    "create_scenario_comparison_chart": "cbam_quest.figures",
+    "create_scenario_results_chart": "cbam_quest.figures",
+    "create_sobol_chart": "cbam_quest.figures",
+    "create_tornado_chart": "cbam_quest.figures",
+    "create_what_if_charts": "cbam_quest.figures",
+    "write_what_if_component": "cbam_quest.figures",
+}
+
+__all__ = [
+    "BASELINE_EMISSIONS",
+    "ScenarioResults",
+    "calculate_carbon_footprint",
+    "calculate_implementation_costs",
+    "calculate_scenario",
+    "evaluate",
+    "evaluate_grid",
+    "generate_roadmap_phases",
+    *_LAZY_ATTRIBUTES,
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
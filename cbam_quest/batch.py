@@ -0,0 +1,225 @@
+"""Headless batch scenario runner.
+
+Reads scenario definitions from JSONL or CSV in fixed-size chunks, evaluates
+each chunk with the vectorized engine in a worker pool and writes one part
+file per chunk into an output directory. At most a few chunks are in flight
+at a time, so memory stays constant regardless of input size. Parts are
+written atomically, so an interrupted run picks up where it stopped with
+``--resume``.
+
+    python -m cbam_quest.batch scenarios.jsonl results/ --format parquet --workers 8
+
+Each scenario may set ``scenario_id``, ``carbon_price``, ``regions``,
+``recycled_content``, ``renewable_energy``, ``process_efficiency`` and
+``baseline_emissions``. Missing baselines come from ``--records`` (latest
+year's emissions over the scenario's regions) or the dashboard default.
+
+With ``--trajectory`` every scenario is also simulated year by year over the
+CBAM horizon (``ramp_years`` and ``price_growth`` may be set per scenario),
+adding ``emissions_<year>`` and ``fees_<year>`` columns and their totals.
+"""
+import argparse
+import collections
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cbam_quest import engine, trajectory
+
+CHUNK_ROWS = 50_000
+MANIFEST = "_manifest.json"
+DEFAULTS = {
+    "carbon_price": 90,
+    "recycled_content": 60,
+    "renewable_energy": 40,
+    "process_efficiency": 50,
+}
+TRAJECTORY_DEFAULTS = {
+    "ramp_years": trajectory.RAMP_YEARS,
+    "price_growth": trajectory.PRICE_GROWTH,
+}
+OUTPUT_FIELDS = (
+    "baseline_emissions",
+    "footprint",
+    "implementation_cost",
+    "projected_emissions",
+    "baseline_fees",
+    "projected_fees",
+    "net_savings",
+    "fee_reduction",
+)
+
+
+def iter_scenario_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Yield DataFrames of at most ``chunk_rows`` scenarios"""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+        return
+
+    with pd.read_json(path, lines=True, chunksize=chunk_rows, dtype=False) as reader:
+        yield from reader
+
+
+def _parse_regions(value):
+    """Regions as a list, from a JSON list or a ';'-separated CSV cell"""
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if isinstance(value, str) and value:
+        return [region.strip() for region in value.split(";") if region.strip()]
+    return []
+
+
+def evaluate_chunk(scenarios, first_row=0, region_baselines=None, yearly=False):
+    """Evaluate a DataFrame of scenarios into a DataFrame of results"""
+    n = len(scenarios)
+    columns = {
+        "scenario_id": scenarios["scenario_id"] if "scenario_id" in scenarios
+        else pd.RangeIndex(first_row, first_row + n),
+    }
+    defaults = {**DEFAULTS, **TRAJECTORY_DEFAULTS} if yearly else DEFAULTS
+    for field, default in defaults.items():
+        values = scenarios[field] if field in scenarios else pd.Series(default, index=scenarios.index)
+        columns[field] = values.fillna(default).to_numpy(dtype=np.float64)
+
+    regions = scenarios["regions"] if "regions" in scenarios else pd.Series([[]] * n, index=scenarios.index)
+    columns["regions"] = [";".join(_parse_regions(value)) for value in regions]
+
+    baseline = np.full(n, float(engine.BASELINE_EMISSIONS))
+    if region_baselines:
+        all_regions = sum(region_baselines.values())
+        baseline = np.array([
+            sum(region_baselines.get(r, 0.0) for r in selected) if selected else all_regions
+            for selected in (_parse_regions(value) for value in regions)
+        ])
+    if "baseline_emissions" in scenarios:
+        explicit = scenarios["baseline_emissions"].to_numpy(dtype=np.float64)
+        baseline = np.where(np.isnan(explicit), baseline, explicit)
+
+    results = engine.evaluate(
+        columns["recycled_content"], columns["renewable_energy"],
+        columns["process_efficiency"], columns["carbon_price"], baseline,
+    )
+    output = pd.DataFrame(columns)
+    output["baseline_emissions"] = baseline
+    for field in OUTPUT_FIELDS[1:]:
+        output[field] = np.broadcast_to(getattr(results, field), n)
+
+    if yearly:
+        simulated = trajectory.simulate(
+            columns["recycled_content"], columns["renewable_energy"],
+            columns["process_efficiency"], columns["carbon_price"], baseline,
+            ramp_years=columns["ramp_years"], price_growth=columns["price_growth"],
+        )
+        yearly_columns = {}
+        for i, year in enumerate(simulated.years):
+            yearly_columns[f"emissions_{year}"] = simulated.emissions[:, i]
+            yearly_columns[f"fees_{year}"] = simulated.fees[:, i]
+        yearly_columns["total_fees"] = simulated.fees.sum(axis=1)
+        yearly_columns["total_net_savings"] = simulated.net_savings.sum(axis=1)
+        output = pd.concat([output, pd.DataFrame(yearly_columns, index=output.index)], axis=1)
+    return output
+
+
+def _part_path(output_dir, index, fmt):
+    return Path(output_dir) / f"part-{index:06d}.{fmt}"
+
+
+def run_chunk(scenarios, index, first_row, output_dir, fmt, region_baselines=None, yearly=False):
+    """Evaluate one chunk and write its part file atomically; returns the row count"""
+    output = evaluate_chunk(scenarios, first_row, region_baselines, yearly)
+    part = _part_path(output_dir, index, fmt)
+    tmp = part.with_name(f".{part.name}.tmp")
+    if fmt == "parquet":
+        output.to_parquet(tmp, index=False)
+    else:
+        output.to_csv(tmp, index=False)
+    os.replace(tmp, part)
+    return len(output)
+
+
+def _check_manifest(output_dir, manifest, resume):
+    path = Path(output_dir) / MANIFEST
+    if path.exists():
+        existing = json.loads(path.read_text())
+        if not resume:
+            raise SystemExit(f"{output_dir} already holds results; pass --resume to continue them")
+        if existing != manifest:
+            raise SystemExit(f"{output_dir} was written with different settings: {existing}")
+    else:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(manifest, indent=2))
+
+
+def run_batch(input_path, output_dir, fmt="csv", workers=None, chunk_rows=CHUNK_ROWS,
+              records=None, resume=False, yearly=False):
+    """Run every scenario in ``input_path``; returns (rows written, chunks skipped)"""
+    input_path = Path(input_path)
+    stat = input_path.stat()
+    manifest = {
+        "input": str(input_path.resolve()),
+        "input_size": stat.st_size,
+        "input_mtime": stat.st_mtime,
+        "chunk_rows": chunk_rows,
+        "format": fmt,
+        "records": str(Path(records).resolve()) if records else None,
+        "trajectory": yearly,
+    }
+    _check_manifest(output_dir, manifest, resume)
+
+    region_baselines = None
+    if records:
+        from cbam_quest.ingest import load_baselines
+        baselines = load_baselines(records)
+        region_baselines = {region: baselines.total([region]) for region in baselines.regions}
+
+    workers = os.cpu_count() if workers is None else workers
+    written, skipped = 0, 0
+    with ProcessPoolExecutor(workers) as pool:
+        in_flight = collections.deque()
+        first_row = 0
+        for index, scenarios in enumerate(iter_scenario_chunks(input_path, chunk_rows)):
+            if _part_path(output_dir, index, fmt).exists():
+                skipped += 1
+            else:
+                in_flight.append(pool.submit(
+                    run_chunk, scenarios, index, first_row, output_dir, fmt, region_baselines, yearly
+                ))
+            first_row += len(scenarios)
+            # Bound the number of chunks held in memory
+            while len(in_flight) >= 2 * workers:
+                written += in_flight.popleft().result()
+        while in_flight:
+            written += in_flight.popleft().result()
+
+    return written, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run CBAM scenarios without the dashboard")
+    parser.add_argument("input", type=Path, help="scenario definitions (.jsonl or .csv)")
+    parser.add_argument("output", type=Path, help="directory for the result part files")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--records", type=Path, help="plant record file for region baselines")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run")
+    parser.add_argument("--trajectory", action="store_true", help="add yearly emissions and fees")
+    args = parser.parse_args(argv)
+
+    written, skipped = run_batch(
+        args.input, args.output, args.format, args.workers, args.chunk_rows,
+        args.records, args.resume, args.trajectory,
+    )
+    print(f"{written:,} scenarios written to {args.output}"
+          + (f", {skipped} chunks already done" if skipped else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
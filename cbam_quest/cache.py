@@ -0,0 +1,93 @@
+"""Process-wide LRU cache for figure builders.
+
+Streamlit re-executes ``app.py`` on every interaction, so anything defined in
+the script is rebuilt each rerun. This module is imported once per server
+process, which lets cached figures survive across reruns and sessions.
+"""
+import functools
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+def freeze(value):
+    """Turn lists, dicts and sets into hashable equivalents for cache keys"""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(v) for v in value)
+    return value
+
+
+class FigureCache:
+    """Bounded LRU cache keyed on a builder name and its exact inputs.
+
+    Cached figures are shared between sessions and must not be mutated by
+    callers.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, builder, *args, **kwargs):
+        """Return the cached result of ``builder(*args, **kwargs)``, building it on a miss"""
+        key = (
+            builder.__module__,
+            builder.__qualname__,
+            freeze(args),
+            freeze(kwargs),
+        )
+        local = self._local
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                local.hits = getattr(local, "hits", 0) + 1
+                return self._entries[key]
+            self.misses += 1
+        local.misses = getattr(local, "misses", 0) + 1
+
+        # Build outside the lock so one slow figure doesn't block other sessions
+        result = builder(*args, **kwargs)
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def cached(self, builder):
+        """Decorator routing every call of ``builder`` through the cache"""
+        @functools.wraps(builder)
+        def wrapper(*args, **kwargs):
+            return self.get_or_build(builder, *args, **kwargs)
+        return wrapper
+
+    def info(self):
+        """Hit/miss counters in the style of functools.lru_cache"""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def thread_info(self):
+        """(hits, misses) made from the calling thread, i.e. one Streamlit session"""
+        return getattr(self._local, "hits", 0), getattr(self._local, "misses", 0)
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+figure_cache = FigureCache(maxsize=int(os.environ.get("CBAM_QUEST_FIGURE_CACHE_SIZE", 128)))
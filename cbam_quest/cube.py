@@ -0,0 +1,105 @@
+"""Region x year x CN code CBAM impact cube.
+
+The cube holds embedded emissions (tCO2e) for every origin region, year of
+the CBAM horizon and aluminium CN code. Region-by-year totals and their
+running sums over the years are precomputed, so changing the target regions
+or the year range is an index into those arrays rather than a regroup of the
+records. Fees are linear in the carbon price and are priced on the way out.
+"""
+import numpy as np
+
+HORIZON = range(2026, 2035)
+
+
+class ImpactCube:
+    """Dense emissions cube with precomputed region/year marginals"""
+
+    def __init__(self, emissions, regions, years, products):
+        self.emissions = np.asarray(emissions, dtype=np.float64)
+        self.regions = tuple(regions)
+        self.years = tuple(int(year) for year in years)
+        self.products = tuple(products)
+        self._region_index = {region: i for i, region in enumerate(self.regions)}
+        self._year_index = {year: i for i, year in enumerate(self.years)}
+
+        # Marginals: region x year, and its running sum over years with a leading zero
+        self.region_year = self.emissions.sum(axis=2)
+        self._cumulative = np.zeros((len(self.regions), len(self.years) + 1))
+        np.cumsum(self.region_year, axis=1, out=self._cumulative[:, 1:])
+
+    @classmethod
+    def from_baselines(cls, baselines, horizon=HORIZON):
+        """Build the cube from ingested Baselines.
+
+        Horizon years without records carry the latest earlier year forward,
+        or the earliest recorded year for years before any record.
+        """
+        table = baselines.emissions.groupby(level=["region", "year", "product"]).sum()
+        regions = sorted(table.index.unique("region"))
+        products = sorted(table.index.unique("product"))
+        recorded_years = sorted(int(year) for year in table.index.unique("year"))
+
+        recorded = np.zeros((len(regions), len(recorded_years), len(products)))
+        codes = [
+            table.index.get_level_values(level).map({v: i for i, v in enumerate(values)}).to_numpy()
+            for level, values in (("region", regions), ("year", recorded_years), ("product", products))
+        ]
+        recorded[tuple(codes)] = table.to_numpy()
+
+        horizon = list(horizon)
+        source = np.searchsorted(recorded_years, horizon, side="right") - 1
+        return cls(recorded[:, np.maximum(source, 0), :], regions, horizon, products)
+
+    def _region_rows(self, regions):
+        if not regions:
+            return np.arange(len(self.regions))
+        return np.array([self._region_index[r] for r in regions if r in self._region_index], dtype=int)
+
+    def _year_slice(self, year_range):
+        if year_range is None:
+            return slice(0, len(self.years))
+        start, end = year_range
+        first = np.searchsorted(self.years, start, side="left")
+        last = np.searchsorted(self.years, end, side="right")
+        return slice(int(first), int(last))
+
+    def totals(self, regions=None, year_range=None):
+        """Emissions per region summed over ``year_range`` (inclusive), via the running sums"""
+        rows = self._region_rows(regions)
+        years = self._year_slice(year_range)
+        return self._cumulative[rows, years.stop] - self._cumulative[rows, years.start]
+
+    def top_regions(self, n, year_range=None):
+        """The ``n`` regions with the largest emissions over ``year_range``"""
+        totals = self.totals(None, year_range)
+        n = min(n, len(totals))
+        top = np.argpartition(-totals, n - 1)[:n] if n else []
+        return [self.regions[i] for i in sorted(top, key=lambda i: -totals[i])]
+
+    def region_year_slice(self, regions=None, year_range=None):
+        """Region x year emissions as ``(regions, years, rows)`` of plain tuples"""
+        rows = self._region_rows(regions)
+        years = self._year_slice(year_range)
+        return (
+            tuple(self.regions[i] for i in rows),
+            self.years[years],
+            tuple(tuple(float(v) for v in row) for row in self.region_year[rows, years]),
+        )
+
+    def by_product(self, regions=None, year_range=None):
+        """Emissions per CN code over the selected regions and years"""
+        rows = self._region_rows(regions)
+        years = self._year_slice(year_range)
+        totals = self.emissions[rows, years, :].sum(axis=(0, 1))
+        return dict(zip(self.products, (float(v) for v in totals)))
+
+    def fees_by_product(self, carbon_prices, regions=None, year_range=None):
+        """CBAM fees (€M) per CN code, each year priced at its entry in ``carbon_prices``.
+
+        ``carbon_prices`` has one price per cube year, e.g. a forward price path.
+        """
+        rows = self._region_rows(regions)
+        years = self._year_slice(year_range)
+        prices = np.asarray(carbon_prices, dtype=np.float64)[years]
+        totals = np.einsum("ryp,y->p", self.emissions[rows, years, :], prices) / 1000000
+        return dict(zip(self.products, (float(v) for v in totals)))
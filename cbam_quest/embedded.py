@@ -0,0 +1,283 @@
+"""Embedded emissions of aluminium import declaration lines.
+
+Each line gives a CN code, a country of origin and a mass in tonnes, and may
+carry supplier-specific direct and indirect emission values (tCO2e per
+tonne). Lines without them fall back to the default values for their CN code
+and origin, or the code's global default (origin ``*``). Precursors, such as
+the unwrought aluminium (7601) rolled into sheet (7606) and then formed into
+cans (7612), add their own embedded emissions times the precursor mass per
+tonne of product, following the chain down to primary metal.
+
+Codes and origins are factorized once per chunk, so the factor table is
+indexed with integer arrays instead of a dict lookup per row. CN codes match
+the longest listed prefix (8, 6 then 4 digits).
+
+    python -m cbam_quest.embedded declarations.parquet --output embedded.parquet
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cbam_quest.reference import CN_PRECURSORS, EMISSION_FACTORS, registry
+
+GLOBAL_ORIGIN = "*"
+CN_PREFIX_LENGTHS = (8, 6, 4)
+CHUNK_ROWS = 1_000_000
+
+# Logical field -> column name in the declaration files; optional fields may be absent
+DEFAULT_COLUMNS = {
+    "cn_code": "cn_code",
+    "origin": "origin",
+    "mass": "mass_tonnes",
+    "supplier_direct": "supplier_direct",
+    "supplier_indirect": "supplier_indirect",
+    "precursor_share": "precursor_share",
+    "precursor_origin": "precursor_origin",
+}
+OUTPUT_FIELDS = (
+    "direct_emissions",
+    "indirect_emissions",
+    "precursor_emissions",
+    "embedded_emissions",
+    "supplier_specific",
+    "missing_factor",
+)
+
+
+class EmissionFactorTable:
+    """Default emission values as dense (CN code x origin) arrays.
+
+    Row ``-1`` of every array is an all-NaN sentinel, so unknown codes can be
+    indexed as ``-1`` without a separate mask.
+    """
+
+    def __init__(self, cn_codes, origins, direct, indirect, precursor_index, precursor_ratio):
+        self.cn_codes = pd.Index(cn_codes)
+        self.origins = pd.Index(origins)
+        nan_row = np.full((1, len(self.origins)), np.nan)
+        self.direct = np.vstack([direct, nan_row])
+        self.indirect = np.vstack([indirect, nan_row])
+        self.precursor_index = np.append(precursor_index, -1)
+        self.precursor_ratio = np.append(precursor_ratio, 0.0)
+
+        # Embedded emissions per tonne including the whole precursor chain
+        self.embedded = self.direct + self.indirect
+        own = self.embedded.copy()
+        has_precursor = self.precursor_index >= 0
+        for _ in range(len(self.cn_codes)):
+            chained = own.copy()
+            chained[has_precursor] += (
+                self.precursor_ratio[has_precursor, None]
+                * self.embedded[self.precursor_index[has_precursor]]
+            )
+            if np.allclose(chained, self.embedded, equal_nan=True):
+                break
+            self.embedded = chained
+        for array in (self.direct, self.indirect, self.embedded, self.precursor_index, self.precursor_ratio):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_reference(cls, factors=None, precursors=None):
+        """Build the table from the ``emission_factors`` and ``cn_precursors`` datasets"""
+        factors = registry.get(EMISSION_FACTORS) if factors is None else factors
+        precursors = registry.get(CN_PRECURSORS) if precursors is None else precursors
+
+        cn_codes = pd.Index(pd.unique(np.concatenate([
+            factors["cn_code"], precursors["cn_code"], precursors["precursor_cn_code"],
+        ])))
+        origins = pd.Index(pd.unique(np.append(factors["origin"], GLOBAL_ORIGIN)))
+        rows = cn_codes.get_indexer(factors["cn_code"])
+        cols = origins.get_indexer(factors["origin"])
+
+        direct = np.full((len(cn_codes), len(origins)), np.nan)
+        indirect = np.full_like(direct, np.nan)
+        direct[rows, cols] = factors["direct"]
+        indirect[rows, cols] = factors["indirect"]
+        # Origins without their own value use the code's global default
+        star = origins.get_loc(GLOBAL_ORIGIN)
+        direct = np.where(np.isnan(direct), direct[:, [star]], direct)
+        indirect = np.where(np.isnan(indirect), indirect[:, [star]], indirect)
+
+        precursor_index = np.full(len(cn_codes), -1)
+        precursor_ratio = np.zeros(len(cn_codes))
+        products = cn_codes.get_indexer(precursors["cn_code"])
+        precursor_index[products] = cn_codes.get_indexer(precursors["precursor_cn_code"])
+        precursor_ratio[products] = precursors["precursor_ratio"]
+        return cls(cn_codes, origins, direct, indirect, precursor_index, precursor_ratio)
+
+    def code_indices(self, cn_codes):
+        """Row index for each CN code by longest listed prefix, -1 if none matches"""
+        codes, inverse = _factorize(cn_codes)
+        indices = np.full(len(codes), -1)
+        for length in CN_PREFIX_LENGTHS:
+            missing = indices < 0
+            if not missing.any():
+                break
+            prefixes = pd.Index([code[:length] for code in codes[missing]])
+            indices[missing] = self.cn_codes.get_indexer(prefixes)
+        return indices[inverse]
+
+    def origin_indices(self, origins):
+        """Column index for each origin, the global default column if not listed"""
+        values, inverse = _factorize(origins)
+        indices = self.origins.get_indexer(values)
+        indices[indices < 0] = self.origins.get_loc(GLOBAL_ORIGIN)
+        return indices[inverse]
+
+
+def _factorize(values):
+    """(unique codes as stripped strings, inverse) for an array-like of codes"""
+    inverse, uniques = pd.factorize(np.asarray(values))
+    return np.array([str(value).strip() for value in uniques], dtype=object), inverse
+
+
+_default_table = (None, None)
+
+
+def default_factor_table():
+    """Factor table for the current reference data, rebuilt after a reload"""
+    global _default_table
+    key = (id(registry.get(EMISSION_FACTORS)), id(registry.get(CN_PRECURSORS)))
+    if _default_table[0] != key:
+        _default_table = (key, EmissionFactorTable.from_reference())
+    return _default_table[1]
+
+
+def _optional(lines, columns, field):
+    """The line column for an optional field, or None if the file doesn't have it"""
+    column = columns.get(field)
+    return lines[column] if column is not None and column in lines else None
+
+
+def _optional_values(lines, columns, field):
+    values = _optional(lines, columns, field)
+    return None if values is None else values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def calculate(lines, table=None, columns=DEFAULT_COLUMNS):
+    """Embedded emissions (tCO2e) for a DataFrame of declaration lines, one output row per line"""
+    table = default_factor_table() if table is None else table
+    n = len(lines)
+    mass = lines[columns["mass"]].to_numpy(dtype=np.float64, na_value=np.nan)
+    code = table.code_indices(lines[columns["cn_code"]])
+    origin = table.origin_indices(lines[columns["origin"]])
+
+    default_direct = table.direct[code, origin]
+    default_indirect = table.indirect[code, origin]
+    supplier_direct = _optional_values(lines, columns, "supplier_direct")
+    supplier_indirect = _optional_values(lines, columns, "supplier_indirect")
+    direct = default_direct if supplier_direct is None else np.where(
+        np.isnan(supplier_direct), default_direct, supplier_direct)
+    indirect = default_indirect if supplier_indirect is None else np.where(
+        np.isnan(supplier_indirect), default_indirect, supplier_indirect)
+
+    supplier_specific = np.zeros(n, dtype=bool)
+    for values in (supplier_direct, supplier_indirect):
+        if values is not None:
+            supplier_specific |= ~np.isnan(values)
+
+    # Precursor mass per tonne of product: the line's own share, else the table's ratio
+    ratio = table.precursor_ratio[code]
+    share = _optional_values(lines, columns, "precursor_share")
+    if share is not None:
+        ratio = np.where(np.isnan(share), ratio, share)
+    precursor_origins = _optional(lines, columns, "precursor_origin")
+    precursor_origin = origin if precursor_origins is None else np.where(
+        precursor_origins.isna().to_numpy(), origin,
+        table.origin_indices(precursor_origins.fillna(GLOBAL_ORIGIN)))
+    precursor_factor = table.embedded[table.precursor_index[code], precursor_origin]
+    precursor = np.where(ratio > 0, ratio * precursor_factor, 0.0)
+
+    direct_emissions = mass * direct
+    indirect_emissions = mass * indirect
+    precursor_emissions = mass * precursor
+    return pd.DataFrame({
+        "direct_emissions": direct_emissions,
+        "indirect_emissions": indirect_emissions,
+        "precursor_emissions": precursor_emissions,
+        "embedded_emissions": direct_emissions + indirect_emissions + precursor_emissions,
+        "supplier_specific": supplier_specific,
+        "missing_factor": np.isnan(direct) | np.isnan(indirect) | np.isnan(precursor),
+    }, index=lines.index)
+
+
+def can_stock_by_origin(recycled_content, cn_code="761290", table=None):
+    """Embedded emissions per tonne of cans from every listed origin.
+
+    Post-consumer scrap carries no embedded emissions under CBAM, so the
+    precursor share shrinks with the recycled content.
+    """
+    table = default_factor_table() if table is None else table
+    origins = list(table.origins)
+    ratio = table.precursor_ratio[table.code_indices([cn_code])[0]]
+    lines = pd.DataFrame({
+        "cn_code": cn_code,
+        "origin": origins,
+        "mass_tonnes": 1.0,
+        "precursor_share": ratio * (1 - recycled_content / 100),
+    })
+    return origins, calculate(lines, table)
+
+
+def iter_declaration_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Yield DataFrames of at most ``chunk_rows`` declaration lines"""
+    path = Path(path)
+    if path.suffix.lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+    yield from pd.read_csv(path, chunksize=chunk_rows, dtype={
+        DEFAULT_COLUMNS["cn_code"]: str,
+        DEFAULT_COLUMNS["origin"]: str,
+        DEFAULT_COLUMNS["precursor_origin"]: str,
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calculate embedded emissions for declaration lines")
+    parser.add_argument("input", type=Path, help="declaration lines (.csv or .parquet)")
+    parser.add_argument("--output", type=Path, help="write per-line results (.csv or .parquet)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    totals = {}
+    lines = supplier_lines = missing_lines = 0
+    writer = None
+    try:
+        for i, chunk in enumerate(iter_declaration_chunks(args.input, args.chunk_rows)):
+            results = calculate(chunk)
+            lines += len(chunk)
+            supplier_lines += int(results["supplier_specific"].sum())
+            missing_lines += int(results["missing_factor"].sum())
+            by_code = results["embedded_emissions"].groupby(chunk[DEFAULT_COLUMNS["cn_code"]].astype(str)).sum()
+            for cn_code, emissions in by_code.items():
+                totals[cn_code] = totals.get(cn_code, 0.0) + emissions
+
+            if args.output is None:
+                continue
+            output = pd.concat([chunk, results], axis=1)
+            if args.output.suffix.lower() in (".parquet", ".pq"):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(output, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(args.output, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                output.to_csv(args.output, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    for cn_code in sorted(totals):
+        print(f"CN {cn_code}: {totals[cn_code]:,.1f} tCO2e")
+    print(f"{lines:,} lines, {supplier_lines:,} with supplier values, {missing_lines:,} without a factor")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
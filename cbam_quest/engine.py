@@ -0,0 +1,193 @@
+"""Vectorized scenario engine for the CBAM Quest model formulas.
+
+Every formula accepts scalars or NumPy arrays and broadcasts like any other
+ufunc expression, so a single call can evaluate one slider setting or the
+whole (recycled, renewable, efficiency, carbon price) grid.
+
+Plain Python numbers are evaluated without touching NumPy, which is only
+imported on the first array call. This keeps the scalar API cheap to import
+from short-lived workers.
+"""
+import numbers
+from collections import namedtuple
+
+# Model coefficients
+FOOTPRINT_BASELINE = 2.1  # kg CO2e per can
+RECYCLED_BASELINE = 40  # % recycled content assumed in the baseline
+FOOTPRINT_RECYCLED_FACTOR = 0.01
+FOOTPRINT_ENERGY_FACTOR = 0.005
+FOOTPRINT_EFFICIENCY_FACTOR = 0.003
+FOOTPRINT_BOUNDS = (0.5, 3.0)
+
+COST_RECYCLED_FACTOR = 0.02
+COST_ENERGY_FACTOR = 0.03
+COST_EFFICIENCY_FACTOR = 0.02
+COST_BOUNDS = (0.5, 5.0)
+COST_AMORTIZATION_YEARS = 3
+
+REDUCTION_RECYCLED_FACTOR = 0.005
+REDUCTION_ENERGY_FACTOR = 0.003
+REDUCTION_EFFICIENCY_FACTOR = 0.002
+
+BASELINE_EMISSIONS = 125000  # tCO2e
+
+# Slider domains
+LEVER_LEVELS = range(0, 101)
+CARBON_PRICE_LEVELS = range(50, 151, 5)
+
+ScenarioResults = namedtuple(
+    "ScenarioResults",
+    [
+        "footprint",
+        "implementation_cost",
+        "projected_emissions",
+        "baseline_fees",
+        "projected_fees",
+        "net_savings",
+        "fee_reduction",
+    ],
+)
+
+
+def _np():
+    import numpy
+    return numpy
+
+
+def _asarray(value):
+    """Pass plain numbers through, convert everything else to an ndarray"""
+    if isinstance(value, numbers.Real):
+        return value
+    return _np().asarray(value)
+
+
+def _clip(value, lower, upper):
+    if isinstance(value, numbers.Real):
+        return max(lower, min(upper, value))
+    return _np().clip(value, lower, upper)
+
+
+def _where(condition, if_true, if_false):
+    if isinstance(condition, bool):
+        return if_true if condition else if_false
+    return _np().where(condition, if_true, if_false)
+
+
+def carbon_footprint(recycled_content, renewable_energy, process_efficiency):
+    """Carbon footprint per can (kg CO2e), clamped to FOOTPRINT_BOUNDS"""
+    recycled_impact = (_asarray(recycled_content) - RECYCLED_BASELINE) * FOOTPRINT_RECYCLED_FACTOR
+    energy_impact = _asarray(renewable_energy) * FOOTPRINT_ENERGY_FACTOR
+    efficiency_impact = _asarray(process_efficiency) * FOOTPRINT_EFFICIENCY_FACTOR
+
+    footprint = FOOTPRINT_BASELINE - recycled_impact - energy_impact - efficiency_impact
+    return _clip(footprint, *FOOTPRINT_BOUNDS)
+
+
+def implementation_costs(recycled_content, renewable_energy, process_efficiency):
+    """Implementation cost (€M), clamped to COST_BOUNDS"""
+    recycled_content = _asarray(recycled_content)
+    # Only recycled content above the baseline costs anything
+    recycled_cost = _where(
+        recycled_content > RECYCLED_BASELINE,
+        (recycled_content - RECYCLED_BASELINE) * COST_RECYCLED_FACTOR,
+        0,
+    )
+    energy_cost = _asarray(renewable_energy) * COST_ENERGY_FACTOR
+    efficiency_cost = _asarray(process_efficiency) * COST_EFFICIENCY_FACTOR
+
+    total_cost = recycled_cost + energy_cost + efficiency_cost
+    return _clip(total_cost, *COST_BOUNDS)
+
+
+def projected_emissions(recycled_content, renewable_energy, process_efficiency,
+                        baseline_emissions=BASELINE_EMISSIONS):
+    """Projected emissions (tCO2e) after applying the three levers"""
+    lever_total = _asarray(recycled_content) + renewable_energy + process_efficiency
+    return baseline_emissions - (baseline_emissions * lever_total / 300)
+
+
+def cbam_fees(emissions, carbon_price):
+    """CBAM fees in millions of euros"""
+    return _asarray(emissions) * carbon_price / 1000000
+
+
+def cbam_fee_reduction(recycled_content, renewable_energy, process_efficiency,
+                       carbon_price, baseline_emissions=BASELINE_EMISSIONS):
+    """CBAM fee reduction shown in the IMPACT SIMULATOR sidebar block"""
+    recycled_impact = baseline_emissions * (_asarray(recycled_content) - RECYCLED_BASELINE) / 100 * REDUCTION_RECYCLED_FACTOR
+    energy_impact = baseline_emissions * _asarray(renewable_energy) / 100 * REDUCTION_ENERGY_FACTOR
+    efficiency_impact = baseline_emissions * _asarray(process_efficiency) / 100 * REDUCTION_EFFICIENCY_FACTOR
+
+    total_reduction = recycled_impact + energy_impact + efficiency_impact
+    return total_reduction * carbon_price / 1000
+
+
+def evaluate(recycled_content, renewable_energy, process_efficiency, carbon_price,
+             baseline_emissions=BASELINE_EMISSIONS):
+    """Evaluate every model output for broadcastable input arrays"""
+    footprint = carbon_footprint(recycled_content, renewable_energy, process_efficiency)
+    cost = implementation_costs(recycled_content, renewable_energy, process_efficiency)
+    projected = projected_emissions(
+        recycled_content, renewable_energy, process_efficiency, baseline_emissions
+    )
+    baseline_fees = cbam_fees(baseline_emissions, carbon_price)
+    projected_fees = cbam_fees(projected, carbon_price)
+    net_savings = baseline_fees - projected_fees - cost / COST_AMORTIZATION_YEARS
+    fee_reduction = cbam_fee_reduction(
+        recycled_content, renewable_energy, process_efficiency, carbon_price, baseline_emissions
+    )
+
+    return ScenarioResults(
+        footprint=footprint,
+        implementation_cost=cost,
+        projected_emissions=projected,
+        baseline_fees=baseline_fees,
+        projected_fees=projected_fees,
+        net_savings=net_savings,
+        fee_reduction=fee_reduction,
+    )
+
+
+def evaluate_grid(recycled_content=LEVER_LEVELS, renewable_energy=LEVER_LEVELS,
+                  process_efficiency=LEVER_LEVELS, carbon_price=CARBON_PRICE_LEVELS,
+                  baseline_emissions=BASELINE_EMISSIONS, dtype=None):
+    """Evaluate every combination of the given 1-D level arrays.
+
+    Results are indexed ``[recycled, renewable, efficiency, carbon_price]`` and
+    broadcast to the full grid shape, so all arrays are aligned element for
+    element. Pass ``dtype=np.float32`` to halve memory on the full sweep.
+    """
+    np = _np()
+    dtype = np.dtype(np.float64 if dtype is None else dtype).type
+    r, e, p, c = np.ix_(
+        np.asarray(recycled_content, dtype=dtype),
+        np.asarray(renewable_energy, dtype=dtype),
+        np.asarray(process_efficiency, dtype=dtype),
+        np.asarray(carbon_price, dtype=dtype),
+    )
+    shape = (r.size, e.size, p.size, c.size)
+    results = evaluate(r, e, p, c, dtype(baseline_emissions))
+
+    return ScenarioResults(*(
+        np.broadcast_to(np.asarray(value, dtype=dtype), shape) for value in results
+    ))
+
+
+# Scalar wrappers used by the dashboard
+def calculate_carbon_footprint(recycled_content, renewable_energy, process_efficiency):
+    """Calculate carbon footprint based on parameters"""
+    return float(carbon_footprint(recycled_content, renewable_energy, process_efficiency))
+
+
+def calculate_implementation_costs(recycled_content, renewable_energy, process_efficiency):
+    """Calculate implementation costs based on parameters"""
+    return float(implementation_costs(recycled_content, renewable_energy, process_efficiency))
+
+
+def calculate_scenario(recycled_content, renewable_energy, process_efficiency, carbon_price,
+                       baseline_emissions=BASELINE_EMISSIONS):
+    """Calculate all scenario outputs for a single slider setting"""
+    results = evaluate(
+        recycled_content, renewable_energy, process_efficiency, carbon_price, baseline_emissions
+    )
+    return ScenarioResults(*(float(value) for value in results))
@@ -0,0 +1,869 @@
+"""Plotly figure builders for the dashboard cards.
+
+This is the only module in the package that imports Plotly. Every builder is
+routed through the process-wide figure cache, so returned figures are shared
+and must not be mutated.
+"""
+import base64
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import plotly
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from cbam_quest.cache import figure_cache
+from cbam_quest.reference import INDUSTRY_BENCHMARKS, MATERIAL_COMPONENTS, REGIONS, registry
+
+# Portfolio roadmap bounds: plants drawn as individual lines, and colored groups
+PORTFOLIO_LINE_LIMIT = 250
+PORTFOLIO_GROUP_LIMIT = 8
+PORTFOLIO_COLORS = ["#FF6F61", "#FFA799", "#C8412E", "#FFE1DE", "#FF8577", "#E05A4F", "#FFCCC2", "#8FA3D9"]
+
+# Serialize figures sent to the browser with orjson rather than the stdlib encoder
+pio.json.config.default_engine = "orjson"
+
+
+@figure_cache.cached
+def create_cbam_heatmap(target_regions, carbon_price, regional_emissions=None, carbon_prices=None):
+    """Create a heatmap of CBAM impacts
+
+    ``regional_emissions`` is the ``(regions, years, rows)`` output of
+    ``ImpactCube.region_year_slice``; when given, cells show CBAM fees in €M,
+    priced per year by ``carbon_prices`` (one per year) if given.
+    """
+    if regional_emissions is not None:
+        regions, years, rows = regional_emissions
+        regions, years = list(regions), list(years)
+        prices = carbon_prices or (carbon_price,) * len(years)
+        z = [[emissions * price / 1000000 for emissions, price in zip(row, prices)] for row in rows]
+    else:
+        regions = registry.get(REGIONS)["region"].tolist()
+        years = [2026, 2027, 2028, 2029, 2030]
+
+        # Create sample data
+        z = []
+        for i, region in enumerate(regions):
+            row = []
+            for year in years:
+                # Higher impact for earlier years and European regions
+                impact = 5 - i * 0.8 - (year - 2026) * 0.3
+                impact = max(0, min(5, impact))  # Constrain between 0-5
+                row.append(impact)
+            z.append(row)
+
+    # Create heatmap
+    fig = go.Figure(data=go.Heatmap(
+        z=z,
+        x=years,
+        y=regions,
+        colorscale=[
+            [0, "#FFE1DE"], [0.2, "#FFCCC2"], 
+            [0.4, "#FFA799"], [0.6, "#FF8577"], 
+            [0.8, "#FF6F61"], [1, "#C8412E"]
+        ],
+        showscale=False
+    ))
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='VT323', size=14),
+        margin=dict(l=40, r=40, t=10, b=10),
+    )
+
+    return fig
+
+
+@figure_cache.cached
+def create_decarbonization_roadmap(years, emissions_percent, fees):
+    """Create a roadmap chart from a simulated trajectory
+
+    ``emissions_percent`` is each year's emissions as a percentage of the
+    baseline and ``fees`` the CBAM fees paid that year (€M).
+    """
+    years = list(years)
+    colors = ["#FF6F61", "#FF8577", "#FFA799", "#FFCCC2", "#FFE1DE"]
+    flag_colors = [colors[min(i * len(colors) // len(years), len(colors) - 1)] for i in range(len(years))]
+
+    fig = go.Figure()
+
+    # Shapes and annotations are collected and set in one update_layout call;
+    # adding them one at a time re-validates the whole list on every call.
+    # Timeline base
+    shapes = [dict(
+        type="line",
+        x0=years[0], y0=50,
+        x1=years[-1], y1=50,
+        line=dict(color="#FF6F61", width=4)
+    )]
+
+    # Add milestone points
+    fig.add_trace(go.Scatter(
+        x=years,
+        y=[50] * len(years),
+        mode="markers",
+        marker=dict(size=15, color=flag_colors),
+        hoverinfo="skip",
+        showlegend=False
+    ))
+
+    # Add emissions line
+    fig.add_trace(go.Scatter(
+        x=years,
+        y=[55 - r * 0.4 for r in emissions_percent],  # Position above timeline
+        mode="lines+markers",
+        line=dict(color="white", width=3, dash="dash"),
+        marker=dict(size=10, color="white"),
+        customdata=list(zip(emissions_percent, fees)),
+        hovertemplate="%{x}: %{customdata[0]:.0f}% of baseline, €%{customdata[1]:.1f}M CBAM<extra></extra>",
+        showlegend=False
+    ))
+
+    # Year labels
+    annotations = [
+        dict(
+            x=year,
+            y=35,  # Position below timeline
+            text=str(year),
+            showarrow=False,
+            font=dict(family="Space Mono", size=12, color="white")
+        )
+        for year in years
+    ]
+
+    # Milestone flags
+    for year, reduction, flag_color in zip(years, emissions_percent, flag_colors):
+        height = 20 - reduction * 0.15  # Higher flag for better reduction
+    
+        # Flag pole
+        shapes.append(dict(
+            type="rect",
+            x0=year-0.2, y0=50,
+            x1=year+0.2, y1=50+height,
+            fillcolor=flag_color,
+            line=dict(color=flag_color)
+        ))
+    
+        # Flag triangle
+        shapes.append(dict(
+            type="path",
+            path=f"M {year-0.2} {50+height} L {year+0.2} {50+height} L {year} {50+height+10} Z",
+            fillcolor=flag_color,
+            line=dict(color=flag_color)
+        ))
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='VT323', size=14),
+        margin=dict(l=40, r=40, t=10, b=10),
+        shapes=shapes,
+        annotations=annotations,
+        xaxis=dict(
+            showgrid=False,
+            zeroline=False,
+            showticklabels=False,
+            range=[years[0] - 1, years[-1] + 1]
+        ),
+        yaxis=dict(
+            showgrid=False,
+            zeroline=False,
+            showticklabels=False,
+            range=[0, 100]
+        )
+    )
+
+    return fig
+
+
+def _line_segments(years, rows):
+    """x/y arrays drawing every row as one line, separated by NaN gaps"""
+    rows = np.asarray(rows, dtype=np.float64)
+    gap = np.full((len(rows), 1), np.nan)
+    x = np.tile(np.append(np.asarray(years, dtype=np.float64), np.nan), len(rows))
+    y = np.hstack([np.round(rows), gap]).ravel()
+    return x, y
+
+
+@figure_cache.cached
+def create_portfolio_roadmap(years, groups, plant_emissions, line_limit=PORTFOLIO_LINE_LIMIT):
+    """Create a roadmap of every plant's simulated emissions (tCO₂e)
+
+    ``plant_emissions`` holds one row per plant over ``years`` and ``groups``
+    each plant's group (e.g. region). Plants are batched into one WebGL trace
+    per group with NaN-separated segments. The ``line_limit`` largest
+    emitters are drawn individually and the rest as a min/max band, so the
+    payload stops growing with the number of plants.
+    """
+    years = list(years)
+    emissions = np.asarray(plant_emissions, dtype=np.float64).reshape(-1, len(years))
+    groups = np.asarray(groups, dtype=object)
+
+    # Largest groups get their own color, the remainder share one
+    group_totals = {}
+    for group, total in zip(groups, emissions[:, 0]):
+        group_totals[group] = group_totals.get(group, 0.0) + total
+    named = sorted(group_totals, key=group_totals.get, reverse=True)
+    if len(named) > PORTFOLIO_GROUP_LIMIT:
+        named = named[:PORTFOLIO_GROUP_LIMIT - 1]
+    labels = np.where(np.isin(groups, named), groups, "Other")
+
+    order = np.argsort(-emissions[:, 0], kind="stable")
+    shown, rest = order[:line_limit], order[line_limit:]
+
+    fig = go.Figure()
+
+    if rest.size:
+        fig.add_trace(go.Scatter(
+            x=years,
+            y=np.round(emissions[rest].max(axis=0)).tolist(),
+            mode="lines",
+            line=dict(width=0),
+            hoverinfo="skip",
+            showlegend=False
+        ))
+        fig.add_trace(go.Scatter(
+            x=years,
+            y=np.round(emissions[rest].min(axis=0)).tolist(),
+            mode="lines",
+            line=dict(width=0),
+            fill="tonexty",
+            fillcolor="rgba(255, 255, 255, 0.15)",
+            name=f"{rest.size:,} smaller plants",
+            hoverinfo="skip"
+        ))
+
+    for i, label in enumerate([*named, "Other"]):
+        rows = shown[labels[shown] == label]
+        if not rows.size:
+            continue
+        x, y = _line_segments(years, emissions[rows])
+        fig.add_trace(go.Scattergl(
+            x=x,
+            y=y,
+            mode="lines",
+            name=f"{label} ({rows.size})",
+            line=dict(width=1.5, color=PORTFOLIO_COLORS[i % len(PORTFOLIO_COLORS)]),
+            hovertemplate=f"{label}<br>%{{x}}: %{{y:,.0f}} tCO₂e<extra></extra>",
+            connectgaps=False
+        ))
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='VT323', size=14),
+        margin=dict(l=10, r=10, t=10, b=10),
+        legend=dict(font=dict(family="Space Mono", size=10, color="white")),
+        xaxis=dict(
+            dtick=1,
+            tickfont=dict(family="Space Mono", size=10, color="white")
+        ),
+        yaxis=dict(
+            title="Plant Emissions (tCO₂e)",
+            tickfont=dict(family="Space Mono", size=10, color="white"),
+            gridcolor='rgba(255, 255, 255, 0.1)'
+        )
+    )
+
+    return fig
+
+
+def _radar_layout(fig, tickvals=(1, 2, 3, 4, 5), ticktext=('1', '2', '3', '4', '5')):
+    """Shared pixel styling of the 0-5 benchmark radar charts"""
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 5],
+                tickvals=list(tickvals),
+                ticktext=list(ticktext),
+                tickangle=0,
+                gridcolor='rgba(255, 255, 255, 0.2)',
+                linecolor='rgba(255, 255, 255, 0.2)'
+            ),
+            angularaxis=dict(
+                gridcolor='rgba(255, 255, 255, 0.2)',
+                linecolor='rgba(255, 255, 255, 0.2)'
+            ),
+            bgcolor='rgba(0,0,0,0)'
+        ),
+        showlegend=True,
+        legend=dict(
+            x=0.5,
+            y=1.2,
+            xanchor="center",
+            orientation="h",
+            font=dict(family="Space Mono", size=12, color="white")
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='VT323', size=14),
+        margin=dict(l=40, r=40, t=40, b=40),
+    )
+
+
+@figure_cache.cached
+def create_benchmark_radar(recycled_content, renewable_energy, process_efficiency):
+    """Create a radar chart comparing to industry benchmarks"""
+    benchmarks = registry.get(INDUSTRY_BENCHMARKS)
+    categories = benchmarks["category"].tolist()
+
+    # Calculate our performance based on sliders
+    # Scale from 0-100 to 0-5 for radar chart
+    slider_scores = {
+        "Recycled %": recycled_content / 20,  # Recycled content (0-5)
+        "Energy": renewable_energy / 20,   # Energy (0-5)
+        "Process": process_efficiency / 20,  # Process (0-5)
+    }
+    # Categories without a slider use the dataset's fixed company score
+    our_values = [
+        slider_scores.get(category, float(score))
+        for category, score in zip(categories, benchmarks["company_score"])
+    ]
+
+    # Industry average
+    industry_values = benchmarks["industry_average"].tolist()
+
+    fig = go.Figure()
+
+    # Add industry average
+    fig.add_trace(go.Scatterpolar(
+        r=industry_values,
+        theta=categories,
+        fill='toself',
+        fillcolor='rgba(255,133,119,0.2)',
+        line=dict(color="#FF8577", width=2, dash="dash"),
+        name="Industry Average"
+    ))
+
+    # Add our performance
+    fig.add_trace(go.Scatterpolar(
+        r=our_values,
+        theta=categories,
+        fill='toself',
+        fillcolor='rgba(255,111,97,0.5)',
+        line=dict(color="#FF6F61", width=3),
+        name="Crown"
+    ))
+
+    _radar_layout(fig)
+
+    return fig
+
+
+@figure_cache.cached
+def create_peer_radar(categories, values, percentiles, p10, p25, p50, p75, p90, lower_is_better, peers):
+    """Create a radar chart placing our values within the peer distribution
+
+    Every axis runs from the peer P10 (0) to the peer P90 (5), reversed for
+    metrics where lower is better, so further out is always better. Hover
+    text shows the raw values and our percentile rank.
+    """
+    def scores(points):
+        scaled = []
+        for value, low, high, lower in zip(points, p10, p90, lower_is_better):
+            position = ((high - value) if lower else (value - low)) / ((high - low) or 1.0)
+            scaled.append(min(5.0, max(0.0, 5 * position)))
+        return scaled
+
+    band = {"p25": scores(p25), "p50": scores(p50), "p75": scores(p75)}
+    ours = scores(values)
+    theta = list(categories) + [categories[0]]
+
+    def closed(points):
+        return list(points) + [points[0]]
+
+    fig = go.Figure()
+
+    # Peer interquartile range
+    for name, label in (("p75", "Peer P25-P75"), ("p25", None)):
+        fig.add_trace(go.Scatterpolar(
+            r=closed(band[name]),
+            theta=theta,
+            mode="lines",
+            line=dict(color="#FFA799", width=1, dash="dot"),
+            name=label or "Peer P25",
+            legendgroup="peer_band",
+            showlegend=label is not None,
+            hoverinfo="skip"
+        ))
+
+    # Peer median
+    fig.add_trace(go.Scatterpolar(
+        r=closed(band["p50"]),
+        theta=theta,
+        fill='toself',
+        fillcolor='rgba(255,133,119,0.2)',
+        line=dict(color="#FF8577", width=2, dash="dash"),
+        name="Peer Median",
+        customdata=closed(list(zip(p50, peers))),
+        hovertemplate="%{theta}: %{customdata[0]:.1f} (%{customdata[1]:,} peers)<extra></extra>"
+    ))
+
+    # Our values
+    fig.add_trace(go.Scatterpolar(
+        r=closed(ours),
+        theta=theta,
+        fill='toself',
+        fillcolor='rgba(255,111,97,0.5)',
+        line=dict(color="#FF6F61", width=3),
+        name="Crown",
+        customdata=closed(list(zip(values, percentiles))),
+        hovertemplate="%{theta}: %{customdata[0]:.1f} · P%{customdata[1]:.0f}<extra></extra>"
+    ))
+
+    _radar_layout(fig, tickvals=(0, 5), ticktext=("P10", "P90"))
+
+    return fig
+
+
+@figure_cache.cached
+def create_scenario_results_chart(baseline_emissions, projected_emissions):
+    """Create a bar chart comparing baseline and projected emissions"""
+    fig = go.Figure()
+
+    # Add baseline bar
+    fig.add_trace(go.Bar(
+        x=["Baseline"],
+        y=[baseline_emissions],
+        name="Baseline",
+        marker_color="#C8412E",
+        text=[f"{baseline_emissions:,.0f} tCO₂e"],
+        textposition="outside",
+        textfont=dict(family="Space Mono", size=12, color="white")
+    ))
+
+    # Add projected bar
+    fig.add_trace(go.Bar(
+        x=["Projected"],
+        y=[projected_emissions],
+        name="Projected",
+        marker_color="#FF6F61",
+        text=[f"{int(projected_emissions):,} tCO₂e"],
+        textposition="outside",
+        textfont=dict(family="Space Mono", size=12, color="white")
+    ))
+
+    # Calculate and display reduction arrow
+    reduction = baseline_emissions - projected_emissions
+    reduction_percent = (reduction / baseline_emissions) * 100 if baseline_emissions else 0
+
+    fig.add_annotation(
+        x=0.5,
+        y=baseline_emissions + 5000,
+        text=f"↓ {reduction:,.0f} tCO₂e ({reduction_percent:.1f}%)",
+        showarrow=False,
+        font=dict(family="VT323", size=18, color="#FF6F61")
+    )
+
+    fig.update_layout(
+        showlegend=False,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='VT323', size=14),
+        margin=dict(l=10, r=10, t=40, b=10),
+        xaxis=dict(
+            title="",
+            tickfont=dict(family="Space Mono", size=12, color="white")
+        ),
+        yaxis=dict(
+            title="Emissions (tCO₂e)",
+            titlefont=dict(family="Space Mono", size=12, color="white"),
+            tickfont=dict(family="Space Mono", size=10, color="white"),
+            gridcolor='rgba(255, 255, 255, 0.1)'
+        )
+    )
+
+    return fig
+
+
+@figure_cache.cached
+def create_fee_trajectory_chart(years, baseline_fees, fees):
+    """Create a bar chart of annual CBAM fees against the no-action baseline"""
+    years = list(years)
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        x=years,
+        y=list(fees),
+        name="Projected",
+        marker_color="#FF6F61"
+    ))
+    fig.add_trace(go.Scatter(
+        x=years,
+        y=list(baseline_fees),
+        name="Baseline",
+        mode="lines+markers",
+        line=dict(color="#C8412E", width=3, dash="dash")
+    ))
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='VT323', size=14),
+        margin=dict(l=10, r=10, t=10, b=10),
+        legend=dict(orientation="h", y=-0.2),
+        xaxis=dict(
+            dtick=1,
+            tickfont=dict(family="Space Mono", size=10, color="white")
+        ),
+        yaxis=dict(
+            title="CBAM Fees (€M)",
+            tickfont=dict(family="Space Mono", size=10, color="white"),
+            gridcolor='rgba(255, 255, 255, 0.1)'
+        )
+    )
+
+    return fig
+
+
+@figure_cache.cached
+def create_scenario_comparison_chart(names, years, fees):
+    """Create a line chart of annual CBAM fees for several saved scenarios"""
+    colors = ["#FF6F61", "#FFA799", "#C8412E", "#FFE1DE", "#FF8577", "#8FA3D9"]
+    fig = go.Figure()
+
+    for i, (name, row) in enumerate(zip(names, fees)):
+        fig.add_trace(go.Scatter(
+            x=list(years),
+            y=list(row),
+            name=name,
+            mode="lines+markers",
+            line=dict(color=colors[i % len(colors)], width=3)
+        ))
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='VT323', size=14),
+        margin=dict(l=10, r=10, t=10, b=10),
+        legend=dict(orientation="h", y=-0.2),
+        xaxis=dict(
+            dtick=1,
+            tickfont=dict(family="Space Mono", size=10, color="white")
+        ),
+        yaxis=dict(
+            title="CBAM Fees (€M)",
+            tickfont=dict(family="Space Mono", size=10, color="white"),
+            gridcolor='rgba(255, 255, 255, 0.1)'
+        )
+    )
+
+    return fig
+
+
+@figure_cache.cached
+def create_embedded_emissions_chart(origins, direct, indirect, precursor):
+    """Create a stacked bar chart of embedded emissions per tonne by origin"""
+    fig = go.Figure()
+
+    for name, values, color in (
+        ("Direct", direct, "#C8412E"),
+        ("Indirect", indirect, "#FF6F61"),
+        ("Precursors", precursor, "#FFA799"),
+    ):
+        fig.add_trace(go.Bar(
+            y=list(origins),
+            x=list(values),
+            name=name,
+            orientation="h",
+            marker_color=color
+        ))
+
+    fig.update_layout(
+        barmode="stack",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='VT323', size=14),
+        margin=dict(l=10, r=10, t=10, b=10),
+        legend=dict(orientation="h", y=-0.2),
+        xaxis=dict(
+            title="tCO₂e per Tonne",
+            tickfont=dict(family="Space Mono", size=10, color="white"),
+            gridcolor='rgba(255, 255, 255, 0.1)'
+        ),
+        yaxis=dict(
+            categoryorder="total ascending",
+            tickfont=dict(family="Space Mono", size=10, color="white")
+        )
+    )
+
+    return fig
+
+
+@figure_cache.cached
+def create_material_breakdown_chart():
+    """Create a bar chart of the can's material components"""
+    components = registry.get(MATERIAL_COMPONENTS)
+    component_data = {
+        "Component": components["component"].tolist(),
+        "Percentage": components["percentage"].tolist(),
+        "Color": components["color"].tolist()
+    }
+
+    fig = px.bar(
+        component_data,
+        x="Percentage",
+        y="Component",
+        orientation='h',
+        color="Component",
+        color_discrete_map=dict(zip(component_data["Component"], component_data["Color"])),
+        labels={"Percentage": "% of Total Weight"}
+    )
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='VT323', size=14),
+        showlegend=False
+    )
+
+    return fig
+
+
+@figure_cache.cached
+def create_tornado_chart(factors, base, low, high, output_label):
+    """Create a tornado chart of one-at-a-time swings around ``base``
+
+    ``low`` and ``high`` hold the output with each factor at the low and high
+    end of its range; the widest swing is drawn at the top.
+    """
+    order = sorted(range(len(factors)), key=lambda i: abs(high[i] - low[i]))
+    labels = [factors[i] for i in order]
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        y=labels,
+        x=[low[i] - base for i in order],
+        base=base,
+        orientation="h",
+        name="Low",
+        marker_color="#FFA799",
+        hovertemplate="%{y}: €%{x:.2f}M<extra>Low</extra>"
+    ))
+    fig.add_trace(go.Bar(
+        y=labels,
+        x=[high[i] - base for i in order],
+        base=base,
+        orientation="h",
+        name="High",
+        marker_color="#C8412E",
+        hovertemplate="%{y}: €%{x:.2f}M<extra>High</extra>"
+    ))
+    fig.add_vline(x=base, line_width=2, line_dash="dash", line_color="white")
+
+    fig.update_layout(
+        barmode="overlay",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='VT323', size=14),
+        margin=dict(l=10, r=10, t=10, b=10),
+        legend=dict(orientation="h", y=-0.2),
+        xaxis=dict(
+            title=output_label,
+            tickfont=dict(family="Space Mono", size=10, color="white"),
+            gridcolor='rgba(255, 255, 255, 0.1)'
+        )
+    )
+
+    return fig
+
+
+@figure_cache.cached
+def create_sobol_chart(factors, first_order, total_order):
+    """Create a grouped bar chart of first- and total-order Sobol indices"""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=list(factors),
+        y=list(first_order),
+        name="First Order",
+        marker_color="#FF8577"
+    ))
+    fig.add_trace(go.Bar(
+        x=list(factors),
+        y=list(total_order),
+        name="Total Order",
+        marker_color="#C8412E"
+    ))
+
+    fig.update_layout(
+        barmode="group",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='VT323', size=14),
+        margin=dict(l=10, r=10, t=10, b=10),
+        legend=dict(orientation="h", y=-0.2),
+        yaxis=dict(
+            title="Share of Variance",
+            range=[0, 1],
+            tickfont=dict(family="Space Mono", size=10, color="white"),
+            gridcolor='rgba(255, 255, 255, 0.1)'
+        )
+    )
+
+    return fig
+
+
+# Static page of the offline what-if component. Streamlit serves it and the
+# versioned plotly.js file next to it from disk, and browsers keep the script
+# cached, so reruns only send the render arguments: the quantized grid, both
+# charts drawn at the first grid state, and the lever state to start from.
+# The flag geometry mirrors create_decarbonization_roadmap and the labels
+# create_scenario_results_chart.
+WHAT_IF_INDEX = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<script src="__PLOTLY_JS__"></script>
+</head>
+<body style="margin:0;font-family:'Space Mono', monospace;color:white;">
+__LEVERS__
+<p id="what-if-fees" style="color:#FF6F61;"></p>
+<div id="what-if-results" style="height:320px;"></div>
+<div id="what-if-roadmap" style="height:320px;"></div>
+<script>
+(function () {
+  function send(type, data) {
+    window.parent.postMessage({isStreamlitMessage: true, apiVersion: 1, type: type, ...data}, "*");
+  }
+  const config = {displayModeBar: false, responsive: true};
+  const levers = ["what-if-recycled", "what-if-renewable", "what-if-efficiency"].map(id => document.getElementById(id));
+  let grid = null, gridId = null, start = null, size = 0;
+  const fields = {};
+
+  function decode(payload) {
+    for (const [name, field] of Object.entries(payload.fields)) {
+      const binary = atob(field.data);
+      const bytes = new Uint8Array(binary.length);
+      for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+      fields[name] = {...field, codes: field.bits === 16 ? new Uint16Array(bytes.buffer) : bytes};
+    }
+  }
+  function lookup(name, state) {
+    const field = fields[name];
+    const values = [];
+    for (let i = 0; i < field.width; i++) values.push(field.offset + field.codes[state * field.width + i] * field.scale);
+    return values;
+  }
+  function update() {
+    const index = levers.map(lever => Number(lever.value));
+    levers.forEach((lever, i) => { document.getElementById(lever.id + "-value").textContent = grid.levels[index[i]] + "%"; });
+    const state = (index[0] * size + index[1]) * size + index[2];
+    const emissions = lookup("emissions_percent", state);
+    const fees = lookup("fees", state);
+    const projected = lookup("projected_emissions", state)[0];
+
+    const roadmap = document.getElementById("what-if-roadmap");
+    const shapes = roadmap.layout.shapes.map(shape => ({...shape}));
+    grid.years.forEach((year, i) => {
+      const height = 20 - emissions[i] * 0.15;
+      shapes[1 + 2 * i].y1 = 50 + height;
+      shapes[2 + 2 * i].path = `M ${year - 0.2} ${50 + height} L ${year + 0.2} ${50 + height} L ${year} ${60 + height} Z`;
+    });
+    Plotly.update(roadmap, {
+      y: [emissions.map(value => 55 - value * 0.4)],
+      customdata: [emissions.map((value, i) => [value, fees[i]])],
+    }, {shapes: shapes}, [1]);
+
+    const reduction = grid.baseline_emissions - projected;
+    const percent = grid.baseline_emissions ? reduction / grid.baseline_emissions * 100 : 0;
+    Plotly.update("what-if-results", {
+      y: [[projected]],
+      text: [[Math.trunc(projected).toLocaleString("en-US") + " tCO₂e"]],
+    }, {"annotations[0].text": "↓ " + Math.round(reduction).toLocaleString("en-US") + " tCO₂e (" + percent.toFixed(1) + "%)"}, [1]);
+
+    const total = fees.reduce((sum, value) => sum + value, 0);
+    document.getElementById("what-if-fees").textContent =
+      grid.years[0] + "-" + grid.years[grid.years.length - 1] + " CBAM Fees: €" + total.toFixed(1) + "M";
+  }
+
+  window.addEventListener("message", event => {
+    if (event.data.type !== "streamlit:render") return;
+    const args = event.data.args;
+    // The grid and charts only change with the price path or baseline
+    if (args.grid_id !== gridId) {
+      gridId = args.grid_id;
+      grid = args.grid;
+      size = grid.levels.length;
+      decode(grid);
+      levers.forEach(lever => { lever.max = size - 1; });
+      Plotly.react("what-if-results", args.results.data, args.results.layout, config);
+      Plotly.react("what-if-roadmap", args.roadmap.data, args.roadmap.layout, config);
+      start = null;
+    }
+    // Sliders moved in the page keep their place until the dashboard's levers move
+    if (JSON.stringify(args.start) !== JSON.stringify(start)) {
+      start = args.start;
+      levers.forEach((lever, i) => { lever.value = start[i]; });
+    }
+    update();
+    send("streamlit:setFrameHeight", {height: document.body.scrollHeight});
+  });
+  levers.forEach(lever => lever.addEventListener("input", update));
+  send("streamlit:componentReady");
+})();
+</script>
+</body>
+</html>
+"""
+
+WHAT_IF_LEVER = """
+<label style="display:block;margin:4px 0;">{label}: <span id="{id}-value"></span>
+  <input type="range" id="{id}" min="0" max="0" step="1" value="0" style="width:100%;accent-color:#FF6F61;">
+</label>
+"""
+
+
+def write_what_if_component(directory):
+    """Write the what-if component's page and plotly.js into ``directory``; returns its path
+
+    The script is named after the plotly.js version, so a browser never keeps
+    a stale copy after an upgrade.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    script = f"plotly-{plotly.offline.get_plotlyjs_version()}.min.js"
+    if not (directory / script).exists():
+        tmp = directory / f".{script}.tmp"
+        tmp.write_text(plotly.offline.get_plotlyjs(), encoding="utf-8")
+        os.replace(tmp, directory / script)
+    levers = "".join(
+        WHAT_IF_LEVER.format(label=label, id=lever_id)
+        for label, lever_id in zip(
+            ("Recycled Content", "Renewable Energy", "Process Efficiency"),
+            ("what-if-recycled", "what-if-renewable", "what-if-efficiency"),
+        )
+    )
+    (directory / "index.html").write_text(
+        WHAT_IF_INDEX.replace("__PLOTLY_JS__", script).replace("__LEVERS__", levers), encoding="utf-8"
+    )
+    return str(directory)
+
+
+def create_what_if_charts(payload):
+    """The roadmap and scenario results charts at the first state of a ``whatif.encode`` payload
+
+    The component redraws both from the grid as its sliders move. They are not
+    kept in the figure cache, which would key them on the whole payload.
+    """
+    grid = json.loads(payload)
+
+    def decoded(name):
+        field = grid["fields"][name]
+        codes = np.frombuffer(base64.b64decode(field["data"]), dtype=np.uint16 if field["bits"] == 16 else np.uint8)
+        return field["offset"] + codes[:field["width"]].astype(np.float64) * field["scale"]
+
+    roadmap = create_decarbonization_roadmap(
+        years=tuple(grid["years"]),
+        emissions_percent=tuple(decoded("emissions_percent").tolist()),
+        fees=tuple(decoded("fees").tolist())
+    )
+    results = create_scenario_results_chart(
+        baseline_emissions=grid["baseline_emissions"],
+        projected_emissions=float(decoded("projected_emissions")[0])
+    )
+    return roadmap, results
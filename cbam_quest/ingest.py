@@ -0,0 +1,198 @@
+"""Streaming ingestion of plant-level import and production records.
+
+Record files (CSV or Parquet) are read in chunks with only the needed columns
+projected, and reduced to per-plant/region/year/CN-code emission baselines
+as they stream past, so memory depends on the number of groups rather than the
+number of rows. Aggregates are cached under a fingerprint of the file content
+and the column mapping; re-ingesting an unchanged file is a cache read.
+
+    python -m cbam_quest.ingest shipments.parquet
+"""
+import argparse
+import hashlib
+import os
+from pathlib import Path
+
+import pandas as pd
+
+DEFAULT_CACHE_DIR = Path(os.environ.get(
+    "CBAM_QUEST_CACHE",
+    Path(__file__).resolve().parent.parent / ".cache",
+)) / "baselines"
+
+# Logical field -> column name in the record files
+DEFAULT_COLUMNS = {
+    "plant": "plant_id",
+    "region": "region",
+    "year": "year",
+    "product": "cn_code",
+    "emissions": "emissions_tco2e",
+}
+GROUP_FIELDS = ("plant", "region", "year", "product")
+# Files without a product column are grouped under this CN code
+UNSPECIFIED_PRODUCT = "unspecified"
+CACHE_FORMAT = 2
+CHUNK_ROWS = 1_000_000
+FINGERPRINT_BLOCK = 1 << 20
+
+
+def file_fingerprint(path):
+    """BLAKE2b digest of the file content, read in 1 MB blocks"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(FINGERPRINT_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _is_parquet(path):
+    return Path(path).suffix.lower() in (".parquet", ".pq")
+
+
+def _parquet_file(path):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet records requires pyarrow: pip install pyarrow") from e
+    return pq.ParquetFile(path)
+
+
+def _file_columns(path):
+    """Column names in the record file, read from the header or schema only"""
+    if _is_parquet(path):
+        return set(_parquet_file(path).schema_arrow.names)
+    return set(pd.read_csv(path, nrows=0).columns)
+
+
+def iter_record_chunks(path, columns=DEFAULT_COLUMNS, chunk_rows=CHUNK_ROWS):
+    """Yield DataFrames of at most ``chunk_rows`` rows with the logical field names"""
+    fields = [*GROUP_FIELDS, "emissions"]
+    has_product = columns["product"] in _file_columns(path)
+    if not has_product:
+        fields.remove("product")
+    source_columns = [columns[field] for field in fields]
+    rename = {columns[field]: field for field in fields}
+
+    if _is_parquet(path):
+        batches = _parquet_file(path).iter_batches(batch_size=chunk_rows, columns=source_columns)
+        chunks = (batch.to_pandas() for batch in batches)
+    else:
+        dtypes = {columns[field]: "string" for field in ("plant", "region", "product")}
+        chunks = pd.read_csv(path, usecols=source_columns, dtype=dtypes, chunksize=chunk_rows)
+
+    for chunk in chunks:
+        chunk = chunk.rename(columns=rename)
+        if has_product:
+            chunk["product"] = chunk["product"].astype("string")
+        else:
+            chunk["product"] = UNSPECIFIED_PRODUCT
+        yield chunk
+
+
+def _combine(partials):
+    combined = pd.concat(partials)
+    return combined.groupby(level=list(GROUP_FIELDS), sort=False, observed=True).sum()
+
+
+def aggregate_records(chunks, compact_rows=CHUNK_ROWS):
+    """Reduce record chunks to total emissions per (plant, region, year, product)"""
+    partials, pending_rows = [], 0
+    for chunk in chunks:
+        partial = chunk.groupby(list(GROUP_FIELDS), sort=False, observed=True)["emissions"].sum()
+        partials.append(partial)
+        pending_rows += len(partial)
+        # Fold the partial sums together once they outgrow a chunk, bounding memory
+        if pending_rows > compact_rows and len(partials) > 1:
+            partials = [_combine(partials)]
+            pending_rows = len(partials[0])
+
+    if not partials:
+        index = pd.MultiIndex.from_arrays([[]] * len(GROUP_FIELDS), names=list(GROUP_FIELDS))
+        return pd.Series([], index=index, dtype="float64", name="emissions")
+    return _combine(partials).sort_index()
+
+
+class Baselines:
+    """Emission baselines (tCO2e) per plant, region, year and CN code"""
+
+    def __init__(self, emissions, fingerprint=None):
+        self.emissions = emissions
+        self.fingerprint = fingerprint
+
+    @property
+    def years(self):
+        return sorted(self.emissions.index.unique("year"))
+
+    @property
+    def regions(self):
+        return sorted(self.emissions.index.unique("region"))
+
+    def total(self, regions=None, year=None):
+        """Baseline emissions for the given regions (all if empty) in ``year`` (latest if None)"""
+        if self.emissions.empty:
+            return 0.0
+        year = self.years[-1] if year is None else year
+        emissions = self.emissions.xs(year, level="year")
+        if regions:
+            emissions = emissions[emissions.index.get_level_values("region").isin(regions)]
+        return float(emissions.sum())
+
+    def by_plant(self, year=None):
+        """Emissions per plant in ``year`` (latest if None)"""
+        year = self.years[-1] if year is None else year
+        return self.emissions.xs(year, level="year").groupby(level="plant").sum()
+
+    def plant_regions(self, year=None):
+        """Each plant's main region, the one it emits most in during ``year`` (latest if None)"""
+        year = self.years[-1] if year is None else year
+        by_region = self.emissions.xs(year, level="year").groupby(level=["plant", "region"]).sum()
+        main = by_region.sort_values().groupby(level="plant").tail(1)
+        return main.reset_index(level="region")["region"].sort_index()
+
+
+def _cache_path(fingerprint, columns, cache_dir):
+    mapping = ",".join(f"{field}={columns[field]}" for field in sorted(columns))
+    key = f"{CACHE_FORMAT}|{fingerprint}|{mapping}"
+    key = hashlib.blake2b(key.encode("utf-8"), digest_size=20).hexdigest()
+    return Path(cache_dir) / f"{key}.csv"
+
+
+def load_baselines(path, columns=DEFAULT_COLUMNS, cache_dir=DEFAULT_CACHE_DIR,
+                   chunk_rows=CHUNK_ROWS):
+    """Aggregate a record file into Baselines, skipping files already ingested"""
+    columns = {**DEFAULT_COLUMNS, **columns}
+    fingerprint = file_fingerprint(path)
+    cache_path = _cache_path(fingerprint, columns, cache_dir)
+
+    if cache_path.exists():
+        cached = pd.read_csv(cache_path, dtype={"plant": "string", "region": "string", "product": "string"})
+        emissions = cached.set_index(list(GROUP_FIELDS))["emissions"]
+        return Baselines(emissions, fingerprint)
+
+    emissions = aggregate_records(iter_record_chunks(path, columns, chunk_rows), chunk_rows)
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    emissions.reset_index().to_csv(tmp_path, index=False)
+    os.replace(tmp_path, cache_path)
+    return Baselines(emissions, fingerprint)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate plant records into emission baselines")
+    parser.add_argument("path", type=Path, help="CSV or Parquet record file")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    for field, column in DEFAULT_COLUMNS.items():
+        parser.add_argument(f"--{field}-column", default=column, help=f"column holding {field}")
+    args = parser.parse_args(argv)
+
+    columns = {field: getattr(args, f"{field}_column") for field in DEFAULT_COLUMNS}
+    baselines = load_baselines(args.path, columns, chunk_rows=args.chunk_rows)
+    print(f"{args.path}: fingerprint {baselines.fingerprint[:12]}, "
+          f"{len(baselines.emissions):,} plant-region-year groups")
+    for region in baselines.regions:
+        print(f"  {region}: {baselines.total([region]):,.0f} tCO2e in {baselines.years[-1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Precomputed, memory-mapped lookup table for every integer slider state.
+
+The IMPACT SIMULATOR levers are integers in 0-100, so every lever-dependent
+model output fits in a small float32 file. Fees and net savings are linear in
+the carbon price, so they are derived from the stored projected emissions and
+implementation cost at lookup instead of getting a price axis of their own.
+``build_table`` writes the file once; ``load_or_build`` maps it at startup and
+rebuilds it whenever the model coefficients have changed.
+
+File layout: an 8-byte magic, a little-endian uint32 header length, a JSON
+header (model version, baseline, block offsets) padded to 64 bytes, then one
+C-ordered float32 block per field.
+
+Build from the command line with ``python -m cbam_quest.lookup``.
+"""
+import argparse
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from cbam_quest import engine
+
+MAGIC = b"CBAMLUT\x00"
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+DEFAULT_PATH = Path(os.environ.get(
+    "CBAM_QUEST_TABLE",
+    Path(__file__).resolve().parent.parent / ".cache" / "scenario_table.bin",
+))
+
+# Stored fields, each indexed [recycled, renewable, efficiency]
+LEVER_FIELDS = ("footprint", "implementation_cost", "projected_emissions", "emission_reduction")
+
+_COEFFICIENTS = (
+    "FOOTPRINT_BASELINE", "RECYCLED_BASELINE", "FOOTPRINT_RECYCLED_FACTOR",
+    "FOOTPRINT_ENERGY_FACTOR", "FOOTPRINT_EFFICIENCY_FACTOR", "FOOTPRINT_BOUNDS",
+    "COST_RECYCLED_FACTOR", "COST_ENERGY_FACTOR", "COST_EFFICIENCY_FACTOR",
+    "COST_BOUNDS", "COST_AMORTIZATION_YEARS", "REDUCTION_RECYCLED_FACTOR",
+    "REDUCTION_ENERGY_FACTOR", "REDUCTION_EFFICIENCY_FACTOR",
+)
+
+
+def model_version(baseline_emissions=engine.BASELINE_EMISSIONS):
+    """Hash of the model coefficients, slider domains and table layout"""
+    payload = {
+        "format": FORMAT_VERSION,
+        "baseline_emissions": float(baseline_emissions),
+        "coefficients": {name: getattr(engine, name) for name in _COEFFICIENTS},
+        "levers": list(engine.LEVER_LEVELS),
+    }
+    encoded = json.dumps(payload, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _emission_reduction(recycled_content, renewable_energy, process_efficiency, baseline_emissions):
+    """Sidebar emission reduction (tCO2e) before pricing"""
+    # fee_reduction is linear in the carbon price, so one euro per kilotonne recovers tCO2e
+    return engine.cbam_fee_reduction(
+        recycled_content, renewable_energy, process_efficiency, 1000, baseline_emissions
+    )
+
+
+def build_table(path=DEFAULT_PATH, baseline_emissions=engine.BASELINE_EMISSIONS):
+    """Precompute every slider state and write the table to ``path``"""
+    path = Path(path)
+    levers = np.asarray(engine.LEVER_LEVELS)
+
+    # Any price works here: only the lever-dependent outputs are kept
+    grid = engine.evaluate_grid(
+        levers, levers, levers, engine.CARBON_PRICE_LEVELS[:1], baseline_emissions, dtype=np.float32
+    )
+    r, e, p = np.ix_(*(levers.astype(np.float32),) * 3)
+    blocks = {
+        "footprint": grid.footprint[..., 0],
+        "implementation_cost": grid.implementation_cost[..., 0],
+        "projected_emissions": grid.projected_emissions[..., 0],
+        "emission_reduction": np.broadcast_to(
+            _emission_reduction(r, e, p, np.float32(baseline_emissions)), grid.footprint.shape[:3]
+        ),
+    }
+
+    # Lay out blocks back to back, each aligned for the memory map
+    layout = {}
+    offset = 0
+    for name, block in blocks.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        layout[name] = {"offset": offset, "shape": list(block.shape)}
+        offset += block.size * 4
+    header = json.dumps({
+        "version": model_version(baseline_emissions),
+        "baseline_emissions": float(baseline_emissions),
+        "levers": levers.tolist(),
+        "blocks": layout,
+    }).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 4 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for name, block in blocks.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(np.ascontiguousarray(block, dtype="<f4").tobytes())
+        # mkstemp creates the file owner-only; let other users map a table built by one of them
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+    return path
+
+
+def _read_header(path):
+    """Return (header dict, data start offset) or raise ValueError"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a scenario table")
+        (length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(length).decode("utf-8"))
+    data_start = -(-(len(MAGIC) + 4 + length) // ALIGNMENT) * ALIGNMENT
+    return header, data_start
+
+
+class ScenarioTable:
+    """Read-only view over a memory-mapped scenario table"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = Path(path)
+        header, data_start = _read_header(self.path)
+        self.version = header["version"]
+        self.baseline_emissions = header["baseline_emissions"]
+        self._lever_min = header["levers"][0]
+        self._lever_max = header["levers"][-1]
+
+        self.blocks = {}
+        for name, block in header["blocks"].items():
+            self.blocks[name] = np.memmap(
+                self.path, dtype="<f4", mode="r",
+                offset=data_start + block["offset"], shape=tuple(block["shape"]),
+            )
+
+    @property
+    def is_current(self):
+        """True when the table matches the current model coefficients"""
+        return self.version == model_version(self.baseline_emissions)
+
+    def index(self, recycled_content, renewable_energy, process_efficiency):
+        """Table indices for a lever setting, or None if it is off the grid"""
+        levers = (recycled_content, renewable_energy, process_efficiency)
+        if any(int(v) != v or not self._lever_min <= v <= self._lever_max for v in levers):
+            return None
+        return tuple(int(v) - self._lever_min for v in levers)
+
+    def lookup(self, recycled_content, renewable_energy, process_efficiency, carbon_price,
+               baseline_emissions=None):
+        """All scenario outputs for one slider state.
+
+        Off-grid lever settings and non-default baselines are computed by the
+        engine. Any carbon price is served from the table.
+        """
+        idx = None
+        if baseline_emissions is None or baseline_emissions == self.baseline_emissions:
+            idx = self.index(recycled_content, renewable_energy, process_efficiency)
+        if idx is None:
+            return engine.calculate_scenario(
+                recycled_content, renewable_energy, process_efficiency, carbon_price,
+                self.baseline_emissions if baseline_emissions is None else baseline_emissions,
+            )
+
+        b = self.blocks
+        cost = float(b["implementation_cost"][idx])
+        projected = float(b["projected_emissions"][idx])
+        baseline_fees = float(engine.cbam_fees(self.baseline_emissions, carbon_price))
+        projected_fees = float(engine.cbam_fees(projected, carbon_price))
+        return engine.ScenarioResults(
+            footprint=float(b["footprint"][idx]),
+            implementation_cost=cost,
+            projected_emissions=projected,
+            baseline_fees=baseline_fees,
+            projected_fees=projected_fees,
+            net_savings=baseline_fees - projected_fees - cost / engine.COST_AMORTIZATION_YEARS,
+            fee_reduction=float(b["emission_reduction"][idx]) * carbon_price / 1000,
+        )
+
+
+def load_or_build(path=DEFAULT_PATH, baseline_emissions=engine.BASELINE_EMISSIONS):
+    """Map the table at ``path``, rebuilding it if missing, corrupt or stale"""
+    path = Path(path)
+    try:
+        table = ScenarioTable(path)
+        if table.is_current and table.baseline_emissions == float(baseline_emissions):
+            return table
+    except (OSError, ValueError, KeyError):
+        pass
+    build_table(path, baseline_emissions)
+    return ScenarioTable(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the CBAM Quest scenario lookup table")
+    parser.add_argument("--output", default=DEFAULT_PATH, type=Path, help="table file to write")
+    parser.add_argument("--baseline", default=engine.BASELINE_EMISSIONS, type=float,
+                        help="baseline emissions in tCO2e")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the table is current")
+    args = parser.parse_args(argv)
+
+    if args.force:
+        build_table(args.output, args.baseline)
+        table = ScenarioTable(args.output)
+    else:
+        table = load_or_build(args.output, args.baseline)
+    size_mb = table.path.stat().st_size / 1e6
+    print(f"{table.path}: version {table.version[:12]}, {size_mb:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
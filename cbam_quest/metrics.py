@@ -0,0 +1,153 @@
+"""Per-card render timing for the dashboard.
+
+``RerunMetrics`` collects one record per card for a single script rerun:
+wall time of the card's data and content functions, figure serialization
+time, serialized payload size and cache status. Serialization happens while
+the card renders, so ``render_s`` includes ``serialize_s``. Finished reruns are folded
+into the process-wide ``registry``, which can write Prometheus text format
+(for a node_exporter textfile collector) or append JSON lines to a file.
+
+Nothing here runs unless the dashboard enables instrumentation, so the
+disabled path costs one ``None`` check per card.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from cbam_quest.cache import figure_cache
+
+
+class CardTiming:
+    """Measurements for one card in one rerun"""
+
+    def __init__(self, card, data_cached):
+        self.record = {
+            "card": card,
+            "data_cached": data_cached,
+            "data_s": 0.0,
+            "render_s": 0.0,
+            "serialize_s": 0.0,
+            "payload_bytes": 0,
+            "figures": 0,
+            "figure_cache_hits": 0,
+            "figure_cache_misses": 0,
+        }
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Add the wall time of the block to ``<name>_s``"""
+        hits, misses = figure_cache.thread_info()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record[f"{name}_s"] += time.perf_counter() - start
+            new_hits, new_misses = figure_cache.thread_info()
+            self.record["figure_cache_hits"] += new_hits - hits
+            self.record["figure_cache_misses"] += new_misses - misses
+
+    def observe_figure(self, fig):
+        """Time the figure's JSON serialization and record its size"""
+        start = time.perf_counter()
+        payload = fig.to_json()
+        self.record["serialize_s"] += time.perf_counter() - start
+        self.record["payload_bytes"] += len(payload.encode("utf-8"))
+        self.record["figures"] += 1
+
+
+class RerunMetrics:
+    """Card timings for a single script rerun"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.cards = []
+        self.current = None
+
+    @contextlib.contextmanager
+    def card(self, title, data_cached):
+        timing = CardTiming(title, data_cached)
+        self.current = timing
+        try:
+            yield timing
+        finally:
+            self.current = None
+            self.cards.append(timing.record)
+
+    def observe_figure(self, fig):
+        if self.current is not None:
+            self.current.observe_figure(fig)
+
+
+class MetricsRegistry:
+    """Process-wide totals across every session's reruns"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cards = {}
+        self.reruns = 0
+
+    def observe(self, rerun, jsonl_path=None, prometheus_path=None):
+        """Fold a finished rerun into the totals and write any configured exports"""
+        with self._lock:
+            self.reruns += 1
+            for record in rerun.cards:
+                totals = self._cards.setdefault(record["card"], {
+                    "renders": 0, "data_hits": 0, "data_misses": 0,
+                    "data_s": 0.0, "render_s": 0.0, "serialize_s": 0.0,
+                    "payload_bytes": 0, "figure_cache_hits": 0, "figure_cache_misses": 0,
+                })
+                totals["renders"] += 1
+                totals["data_hits" if record["data_cached"] else "data_misses"] += 1
+                for field in ("data_s", "render_s", "serialize_s",
+                              "figure_cache_hits", "figure_cache_misses"):
+                    totals[field] += record[field]
+                totals["payload_bytes"] = record["payload_bytes"]  # Latest payload size
+
+            if jsonl_path:
+                with open(jsonl_path, "a", encoding="utf-8") as f:
+                    for record in rerun.cards:
+                        f.write(json.dumps({"timestamp": rerun.started, **record}) + "\n")
+            if prometheus_path:
+                path = Path(prometheus_path)
+                tmp = path.with_name(f".{path.name}.tmp")
+                tmp.write_text(self._prometheus_text())
+                os.replace(tmp, path)
+
+    def _prometheus_text(self):
+        lines = [
+            "# HELP cbam_quest_reruns_total Instrumented dashboard reruns.",
+            "# TYPE cbam_quest_reruns_total counter",
+            f"cbam_quest_reruns_total {self.reruns}",
+        ]
+        series = [
+            ("card_renders_total", "counter", "Card renders.", lambda t: [("", t["renders"])]),
+            ("card_data_total", "counter", "Card data function calls by cache status.",
+             lambda t: [('result="hit"', t["data_hits"]), ('result="miss"', t["data_misses"])]),
+            ("card_seconds_total", "counter", "Wall time per card phase.",
+             lambda t: [(f'phase="{p}"', t[f"{p}_s"]) for p in ("data", "render", "serialize")]),
+            ("card_figure_cache_total", "counter", "Figure cache lookups by result.",
+             lambda t: [('result="hit"', t["figure_cache_hits"]),
+                        ('result="miss"', t["figure_cache_misses"])]),
+            ("card_payload_bytes", "gauge", "Serialized figure payload of the latest render.",
+             lambda t: [("", t["payload_bytes"])]),
+        ]
+        for name, kind, help_text, samples in series:
+            lines.append(f"# HELP cbam_quest_{name} {help_text}")
+            lines.append(f"# TYPE cbam_quest_{name} {kind}")
+            for card, totals in sorted(self._cards.items()):
+                card_label = card.replace("\\", "\\\\").replace('"', '\\"')
+                for labels, value in samples(totals):
+                    label_text = f'card="{card_label}"' + (f",{labels}" if labels else "")
+                    lines.append(f"cbam_quest_{name}{{{label_text}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def prometheus_text(self):
+        """Current totals in Prometheus text exposition format"""
+        with self._lock:
+            return self._prometheus_text()
+
+
+registry = MetricsRegistry()
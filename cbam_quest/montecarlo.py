@@ -0,0 +1,154 @@
+"""Monte Carlo simulation of carbon-price and lever-achievement uncertainty.
+
+Each draw samples a CBAM certificate price around the chosen carbon price
+(lognormal, mean preserving) and how much of each lever target is actually
+achieved (Beta distributed), then evaluates the engine formulas on the whole
+batch at once. Draws are split into fixed-size shards with seeds spawned from
+one SeedSequence, so results do not depend on the number of workers or the
+order in which shards finish.
+"""
+import contextlib
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from collections import namedtuple
+
+import numpy as np
+
+from cbam_quest import engine
+
+PRICE_VOLATILITY = 0.25  # Annual volatility of the certificate price
+LEVER_ACHIEVEMENT = (8.0, 2.0)  # Beta(a, b) share of each lever target achieved, mean 80%
+PERCENTILES = (10, 50, 90)
+DEFAULT_DRAWS = 1_000_000
+SHARD_SIZE = 250_000
+
+Bands = namedtuple("Bands", ["p10", "p50", "p90"])
+Estimate = namedtuple("Estimate", ["draws", "total_draws", "projected_fees", "net_savings"])
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _detached_main():
+    """Hide ``__main__`` while worker processes start.
+
+    Streamlit registers the app script as ``__main__``, and spawn/forkserver
+    children re-import it before running any task, which would execute the
+    whole dashboard in every worker.
+    """
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+def _get_pool(workers):
+    """Shared worker pool, created on first use and sized by the first caller"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Avoid forking a multi-threaded server process
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            with _detached_main():
+                # Pool starts every worker up front, inside the detached block
+                _pool = multiprocessing.get_context(method).Pool(workers)
+        return _pool
+
+
+def simulate_shard(recycled_content, renewable_energy, process_efficiency, carbon_price,
+                   baseline_emissions, draws, seed,
+                   price_volatility=PRICE_VOLATILITY, achievement=LEVER_ACHIEVEMENT):
+    """Simulate one shard; returns float32 (projected_fees, net_savings) arrays"""
+    rng = np.random.default_rng(seed)
+
+    price = carbon_price * np.exp(
+        price_volatility * rng.standard_normal(draws) - price_volatility ** 2 / 2
+    )
+    achieved = rng.beta(*achievement, size=(3, draws))
+    recycled = engine.RECYCLED_BASELINE + (recycled_content - engine.RECYCLED_BASELINE) * achieved[0]
+    renewable = renewable_energy * achieved[1]
+    efficiency = process_efficiency * achieved[2]
+
+    results = engine.evaluate(recycled, renewable, efficiency, price, baseline_emissions)
+    return (
+        results.projected_fees.astype(np.float32),
+        results.net_savings.astype(np.float32),
+    )
+
+
+def _simulate_indexed(task):
+    index, args = task
+    return (index, *simulate_shard(*args))
+
+
+def _bands(samples):
+    return Bands(*(float(v) for v in np.percentile(samples, PERCENTILES)))
+
+
+class MonteCarloRun:
+    """Sharded Monte Carlo run that streams converging percentile estimates"""
+
+    def __init__(self, recycled_content, renewable_energy, process_efficiency, carbon_price,
+                 baseline_emissions=engine.BASELINE_EMISSIONS, draws=DEFAULT_DRAWS, seed=0,
+                 shard_size=SHARD_SIZE, workers=None):
+        self.inputs = (recycled_content, renewable_energy, process_efficiency,
+                       carbon_price, baseline_emissions)
+        self.draws = draws
+        self.seed = seed
+        self.shard_size = shard_size
+        self.workers = os.cpu_count() if workers is None else workers
+        self.result = None
+
+    def _shards(self):
+        sizes = [self.shard_size] * (self.draws // self.shard_size)
+        if self.draws % self.shard_size:
+            sizes.append(self.draws % self.shard_size)
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        return list(zip(sizes, seeds))
+
+    def _completed_shards(self):
+        """Yield (index, fees, savings) as shards finish"""
+        shards = self._shards()
+        if self.workers <= 1 or len(shards) == 1:
+            for i, (size, seed) in enumerate(shards):
+                yield (i, *simulate_shard(*self.inputs, size, seed))
+            return
+
+        pool = _get_pool(self.workers)
+        tasks = [(i, (*self.inputs, size, seed)) for i, (size, seed) in enumerate(shards)]
+        yield from pool.imap_unordered(_simulate_indexed, tasks)
+
+    def estimates(self):
+        """Yield an Estimate after each completed shard; the last one covers every draw"""
+        if self.result is not None:
+            yield self.result
+            return
+
+        fees, savings = {}, {}
+        for i, shard_fees, shard_savings in self._completed_shards():
+            fees[i], savings[i] = shard_fees, shard_savings
+            # Concatenate in shard order so the final estimate is order independent
+            order = sorted(fees)
+            all_fees = np.concatenate([fees[k] for k in order])
+            all_savings = np.concatenate([savings[k] for k in order])
+            estimate = Estimate(
+                draws=all_fees.size,
+                total_draws=self.draws,
+                projected_fees=_bands(all_fees),
+                net_savings=_bands(all_savings),
+            )
+            if estimate.draws == self.draws:
+                self.result = estimate
+            yield estimate
+
+    def run(self):
+        """Run to completion and return the final Estimate"""
+        for estimate in self.estimates():
+            pass
+        return estimate
@@ -0,0 +1,115 @@
+"""Cheapest lever combination that meets an emissions or CBAM fee target.
+
+Both targets reduce to "a weighted sum of the levers must reach a threshold",
+while the implementation cost never decreases as any lever grows. So for a
+fixed (recycled, renewable) pair the cheapest feasible efficiency level is
+the smallest one that satisfies the targets, and it can be solved for in
+closed form. Recycled content below the 40% baseline costs nothing but also
+helps nothing, so only 40-100 is searched. That leaves 61 x 101 candidates
+instead of 101^3, each checked against the exact, clamped engine formulas.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from cbam_quest import engine
+
+Solution = namedtuple(
+    "Solution",
+    [
+        "recycled_content",
+        "renewable_energy",
+        "process_efficiency",
+        "implementation_cost",
+        "footprint",
+        "projected_fees",
+    ],
+)
+
+LEVER_MAX = engine.LEVER_LEVELS[-1]
+
+
+def _feasible(recycled, renewable, efficiency, carbon_price, target_footprint, fee_budget,
+              baseline_emissions):
+    """Exact feasibility of lever arrays against the clamped engine formulas"""
+    ok = np.ones(np.broadcast(recycled, renewable, efficiency).shape, dtype=bool)
+    if target_footprint is not None:
+        ok &= engine.carbon_footprint(recycled, renewable, efficiency) <= target_footprint
+    if fee_budget is not None and baseline_emissions > 0:
+        projected = engine.projected_emissions(recycled, renewable, efficiency, baseline_emissions)
+        ok &= engine.cbam_fees(projected, carbon_price) <= fee_budget
+    elif fee_budget is not None:
+        # No baseline emissions means no fees, whatever the levers
+        ok &= fee_budget >= 0
+    return ok
+
+
+def _solution(recycled, renewable, efficiency, carbon_price, baseline_emissions):
+    scenario = engine.calculate_scenario(
+        recycled, renewable, efficiency, carbon_price, baseline_emissions
+    )
+    return Solution(
+        recycled_content=int(recycled),
+        renewable_energy=int(renewable),
+        process_efficiency=int(efficiency),
+        implementation_cost=scenario.implementation_cost,
+        footprint=scenario.footprint,
+        projected_fees=scenario.projected_fees,
+    )
+
+
+def optimize_levers(carbon_price, target_footprint=None, fee_budget=None,
+                    baseline_emissions=engine.BASELINE_EMISSIONS):
+    """Minimum-cost integer lever setting meeting every given target, or None if infeasible.
+
+    ``target_footprint`` caps the per-can footprint (kg CO2e); ``fee_budget``
+    caps projected CBAM fees (€M) at ``carbon_price``. With no baseline
+    emissions every setting meets a non-negative fee budget.
+    """
+    r, e = np.meshgrid(
+        np.arange(engine.RECYCLED_BASELINE, LEVER_MAX + 1),
+        np.arange(0, LEVER_MAX + 1),
+        indexing="ij",
+    )
+
+    # Smallest efficiency level each target allows, from the unclamped formulas
+    required = np.zeros(r.shape)
+    if target_footprint is not None:
+        unclamped_gap = (
+            engine.FOOTPRINT_BASELINE
+            - (r - engine.RECYCLED_BASELINE) * engine.FOOTPRINT_RECYCLED_FACTOR
+            - e * engine.FOOTPRINT_ENERGY_FACTOR
+            - target_footprint
+        )
+        required = np.maximum(required, unclamped_gap / engine.FOOTPRINT_EFFICIENCY_FACTOR)
+    if fee_budget is not None and baseline_emissions > 0 and carbon_price > 0:
+        max_emissions = fee_budget * 1000000 / carbon_price
+        lever_total = 300 * (1 - max_emissions / baseline_emissions)
+        required = np.maximum(required, lever_total - r - e)
+    p = np.clip(np.ceil(required - 1e-9), 0, LEVER_MAX)
+
+    # Float rounding can leave the closed form one step short; the clamps can make it infeasible
+    ok = _feasible(r, e, p, carbon_price, target_footprint, fee_budget, baseline_emissions)
+    p = np.where(ok | (p >= LEVER_MAX), p, p + 1)
+    ok = _feasible(r, e, p, carbon_price, target_footprint, fee_budget, baseline_emissions)
+    if not ok.any():
+        return None
+
+    cost = np.where(ok, engine.implementation_costs(r, e, p), np.inf)
+    best = np.unravel_index(np.argmin(cost), cost.shape)
+    return _solution(r[best], e[best], p[best], carbon_price, baseline_emissions)
+
+
+def exhaustive_search(carbon_price, target_footprint=None, fee_budget=None,
+                      baseline_emissions=engine.BASELINE_EMISSIONS):
+    """Reference solver that scores all 101^3 lever settings"""
+    levers = np.asarray(engine.LEVER_LEVELS)
+    r, e, p = np.ix_(levers, levers, levers)
+    ok = _feasible(r, e, p, carbon_price, target_footprint, fee_budget, baseline_emissions)
+    if not ok.any():
+        return None
+
+    cost = np.where(ok, engine.implementation_costs(r, e, p), np.inf)
+    best = np.unravel_index(np.argmin(cost), cost.shape)
+    return _solution(levers[best[0]], levers[best[1]], levers[best[2]], carbon_price,
+                     baseline_emissions)
@@ -0,0 +1,262 @@
+"""Percentile benchmarking against a peer facility dataset.
+
+A peer file has one row per facility and one numeric column per metric
+(recycled content, renewable energy share, transport intensity, ...). Each
+metric's values are kept sorted, so a facility's percentile rank is two
+``searchsorted`` calls and any peer quantile is a binary search: both are
+logarithmic in the number of peers, whatever the size of the dataset.
+
+Appended peers go into a small sorted run next to the main one instead of
+re-sorting everything. Lookups search both runs, and once the small run
+outgrows ``1 / COMPACT_RATIO`` of the main one the two are merged in a
+single linear pass.
+
+    python -m cbam_quest.peers peers.parquet --value recycled_content=62 --value transport_intensity=38
+"""
+import argparse
+import csv
+import io
+import math
+import sys
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cbam_quest.prices import _complete_end
+
+# Peer quantiles reported alongside each percentile rank
+QUANTILES = (0.10, 0.25, 0.50, 0.75, 0.90)
+COMPACT_RATIO = 8
+ID_COLUMN = "facility_id"
+HIGHER, LOWER = "higher", "lower"
+
+Benchmark = namedtuple("Benchmark", ["value", "percentile", "p10", "p25", "p50", "p75", "p90", "peers"])
+
+
+class SortedValues:
+    """A growing multiset of floats answering rank and quantile queries in O(log n)"""
+
+    def __init__(self, values=()):
+        self._main = np.sort(self._clean(values))
+        self._delta = np.empty(0)
+
+    @staticmethod
+    def _clean(values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        return values[~np.isnan(values)]
+
+    @staticmethod
+    def _merge(a, b):
+        """Merge two sorted arrays in one linear pass"""
+        if not len(a) or not len(b):
+            return b if not len(a) else a
+        return np.insert(a, np.searchsorted(a, b, side="right"), b)
+
+    def __len__(self):
+        return len(self._main) + len(self._delta)
+
+    def add(self, values):
+        """Insert values (NaN is skipped); returns how many were added"""
+        values = np.sort(self._clean(values))
+        self._delta = self._merge(self._delta, values)
+        if len(self._delta) * COMPACT_RATIO > len(self._main):
+            self._main, self._delta = self._merge(self._main, self._delta), np.empty(0)
+        return len(values)
+
+    def count_below(self, value, inclusive=False):
+        side = "right" if inclusive else "left"
+        return int(np.searchsorted(self._main, value, side) + np.searchsorted(self._delta, value, side))
+
+    def percentile_rank(self, value):
+        """Share of values below ``value`` in percent, ties counted half"""
+        if not len(self):
+            return math.nan
+        below, at_or_below = self.count_below(value), self.count_below(value, inclusive=True)
+        return 100.0 * (below + at_or_below) / (2 * len(self))
+
+    def kth(self, k):
+        """The ``k``-th smallest value (0-based), by binary search over both runs"""
+        a, b = self._main, self._delta
+        lo, hi = max(0, k + 1 - len(b)), min(k + 1, len(a))
+        # Smallest number of values taken from ``a`` such that the rest fit in ``b``
+        while lo < hi:
+            i = (lo + hi) // 2
+            j = k + 1 - i
+            if j > 0 and b[j - 1] > a[i]:
+                lo = i + 1
+            else:
+                hi = i
+        j = k + 1 - lo
+        return max(a[lo - 1] if lo > 0 else -math.inf, b[j - 1] if j > 0 else -math.inf)
+
+    def quantile(self, q):
+        """Linearly interpolated quantile, matching ``numpy.quantile``"""
+        if not len(self):
+            return math.nan
+        position = q * (len(self) - 1)
+        below = int(math.floor(position))
+        low = float(self.kth(below))
+        if below + 1 >= len(self):
+            return low
+        return low + (position - below) * (float(self.kth(below + 1)) - low)
+
+
+class PeerBenchmarks:
+    """Sorted per-metric indexes over a peer facility dataset"""
+
+    def __init__(self, metrics=None, directions=None):
+        self._lock = threading.Lock()
+        self.version = 0
+        self.metrics = list(metrics) if metrics is not None else None
+        self.directions = dict(directions or {})
+        self._values = {}
+
+    def append(self, frame):
+        """Index the peers in ``frame``; returns the number of rows added"""
+        if not len(frame):
+            # An empty frame has no dtypes to infer the metrics from
+            return 0
+        with self._lock:
+            if self.metrics is None:
+                self.metrics = [column for column in frame.columns
+                                if column != ID_COLUMN and pd.api.types.is_numeric_dtype(frame[column])]
+            for metric in self.metrics:
+                if metric in frame:
+                    values = pd.to_numeric(frame[metric], errors="coerce").to_numpy(dtype=np.float64)
+                    self._values.setdefault(metric, SortedValues()).add(values)
+            self.version += 1
+            return len(frame)
+
+    def peers(self, metric):
+        """Number of peers with a value for ``metric``"""
+        values = self._values.get(metric)
+        return len(values) if values is not None else 0
+
+    def percentile(self, metric, value, direction=None):
+        """Percentage of peers that ``value`` outperforms on ``metric``"""
+        direction = direction or self.directions.get(metric, HIGHER)
+        with self._lock:
+            values = self._values.get(metric)
+            if values is None or value is None or math.isnan(value):
+                return math.nan
+            rank = values.percentile_rank(value)
+        return rank if direction == HIGHER else 100.0 - rank
+
+    def quantiles(self, metric, quantiles=QUANTILES):
+        """Peer values of ``metric`` at each of ``quantiles``"""
+        with self._lock:
+            values = self._values.get(metric)
+            if values is None:
+                return tuple(math.nan for _ in quantiles)
+            return tuple(values.quantile(q) for q in quantiles)
+
+    def compare(self, values, directions=None):
+        """A ``Benchmark`` for each metric in the ``{metric: value}`` mapping"""
+        directions = {**self.directions, **(directions or {})}
+        return {
+            metric: Benchmark(value, self.percentile(metric, value, directions.get(metric)),
+                              *self.quantiles(metric), self.peers(metric))
+            for metric, value in values.items()
+        }
+
+
+class PeerFile:
+    """A peer dataset kept in sync with an append-only CSV or Parquet file"""
+
+    def __init__(self, path, metrics=None, directions=None):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._metrics, self._directions = metrics, directions
+        self.benchmarks = PeerBenchmarks(metrics, directions)
+        self._size = 0
+        self._rows = 0
+        self._offset = 0
+        self._header = None
+
+    def _rebuild(self):
+        self.benchmarks = PeerBenchmarks(self._metrics, self._directions)
+        self._size = self._rows = self._offset = 0
+        self._header = None
+
+    def _read_csv_tail(self, size):
+        with open(self.path, "rb") as f:
+            end = _complete_end(f, size)
+            if self._header is None:
+                f.seek(0)
+                header = f.readline()
+                self._header = next(csv.reader([header.decode("utf-8-sig").rstrip("\r\n")]))
+                self._offset = len(header)
+            if end <= self._offset:
+                return pd.DataFrame(columns=self._header)
+            f.seek(self._offset)
+            data = f.read(end - self._offset)
+        self._offset = end
+        return pd.read_csv(io.BytesIO(data), header=None, names=self._header,
+                           dtype={ID_COLUMN: str})
+
+    def _read_parquet_tail(self):
+        import pyarrow.parquet as pq
+        # Parquet files are rewritten to append, so only row groups past the rows indexed are decoded
+        parquet = pq.ParquetFile(self.path)
+        groups, first_row, row = [], None, 0
+        for index in range(parquet.metadata.num_row_groups):
+            rows = parquet.metadata.row_group(index).num_rows
+            if row + rows > self._rows:
+                groups.append(index)
+                first_row = row if first_row is None else first_row
+            row += rows
+        if not groups:
+            return parquet.schema_arrow.empty_table().to_pandas()
+        return parquet.read_row_groups(groups).slice(self._rows - first_row).to_pandas()
+
+    def sync(self):
+        """Index peers appended since the last sync; returns how many were added.
+
+        A file that shrank is taken to have been replaced and is indexed from scratch.
+        """
+        with self._lock:
+            size = self.path.stat().st_size
+            if size < self._size:
+                self._rebuild()
+            if size == self._size:
+                return 0
+            if self.path.suffix.lower() in (".parquet", ".pq"):
+                frame = self._read_parquet_tail()
+            else:
+                frame = self._read_csv_tail(size)
+            self._size = size
+            self._rows += len(frame)
+            return self.benchmarks.append(frame)
+
+
+def _parse_value(text):
+    metric, _, value = text.partition("=")
+    return metric, float(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank facility metrics against a peer dataset")
+    parser.add_argument("path", type=Path, help="peer facilities (.csv or .parquet)")
+    parser.add_argument("--value", type=_parse_value, action="append", default=[],
+                        metavar="METRIC=VALUE", help="a value to rank (repeatable)")
+    parser.add_argument("--lower-is-better", action="append", default=[], metavar="METRIC",
+                        help="rank lower values of this metric as better (repeatable)")
+    args = parser.parse_args(argv)
+
+    peer_file = PeerFile(args.path, directions={metric: LOWER for metric in args.lower_is_better})
+    rows = peer_file.sync()
+    benchmarks = peer_file.benchmarks
+    print(f"{rows:,} peers, metrics: {', '.join(benchmarks.metrics or [])}")
+    values = dict(args.value) or {metric: math.nan for metric in benchmarks.metrics or []}
+    for metric, result in benchmarks.compare(values).items():
+        bands = " / ".join(f"{getattr(result, band):.2f}" for band in ("p10", "p25", "p50", "p75", "p90"))
+        rank = f"P{result.percentile:.0f}" if not math.isnan(result.percentile) else "-"
+        print(f"{metric:<24} {result.value:>10.2f} {rank:>5}   peers P10-P90 {bands}  ({result.peers:,})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
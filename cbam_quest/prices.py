@@ -0,0 +1,321 @@
+"""CBAM certificate prices from EU ETS auction history.
+
+The CBAM certificate price for a calendar week is the average of the EU ETS
+auction clearing prices of the week before (Regulation (EU) 2023/956,
+Art. 21). Auction history files only ever grow at the end, so ingestion is
+incremental: the weekly sums and auction counts are cached together with the
+byte offset read so far, and a refresh parses only the lines appended since.
+A file that shrank or whose first block changed is re-read from scratch.
+
+Weeks start on Monday and are numbered from the week of 1970-01-01, so
+weekly resampling is integer division on the auction days followed by a
+``bincount``.
+
+    python -m cbam_quest.prices auctions.csv --growth fitted
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cbam_quest import trajectory
+
+DEFAULT_CACHE_DIR = Path(os.environ.get(
+    "CBAM_QUEST_CACHE",
+    Path(__file__).resolve().parent.parent / ".cache",
+)) / "auction_prices"
+
+# Logical field -> column name in the auction history files
+DEFAULT_COLUMNS = {
+    "date": "date",
+    "price": "auction_price",
+}
+CACHE_FORMAT = 1
+CHUNK_ROWS = 1_000_000
+ARROW_BLOCK_BYTES = 16 << 20
+HEAD_BLOCK = 4096
+LOOKBACK_WEEKS = 52  # Weekly averages the fitted trend is estimated from
+MAX_GROWTH = 0.15  # Bound on the fitted annual growth rate
+WEEKS_PER_YEAR = 365.25 / 7
+_EPOCH_OFFSET = 3  # 1970-01-01 is a Thursday; day + 3 counts from the Monday before
+
+
+def week_numbers(dates):
+    """Monday-based week number for each date"""
+    days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+    return (days + _EPOCH_OFFSET) // 7
+
+
+def week_starts(weeks):
+    """Monday of each week number"""
+    return pd.DatetimeIndex((np.asarray(weeks) * 7 - _EPOCH_OFFSET).astype("datetime64[D]"))
+
+
+def weekly_sums(dates, prices):
+    """(weeks, price sums, auction counts) for one batch of auctions"""
+    weeks = week_numbers(dates)
+    valid = ~np.isnan(prices)
+    weeks, prices = weeks[valid], prices[valid]
+    if not len(weeks):
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=np.int64)
+    first = weeks.min()
+    offset = weeks - first
+    counts = np.bincount(offset)
+    present = np.flatnonzero(counts)
+    return present + first, np.bincount(offset, weights=prices)[present], counts[present]
+
+
+def _merge(*parts):
+    weeks = np.concatenate([part[0] for part in parts])
+    unique, inverse = np.unique(weeks, return_inverse=True)
+    sums = np.bincount(inverse, weights=np.concatenate([part[1] for part in parts]), minlength=len(unique))
+    counts = np.bincount(inverse, weights=np.concatenate([part[2] for part in parts]), minlength=len(unique))
+    return unique, sums, counts.astype(np.int64)
+
+
+class _Bounded(io.RawIOBase):
+    """Read-only view of ``f`` that ends at byte ``end``"""
+
+    def __init__(self, f, end):
+        self._f = f
+        self._end = end
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        remaining = self._end - self._f.tell()
+        if remaining <= 0:
+            return 0
+        view = memoryview(buffer)[:remaining]
+        return self._f.readinto(view)
+
+
+def _complete_end(f, size):
+    """Offset just past the last newline, so a line still being written is left for later"""
+    position = size
+    while position > 0:
+        start = max(0, position - HEAD_BLOCK)
+        f.seek(start)
+        block = f.read(position - start)
+        newline = block.rfind(b"\n")
+        if newline >= 0:
+            return start + newline + 1
+        position = start
+    return 0
+
+
+class AuctionHistory:
+    """Weekly CBAM certificate prices for an append-only auction history CSV"""
+
+    def __init__(self, path, columns=DEFAULT_COLUMNS, cache_dir=DEFAULT_CACHE_DIR,
+                 chunk_rows=CHUNK_ROWS):
+        self.path = Path(path)
+        self.columns = {**DEFAULT_COLUMNS, **columns}
+        self.chunk_rows = chunk_rows
+        mapping = ",".join(f"{field}={self.columns[field]}" for field in sorted(self.columns))
+        key = f"{CACHE_FORMAT}|{self.path.resolve()}|{mapping}"
+        key = hashlib.blake2b(key.encode("utf-8"), digest_size=20).hexdigest()
+        self.cache_path = Path(cache_dir) / f"{key}.npz"
+        self._lock = threading.Lock()
+        self._state = None
+        self._weekly = None
+        self._paths = {}
+
+    def _empty_state(self):
+        return {
+            "weeks": np.empty(0, dtype=np.int64),
+            "sums": np.empty(0),
+            "counts": np.empty(0, dtype=np.int64),
+            "offset": 0,
+            "header": None,
+            "head_length": 0,
+            "head_digest": None,
+        }
+
+    def _load_cache(self):
+        try:
+            with np.load(self.cache_path) as cached:
+                meta = json.loads(str(cached["meta"]))
+                if meta.pop("format") != CACHE_FORMAT:
+                    return self._empty_state()
+                return {"weeks": cached["weeks"], "sums": cached["sums"], "counts": cached["counts"], **meta}
+        except (OSError, KeyError, ValueError):
+            return self._empty_state()
+
+    def _save_cache(self, state):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {key: value for key, value in state.items() if key not in ("weeks", "sums", "counts")}
+        tmp_path = self.cache_path.with_suffix(".tmp.npz")
+        np.savez(tmp_path, weeks=state["weeks"], sums=state["sums"], counts=state["counts"],
+                 meta=json.dumps({"format": CACHE_FORMAT, **meta}))
+        os.replace(tmp_path, self.cache_path)
+
+    def _iter_auctions(self, f, names):
+        """Yield (dates, prices) arrays from headerless CSV lines, with pyarrow's reader if available"""
+        date, price = self.columns["date"], self.columns["price"]
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pa_csv
+        except ImportError:
+            reader = pd.read_csv(f, header=None, names=names, usecols=[date, price],
+                                 chunksize=self.chunk_rows)
+            for chunk in reader:
+                yield (pd.to_datetime(chunk[date], format="ISO8601").to_numpy(),
+                       pd.to_numeric(chunk[price], errors="coerce").to_numpy(dtype=np.float64))
+            return
+        reader = pa_csv.open_csv(
+            f,
+            read_options=pa_csv.ReadOptions(column_names=names, block_size=ARROW_BLOCK_BYTES),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=[date, price],
+                column_types={date: pa.timestamp("s"), price: pa.float64()},
+            ),
+        )
+        for batch in reader:
+            yield (batch.column(date).to_numpy(zero_copy_only=False),
+                   batch.column(price).to_numpy(zero_copy_only=False))
+
+    @staticmethod
+    def _head_digest(f, length):
+        f.seek(0)
+        return hashlib.blake2b(f.read(length), digest_size=20).hexdigest()
+
+    def refresh(self):
+        """Ingest auctions appended since the last refresh; returns how many were read"""
+        with self._lock:
+            state = self._state if self._state is not None else self._load_cache()
+            size = self.path.stat().st_size
+            with open(self.path, "rb") as f:
+                end = _complete_end(f, size)
+                unchanged_head = (
+                    state["head_digest"] is not None
+                    and state["offset"] <= end
+                    and self._head_digest(f, state["head_length"]) == state["head_digest"]
+                )
+                if not unchanged_head:
+                    state = self._empty_state()
+                if end == 0 or (state["offset"] == end and state["header"] is not None):
+                    self._state = state
+                    return 0
+
+                f.seek(0)
+                header = state["header"] or f.readline().decode("utf-8").strip()
+                offset = max(state["offset"], f.tell())
+                parts = [(state["weeks"], state["sums"], state["counts"])]
+                rows = 0
+                f.seek(offset)
+                for dates, prices in self._iter_auctions(io.BufferedReader(_Bounded(f, end)),
+                                                         next(csv.reader([header]))):
+                    parts.append(weekly_sums(dates, prices))
+                    rows += len(dates)
+
+                head_length = min(end, HEAD_BLOCK)
+                weeks, sums, counts = _merge(*parts)
+                state = {
+                    "weeks": weeks,
+                    "sums": sums,
+                    "counts": counts,
+                    "offset": end,
+                    "header": header,
+                    "head_length": head_length,
+                    "head_digest": self._head_digest(f, head_length),
+                }
+            self._save_cache(state)
+            self._state = state
+            self._weekly = None
+            self._paths = {}
+            return rows
+
+    def weekly(self):
+        """Average auction clearing price per week, indexed by the week's Monday"""
+        if self._state is None:
+            self.refresh()
+        weekly = self._weekly
+        if weekly is None:
+            state = self._state
+            weekly = self._weekly = pd.Series(
+                state["sums"] / state["counts"], index=week_starts(state["weeks"]), name="price"
+            )
+        return weekly
+
+    def certificate_price(self, on=None):
+        """CBAM certificate price for the week of ``on`` (default: the coming week).
+
+        That is the average of the latest auction week before it, or None when
+        there is no auction history yet.
+        """
+        weekly = self.weekly()
+        if on is not None:
+            weekly = weekly[weekly.index < week_starts(week_numbers([pd.Timestamp(on)]))[0]]
+        return float(weekly.iloc[-1]) if len(weekly) else None
+
+    def fitted_growth(self, lookback_weeks=LOOKBACK_WEEKS):
+        """Annual growth of the log-linear trend through the latest weekly averages"""
+        weekly = self.weekly().iloc[-lookback_weeks:]
+        if len(weekly) < 2:
+            return 0.0
+        weeks = week_numbers(weekly.index.to_numpy())
+        slope = np.polyfit(weeks, np.log(weekly.to_numpy()), 1)[0]
+        return float(np.clip(np.expm1(slope * WEEKS_PER_YEAR), -MAX_GROWTH, MAX_GROWTH))
+
+    def forward_path(self, growth=trajectory.PRICE_GROWTH, years=trajectory.YEARS):
+        """Carbon price per year: the yearly mean of weekly prices where there is history,
+        then the latest certificate price compounded at ``growth`` (a rate or ``"fitted"``).
+
+        Paths are cached until the next refresh that reads new auctions.
+        """
+        key = (growth, tuple(int(year) for year in years))
+        path = self._paths.get(key)
+        if path is not None:
+            return path
+
+        weekly = self.weekly()
+        if not len(weekly):
+            raise ValueError(f"{self.path} has no auctions")
+        rate = self.fitted_growth() if growth == "fitted" else growth
+        latest_week = weekly.index[-1]
+        elapsed = (pd.to_datetime([f"{year}-07-01" for year in years]) - latest_week).days / 365.25
+        path = self.certificate_price() * (1 + rate) ** np.maximum(elapsed.to_numpy(), 0)
+        yearly = weekly.groupby(weekly.index.year).mean()
+        recorded = np.isin(years, yearly.index)
+        path[recorded] = yearly.reindex(np.asarray(years)[recorded]).to_numpy()
+        path.flags.writeable = False
+        self._paths[key] = path
+        return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest EU ETS auction history into weekly CBAM prices")
+    parser.add_argument("path", type=Path, help="auction history CSV")
+    parser.add_argument("--growth", default=str(trajectory.PRICE_GROWTH),
+                        help='annual price growth of the forward path, or "fitted"')
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    for field, column in DEFAULT_COLUMNS.items():
+        parser.add_argument(f"--{field}-column", default=column, help=f"column holding the auction {field}")
+    args = parser.parse_args(argv)
+
+    columns = {field: getattr(args, f"{field}_column") for field in DEFAULT_COLUMNS}
+    history = AuctionHistory(args.path, columns, chunk_rows=args.chunk_rows)
+    rows = history.refresh()
+    weekly = history.weekly()
+    print(f"{args.path}: {rows:,} new auctions, {len(weekly):,} weeks "
+          f"({weekly.index[0]:%Y-%m-%d} to {weekly.index[-1]:%Y-%m-%d})")
+    for week, price in weekly.iloc[-4:].items():
+        print(f"  week of {week:%Y-%m-%d}: €{price:.2f}/t")
+    growth = args.growth if args.growth == "fitted" else float(args.growth)
+    for year, price in zip(trajectory.YEARS, history.forward_path(growth)):
+        print(f"  {year}: €{price:.2f}/t")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
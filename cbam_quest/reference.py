@@ -0,0 +1,180 @@
+"""Process-wide registry of read-only reference datasets.
+
+Reference data (region lists, material breakdowns, peer benchmarks, later
+emission factors and price history) is loaded once per server process and
+handed to every Streamlit session as the same read-only NumPy arrays, so a
+rerun never copies or rebuilds it. ``reload`` swaps in fresh arrays
+atomically; sessions still holding the old table keep a consistent view.
+
+Datasets are read from ``CBAM_QUEST_REFERENCE_DIR`` when it has a file for
+them, else from the CSV files bundled in ``cbam_quest/data``. An Arrow IPC
+file (``<name>.arrow``) is memory-mapped, so its numeric columns are views
+of the page cache rather than copies.
+"""
+import csv
+import os
+import sys
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+
+from cbam_quest.cache import figure_cache
+
+BUNDLED_DIR = Path(__file__).resolve().parent / "data"
+REFERENCE_DIR = os.environ.get("CBAM_QUEST_REFERENCE_DIR")
+
+
+def _column(values):
+    """Float array if every non-empty value parses as a number, else a string array"""
+    try:
+        return np.array([float(value) if value != "" else np.nan for value in values])
+    except ValueError:
+        return np.array(values, dtype=str)
+
+
+def read_csv(path, text_columns=()):
+    """Dict of column -> array from a small CSV file; ``text_columns`` are never parsed as numbers"""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = list(reader)
+    return {
+        name: np.array([row[i] for row in rows], dtype=str) if name in text_columns
+        else _column([row[i] for row in rows])
+        for i, name in enumerate(header)
+    }
+
+
+def read_arrow(path):
+    """Dict of column -> array from a memory-mapped Arrow IPC file"""
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("Reading Arrow reference data requires pyarrow: pip install pyarrow") from e
+    table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    return {
+        name: column.combine_chunks().to_numpy(zero_copy_only=False)
+        for name, column in zip(table.column_names, table.columns)
+    }
+
+
+def _array_nbytes(array):
+    if array.dtype == object:
+        return array.nbytes + sum(sys.getsizeof(value) for value in array)
+    return array.nbytes
+
+
+class ReferenceTable(Mapping):
+    """Read-only columns of one dataset, all of the same length"""
+
+    def __init__(self, name, columns, source=None):
+        self.name = name
+        self.source = source
+        self._columns = {}
+        for column, values in columns.items():
+            array = np.asarray(values)
+            array.flags.writeable = False
+            self._columns[column] = array
+        lengths = {len(array) for array in self._columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Reference dataset {name!r} has columns of different lengths")
+
+    def __getitem__(self, column):
+        return self._columns[column]
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+    @property
+    def rows(self):
+        return len(next(iter(self._columns.values()), ()))
+
+    @property
+    def nbytes(self):
+        return sum(_array_nbytes(array) for array in self._columns.values())
+
+
+class ReferenceRegistry:
+    """Named datasets, each loaded on first use and shared by every caller"""
+
+    def __init__(self, directory=REFERENCE_DIR, bundled_dir=BUNDLED_DIR):
+        self.directory = Path(directory) if directory else None
+        self.bundled_dir = Path(bundled_dir)
+        self._loaders = {}
+        self._tables = {}
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def register(self, name, loader=None, text_columns=()):
+        """Register a dataset; ``loader()`` returns (columns dict, source), default: its file"""
+        self._loaders[name] = loader or (lambda: self._load_file(name, text_columns))
+        return name
+
+    def _load_file(self, name, text_columns=()):
+        for directory in (self.directory, self.bundled_dir):
+            if directory is None:
+                continue
+            path = directory / f"{name}.arrow"
+            if path.exists():
+                return read_arrow(path), str(path)
+            path = directory / f"{name}.csv"
+            if path.exists():
+                return read_csv(path, text_columns), str(path)
+        raise FileNotFoundError(f"No file for reference dataset {name!r}")
+
+    def _load(self, name):
+        columns, source = self._loaders[name]()
+        return ReferenceTable(name, columns, source)
+
+    def get(self, name):
+        """The shared, read-only table for ``name``"""
+        table = self._tables.get(name)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(name)
+                if table is None:
+                    table = self._tables[name] = self._load(name)
+        return table
+
+    def load_all(self):
+        """Load every registered dataset that isn't loaded yet"""
+        for name in self._loaders:
+            self.get(name)
+
+    def reload(self, name=None):
+        """Reload one dataset (every loaded one if None) and drop figures built from the old data
+
+        ``version`` counts reloads, so callers caching anything derived from
+        the tables can tell when to rebuild it.
+        """
+        with self._lock:
+            names = [name] if name is not None else list(self._tables)
+            fresh = {name: self._load(name) for name in names}
+            self._tables.update(fresh)
+            self.version += 1
+        figure_cache.clear()
+        return list(fresh)
+
+    def memory_usage(self):
+        """Bytes held by each loaded dataset"""
+        return {name: table.nbytes for name, table in self._tables.items()}
+
+    @property
+    def names(self):
+        return sorted(self._loaders)
+
+
+registry = ReferenceRegistry()
+REGIONS = registry.register("regions")
+MATERIAL_COMPONENTS = registry.register("material_components")
+INDUSTRY_BENCHMARKS = registry.register(
+    "industry_benchmarks", text_columns=("category", "peer_metric", "direction")
+)
+EMISSION_FACTORS = registry.register("emission_factors", text_columns=("cn_code", "origin"))
+CN_PRECURSORS = registry.register("cn_precursors", text_columns=("cn_code", "precursor_cn_code"))
+MATERIAL_FACTORS = registry.register("material_factors", text_columns=("material",))
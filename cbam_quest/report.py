@@ -0,0 +1,211 @@
+"""Quarterly CBAM report generation.
+
+Declaration lines stream through in chunks: each chunk is filtered to the
+reporting quarter, priced with the embedded-emissions engine and reduced to
+partial sums per reported goods entry (CN code, origin, supplier and whether
+supplier or default values were used). The XML report and its CSV twin are
+then written entry by entry straight to the file, without building a
+document tree, so memory depends on the number of goods entries, never on
+the number of lines. Per-line results can also be streamed to a CSV as each
+chunk is processed.
+
+The XML layout follows the structure of the transitional-period quarterly
+report (reporting period, declarant, imported goods with their embedded
+emissions); it is not validated against the Commission's XSD.
+
+    python -m cbam_quest.report declarations.parquet --quarter 2026Q1 --eori DE123456789012
+"""
+import argparse
+import os
+import sys
+import uuid
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from cbam_quest import embedded
+
+NAMESPACE = "urn:cbam-quest:quarterly-report:1"
+IMPORT_DATE_COLUMN = "import_date"
+SUPPLIER_COLUMN = "supplier_id"
+GOODS_FIELDS = ("cn_code", "origin", "supplier_id", "method")
+SUM_FIELDS = (
+    "lines",
+    "mass_tonnes",
+    "direct_emissions",
+    "indirect_emissions",
+    "precursor_emissions",
+    "embedded_emissions",
+)
+COMPACT_ROWS = 100_000
+
+
+def quarter_bounds(quarter):
+    """(first day, first day of the next quarter) for a label like ``2026Q1``"""
+    period = pd.Period(quarter, freq="Q")
+    return period.start_time, (period + 1).start_time
+
+
+def _goods_partial(chunk, results):
+    """Partial sums per goods entry for one chunk of lines"""
+    columns = embedded.DEFAULT_COLUMNS
+    frame = pd.DataFrame({
+        "cn_code": chunk[columns["cn_code"]].astype(str).str.strip(),
+        "origin": chunk[columns["origin"]].astype(str).str.strip(),
+        "supplier_id": chunk[SUPPLIER_COLUMN].fillna("").astype(str)
+        if SUPPLIER_COLUMN in chunk else "",
+        "method": np.where(results["supplier_specific"], "actual", "default"),
+        "lines": 1,
+        "mass_tonnes": chunk[columns["mass"]].to_numpy(dtype=np.float64),
+        **{field: results[field].to_numpy() for field in SUM_FIELDS[2:]},
+    })
+    return frame.groupby(list(GOODS_FIELDS), sort=False)[list(SUM_FIELDS)].sum()
+
+
+def _combine(partials):
+    return pd.concat(partials).groupby(level=list(GOODS_FIELDS), sort=False).sum()
+
+
+def aggregate_goods(path, quarter, chunk_rows=embedded.CHUNK_ROWS, lines_path=None):
+    """Goods entries for ``quarter`` from a declaration file, and the line count.
+
+    Lines without an ``import_date`` column are all taken to be in the quarter.
+    With ``lines_path`` every line's results are appended to that CSV as well.
+    """
+    start, end = quarter_bounds(quarter)
+    partials, pending_rows, lines = [], 0, 0
+    for chunk in embedded.iter_declaration_chunks(path, chunk_rows):
+        if IMPORT_DATE_COLUMN in chunk:
+            dates = pd.to_datetime(chunk[IMPORT_DATE_COLUMN])
+            chunk = chunk[(dates >= start) & (dates < end)]
+        if chunk.empty:
+            continue
+        results = embedded.calculate(chunk)
+        if lines_path is not None:
+            pd.concat([chunk, results], axis=1).to_csv(
+                lines_path, mode="a" if lines else "w", header=not lines, index=False
+            )
+        lines += len(chunk)
+
+        partial = _goods_partial(chunk, results)
+        partials.append(partial)
+        pending_rows += len(partial)
+        # Fold the partial sums together once they outgrow a chunk, bounding memory
+        if pending_rows > COMPACT_ROWS and len(partials) > 1:
+            partials = [_combine(partials)]
+            pending_rows = len(partials[0])
+
+    if not partials:
+        index = pd.MultiIndex.from_arrays([[]] * len(GOODS_FIELDS), names=list(GOODS_FIELDS))
+        return pd.DataFrame(columns=list(SUM_FIELDS), index=index, dtype="float64"), 0
+    return _combine(partials).sort_index(), lines
+
+
+GOODS_TEMPLATE = """  <ImportedGoods>
+    <ItemNumber>{item}</ItemNumber>
+    <CommodityCode>{cn_code}</CommodityCode>
+    <CountryOfOrigin>{origin}</CountryOfOrigin>
+{supplier}    <DeterminationMethod>{method}</DeterminationMethod>
+    <DeclarationLines>{lines}</DeclarationLines>
+    <NetMass unit="t">{mass:.3f}</NetMass>
+    <EmbeddedEmissions unit="tCO2e">
+      <Direct>{direct:.3f}</Direct>
+      <Indirect>{indirect:.3f}</Indirect>
+      <Precursors>{precursor:.3f}</Precursors>
+      <Total>{embedded:.3f}</Total>
+    </EmbeddedEmissions>
+    <SpecificEmbeddedEmissions unit="tCO2e/t">{specific:.4f}</SpecificEmbeddedEmissions>
+  </ImportedGoods>
+"""
+
+
+def write_xml(path, goods, quarter, declarant_name, eori, report_id=None):
+    """Write the quarterly report XML, one goods entry at a time"""
+    period = pd.Period(quarter, freq="Q")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"""<?xml version="1.0" encoding="utf-8"?>
+<QReport xmlns="{NAMESPACE}">
+  <ReportId>{escape(str(report_id or uuid.uuid4()))}</ReportId>
+  <ReportingPeriod>
+    <Year>{period.year}</Year>
+    <Quarter>Q{period.quarter}</Quarter>
+  </ReportingPeriod>
+  <Declarant>
+    <Name>{escape(declarant_name)}</Name>
+    <EORI>{escape(eori)}</EORI>
+  </Declarant>
+  <TotalImportedGoods>{len(goods)}</TotalImportedGoods>
+  <TotalNetMass unit="t">{goods["mass_tonnes"].sum():.3f}</TotalNetMass>
+  <TotalEmbeddedEmissions unit="tCO2e">{goods["embedded_emissions"].sum():.3f}</TotalEmbeddedEmissions>
+""")
+        # Numbers need no escaping, so each entry is one formatted write
+        for item, row in enumerate(goods.reset_index().itertuples(index=False), start=1):
+            f.write(GOODS_TEMPLATE.format(
+                item=item,
+                cn_code=escape(row.cn_code),
+                origin=escape(row.origin),
+                supplier=f"    <SupplierId>{escape(row.supplier_id)}</SupplierId>\n" if row.supplier_id else "",
+                method=row.method,
+                lines=int(row.lines),
+                mass=row.mass_tonnes,
+                direct=row.direct_emissions,
+                indirect=row.indirect_emissions,
+                precursor=row.precursor_emissions,
+                embedded=row.embedded_emissions,
+                specific=row.embedded_emissions / row.mass_tonnes if row.mass_tonnes else 0.0,
+            ))
+        f.write("</QReport>\n")
+
+
+def write_csv(path, goods):
+    """Write the goods entries as CSV, with specific embedded emissions per tonne"""
+    table = goods.reset_index()
+    mass = table["mass_tonnes"].where(table["mass_tonnes"] > 0)
+    table["specific_embedded_emissions"] = (table["embedded_emissions"] / mass).fillna(0.0)
+    table.to_csv(path, index=False, float_format="%.6f")
+
+
+def _atomic(path, write, *args):
+    tmp = path.with_name(f".{path.name}.tmp")
+    write(tmp, *args)
+    os.replace(tmp, path)
+
+
+def generate_report(path, quarter, output_dir, declarant_name="", eori="",
+                    chunk_rows=embedded.CHUNK_ROWS, include_lines=False):
+    """Write ``cbam_report_<quarter>.xml`` and ``.csv`` into ``output_dir``; returns their paths and line count"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stem = f"cbam_report_{pd.Period(quarter, freq='Q')}"
+    lines_path = output_dir / f"{stem}_lines.csv" if include_lines else None
+
+    goods, lines = aggregate_goods(path, quarter, chunk_rows, lines_path)
+    xml_path, csv_path = output_dir / f"{stem}.xml", output_dir / f"{stem}.csv"
+    _atomic(xml_path, write_xml, goods, quarter, declarant_name, eori)
+    _atomic(csv_path, write_csv, goods)
+    return xml_path, csv_path, lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the quarterly CBAM report")
+    parser.add_argument("input", type=Path, help="declaration lines (.csv or .parquet)")
+    parser.add_argument("--quarter", required=True, help="reporting quarter, e.g. 2026Q1")
+    parser.add_argument("--output-dir", type=Path, default=Path("reports"))
+    parser.add_argument("--declarant-name", default="")
+    parser.add_argument("--eori", default="")
+    parser.add_argument("--chunk-rows", type=int, default=embedded.CHUNK_ROWS)
+    parser.add_argument("--lines", action="store_true", help="also write per-line results")
+    args = parser.parse_args(argv)
+
+    xml_path, csv_path, lines = generate_report(
+        args.input, args.quarter, args.output_dir, args.declarant_name, args.eori,
+        args.chunk_rows, args.lines,
+    )
+    print(f"{lines:,} declaration lines reported to {xml_path} and {csv_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""Roadmap phase planning for the decarbonization roadmap card."""
+from cbam_quest.engine import BASELINE_EMISSIONS
+
+# (label, first year, last year) over the CBAM horizon
+PHASES = (
+    ("PHASE 1", 2026, 2027),
+    ("PHASE 2", 2028, 2029),
+    ("PHASE 3", 2030, 2031),
+    ("TARGET", 2032, 2034),
+)
+
+PHASE_ACTIONS = {
+    "PHASE 1": "Optimize transportation logistics and certify suppliers",
+    "PHASE 2": "Implement AI-driven process control across facilities",
+    "PHASE 3": "Deploy advanced metal recovery technologies",
+    "TARGET": "Implement circular economy business model",
+}
+
+
+def generate_roadmap_phases(recycled_content, renewable_energy, process_efficiency,
+                            carbon_price=90, baseline_emissions=BASELINE_EMISSIONS,
+                            trajectory=None):
+    """Generate roadmap phases from the simulated yearly trajectory
+
+    Pass the single-scenario ``trajectory`` the caller already simulated to
+    avoid running it again; otherwise it is simulated from the arguments.
+    """
+    if trajectory is None:
+        # Imported here so the package stays cheap to import without NumPy
+        from cbam_quest.trajectory import simulate
+        trajectory = simulate(
+            recycled_content, renewable_energy, process_efficiency, carbon_price, baseline_emissions
+        )
+
+    years = [int(year) for year in trajectory.years]
+    phases = {}
+    for label, first, last in PHASES:
+        start, end = years.index(first), years.index(last)
+        emissions = float(trajectory.emissions[end])
+        baseline = float(trajectory.baseline_emissions[end])
+        reduction = (1 - emissions / baseline) * 100 if baseline else 0
+        fees = float(trajectory.fees[start:end + 1].sum())
+        phases[f"{label} ({first}-{last})"] = [
+            f"Reach {trajectory.recycled_content[end]:.0f}% recycled content, "
+            f"{trajectory.renewable_energy[end]:.0f}% renewable energy and "
+            f"{trajectory.process_efficiency[end]:.0f}% process efficiency",
+            f"Cut emissions to {emissions:,.0f} tCO₂e ({reduction:.0f}% below baseline)",
+            f"CBAM covers {trajectory.cbam_share[end] * 100:.1f}% of embedded emissions by {last}; "
+            f"€{fees:.1f}M in fees over the phase",
+            PHASE_ACTIONS[label],
+        ]
+
+    return phases
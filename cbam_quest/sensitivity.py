@@ -0,0 +1,122 @@
+"""Sensitivity of CBAM fees and net savings to the levers and carbon price.
+
+Two views are computed around a slider setting, each with a single batched
+call to the engine formulas:
+
+* a tornado, moving one factor at a time to the low and high end of its
+  range while the others stay at the current setting;
+* variance-based Sobol indices from Saltelli sampling. Two independent
+  uniform sample matrices ``A`` and ``B`` plus one ``AB_i`` matrix per factor
+  (``A`` with column ``i`` taken from ``B``) are stacked into one
+  ``(factors + 2, samples, factors)`` array. First-order indices use the
+  Saltelli (2010) estimator and total-order indices the Jansen estimator.
+
+Factors are sampled within ``LEVER_SPREAD`` points and ``PRICE_SPREAD`` €/t of
+the current setting, clipped to the slider domains, so the indices answer
+"which input moves the result most from where the plan stands".
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from cbam_quest import engine
+
+FACTORS = ("recycled_content", "renewable_energy", "process_efficiency", "carbon_price")
+OUTPUTS = ("projected_fees", "net_savings")
+LEVER_SPREAD = 20  # ± lever percentage points
+PRICE_SPREAD = 25  # ± €/tCO2e
+DEFAULT_SAMPLES = 2 ** 17  # Base samples; the model is evaluated (factors + 2) times as often
+
+Sensitivity = namedtuple(
+    "Sensitivity",
+    ["output", "base", "low", "high", "first_order", "total_order", "samples"],
+)
+
+
+def factor_bounds(recycled_content, renewable_energy, process_efficiency, carbon_price,
+                  lever_spread=LEVER_SPREAD, price_spread=PRICE_SPREAD):
+    """(factors, 2) array of [low, high] bounds around a setting, clipped to the slider domains"""
+    levers = engine.LEVER_LEVELS
+    prices = engine.CARBON_PRICE_LEVELS
+    center = np.array(
+        [recycled_content, renewable_energy, process_efficiency, carbon_price], dtype=float
+    )
+    spread = np.array([lever_spread] * 3 + [price_spread], dtype=float)
+    lower = np.array([levers[0]] * 3 + [prices[0]], dtype=float)
+    upper = np.array([levers[-1]] * 3 + [prices[-1]], dtype=float)
+    return np.stack([
+        np.clip(center - spread, lower, upper),
+        np.clip(center + spread, lower, upper),
+    ], axis=1)
+
+
+def _evaluate(points, baseline_emissions):
+    """Engine outputs for an array of points whose last axis is FACTORS"""
+    return engine.evaluate(*np.moveaxis(points, -1, 0), baseline_emissions)
+
+
+def tornado(center, bounds, baseline_emissions=engine.BASELINE_EMISSIONS):
+    """One-at-a-time swings: dict of output -> (base, low (factors,), high (factors,))"""
+    k = len(center)
+    # Row 0 is the base point; rows 1..k move one factor low, rows k+1..2k move it high
+    points = np.tile(np.asarray(center, dtype=float), (2 * k + 1, 1))
+    points[1 + np.arange(k), np.arange(k)] = bounds[:, 0]
+    points[1 + k + np.arange(k), np.arange(k)] = bounds[:, 1]
+
+    results = _evaluate(points, baseline_emissions)
+    swings = {}
+    for output in OUTPUTS:
+        y = np.broadcast_to(getattr(results, output), (2 * k + 1,))
+        swings[output] = (float(y[0]), y[1:k + 1], y[k + 1:])
+    return swings
+
+
+def sobol_indices(bounds, baseline_emissions=engine.BASELINE_EMISSIONS,
+                  samples=DEFAULT_SAMPLES, seed=0):
+    """First- and total-order Sobol indices: dict of output -> (first (factors,), total (factors,))"""
+    k = len(bounds)
+    rng = np.random.default_rng(seed)
+    a, b = rng.uniform(bounds[:, 0], bounds[:, 1], size=(2, samples, k))
+
+    # AB_i is A with column i replaced by B's
+    ab = np.where(np.eye(k, dtype=bool)[:, None, :], b, a)
+    results = _evaluate(np.concatenate([a[None], b[None], ab]), baseline_emissions)
+
+    indices = {}
+    for output in OUTPUTS:
+        y = np.broadcast_to(getattr(results, output), (k + 2, samples))
+        f_a, f_b, f_ab = y[0], y[1], y[2:]
+        variance = np.var(y[:2])
+        if variance == 0:
+            indices[output] = (np.zeros(k), np.zeros(k))
+            continue
+        first = np.mean(f_b * (f_ab - f_a), axis=1) / variance
+        total = 0.5 * np.mean((f_a - f_ab) ** 2, axis=1) / variance
+        indices[output] = (first, total)
+    return indices
+
+
+def analyze(recycled_content, renewable_energy, process_efficiency, carbon_price,
+            baseline_emissions=engine.BASELINE_EMISSIONS, samples=DEFAULT_SAMPLES, seed=0,
+            lever_spread=LEVER_SPREAD, price_spread=PRICE_SPREAD):
+    """Tornado swings and Sobol indices for every output, as a dict of output -> Sensitivity"""
+    center = (recycled_content, renewable_energy, process_efficiency, carbon_price)
+    bounds = factor_bounds(*center, lever_spread=lever_spread, price_spread=price_spread)
+    swings = tornado(center, bounds, baseline_emissions)
+    indices = sobol_indices(bounds, baseline_emissions, samples, seed)
+
+    def floats(values):
+        return tuple(float(v) for v in values)
+
+    return {
+        output: Sensitivity(
+            output=output,
+            base=swings[output][0],
+            low=floats(swings[output][1]),
+            high=floats(swings[output][2]),
+            first_order=floats(indices[output][0]),
+            total_order=floats(indices[output][1]),
+            samples=samples * (len(FACTORS) + 2),
+        )
+        for output in OUTPUTS
+    }
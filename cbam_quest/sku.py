@@ -0,0 +1,355 @@
+"""Per-SKU can footprints from a columnar bill of materials.
+
+A bill of materials has one row per SKU and material: the SKU code, the
+material (an alloy, coating or ink listed in the ``material_factors``
+reference dataset), its mass in grams per can and, for aluminium, the
+recycled share (0-1). A line's emissions are its mass times the blend of
+the material's primary and recycled factors (kg CO2e per kg, so grams per
+gram), and a SKU's footprint is the sum of its lines: one gather and one
+``bincount`` for every SKU at once.
+
+Line emissions and SKU totals are kept between updates. New factors for a
+material only touch the lines that use it, and the SKU totals move by the
+difference; replacing some SKUs' rows only recomputes those SKUs, found by
+comparing a content hash per SKU.
+
+    python -m cbam_quest.sku bom.parquet --top 20 --search 330ML
+"""
+import argparse
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cbam_quest.reference import MATERIAL_FACTORS, registry
+
+# Logical field -> column name in the bill-of-materials files; recycled_share is optional
+DEFAULT_COLUMNS = {
+    "sku": "sku",
+    "material": "material",
+    "mass": "mass_g",
+    "recycled_share": "recycled_share",
+}
+RESULT_COLUMNS = ("footprint_g", "mass_g", "recycled_share", "missing_factor")
+SEARCH_LIMIT = 50
+
+
+def read_bom(path, columns=DEFAULT_COLUMNS):
+    """Bill-of-materials rows from a CSV or Parquet file, reading only the mapped columns"""
+    path = Path(path)
+    if path.suffix.lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+        names = set(pq.ParquetFile(path).schema_arrow.names)
+        fields = [field for field in DEFAULT_COLUMNS if columns[field] in names]
+        frame = pq.read_table(path, columns=[columns[field] for field in fields]).to_pandas()
+    else:
+        names = set(pd.read_csv(path, nrows=0).columns)
+        fields = [field for field in DEFAULT_COLUMNS if columns[field] in names]
+        frame = pd.read_csv(path, usecols=[columns[field] for field in fields],
+                            dtype={columns["sku"]: str, columns["material"]: str})
+    return frame
+
+
+def _normalize(bom, columns):
+    """(sku, material, mass, recycled share) arrays from bill-of-materials rows"""
+    recycled = (bom[columns["recycled_share"]].to_numpy(dtype=np.float64, na_value=0.0)
+                if columns["recycled_share"] in bom else np.zeros(len(bom)))
+    return (
+        bom[columns["sku"]].astype(str).to_numpy(dtype=object),
+        bom[columns["material"]].astype(str).to_numpy(dtype=object),
+        bom[columns["mass"]].to_numpy(dtype=np.float64, na_value=np.nan),
+        np.clip(recycled, 0, 1),
+    )
+
+
+def _grouped_sum(codes, values, groups):
+    """Per-group wrapping sum of uint64 ``values`` (bincount only sums floats)"""
+    order = np.argsort(codes, kind="stable")
+    starts = np.searchsorted(codes[order], np.arange(groups))
+    return np.add.reduceat(values[order], starts) if len(values) else np.zeros(groups, dtype=np.uint64)
+
+
+class SkuFootprints:
+    """Footprint of every SKU in a bill of materials, updated in place"""
+
+    def __init__(self, factors=None):
+        self._lock = threading.Lock()
+        self.version = 0
+        self.skus = pd.Index([], dtype=object)
+        self.materials = pd.Index([], dtype=object)
+        # Factors of each bill-of-materials material (NaN when not listed)
+        self._material_primary = np.empty(0)
+        self._material_recycled = np.empty(0)
+        # One entry per bill-of-materials line
+        self._line_sku = np.empty(0, dtype=np.int64)
+        self._line_material = np.empty(0, dtype=np.int64)
+        self._line_mass = np.empty(0)
+        self._line_recycled = np.empty(0)
+        self._line_emissions = np.empty(0)
+        self._material_order = None
+        # One entry per SKU
+        self._sku_hash = np.empty(0, dtype=np.uint64)
+        self._footprint = np.empty(0)
+        self._mass = np.empty(0)
+        self._recycled_mass = np.empty(0)
+        self._missing = np.empty(0, dtype=np.int64)
+        self._search_keys = None
+
+        self._factors = None
+        self._factor_index = pd.Index([], dtype=object)
+        self._factor_primary = np.empty(0)
+        self._factor_recycled = np.empty(0)
+        self.set_factors(factors)
+
+    # Factors
+
+    def _factors_for(self, materials):
+        """(primary, recycled) factors for material names, NaN where not listed"""
+        positions = self._factor_index.get_indexer(materials)
+        primary = np.append(self._factor_primary, np.nan)[positions]
+        recycled = np.append(self._factor_recycled, np.nan)[positions]
+        return primary, recycled
+
+    def _emissions(self, material, mass, recycled):
+        """Grams of CO2e per line; 0 for lines whose material has no factors"""
+        blend = (self._material_primary[material] * (1 - recycled)
+                 + self._material_recycled[material] * recycled)
+        return np.nan_to_num(mass * blend, nan=0.0)
+
+    def _missing_lines(self, material):
+        return np.isnan(self._material_primary[material]) | np.isnan(self._material_recycled[material])
+
+    def _lines_of_materials(self, materials):
+        """Line indices using any of ``materials``, via the lines sorted by material"""
+        if self._material_order is None:
+            self._material_order = np.argsort(self._line_material, kind="stable")
+        ordered = self._line_material[self._material_order]
+        starts = np.searchsorted(ordered, materials, side="left")
+        ends = np.searchsorted(ordered, materials, side="right")
+        if not len(materials):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self._material_order[s:e] for s, e in zip(starts, ends)])
+
+    def set_factors(self, factors=None):
+        """Use new material factors (default: the reference dataset); returns the SKUs that changed"""
+        factors = registry.get(MATERIAL_FACTORS) if factors is None else factors
+        with self._lock:
+            if factors is self._factors:
+                return 0
+            self._factors = factors
+            self._factor_index = pd.Index(np.asarray(factors["material"], dtype=object))
+            self._factor_primary = np.asarray(factors["primary"], dtype=np.float64)
+            self._factor_recycled = np.asarray(factors["recycled"], dtype=np.float64)
+
+            primary, recycled = self._factors_for(self.materials)
+            changed = np.flatnonzero(
+                ~((primary == self._material_primary) | (np.isnan(primary) & np.isnan(self._material_primary)))
+                | ~((recycled == self._material_recycled) | (np.isnan(recycled) & np.isnan(self._material_recycled)))
+            )
+            if not len(changed):
+                return 0
+            lines = self._lines_of_materials(changed)
+            old_emissions = self._line_emissions[lines]
+            old_missing = self._missing_lines(self._line_material[lines])
+            self._material_primary, self._material_recycled = primary, recycled
+
+            material = self._line_material[lines]
+            new_emissions = self._emissions(material, self._line_mass[lines], self._line_recycled[lines])
+            new_missing = self._missing_lines(material)
+            self._line_emissions[lines] = new_emissions
+            skus = self._line_sku[lines]
+            self._footprint += np.bincount(skus, weights=new_emissions - old_emissions, minlength=len(self.skus))
+            self._missing += np.bincount(
+                skus, weights=new_missing.astype(np.int64) - old_missing, minlength=len(self.skus)
+            ).astype(np.int64)
+            self.version += 1
+            return len(np.unique(skus))
+
+    # Bill of materials
+
+    def update_bom(self, bom, replace=False, columns=DEFAULT_COLUMNS):
+        """Apply bill-of-materials rows; returns the number of SKUs recomputed.
+
+        Every SKU in ``bom`` is replaced by its rows there; SKUs whose rows
+        are unchanged keep their totals. With ``replace`` the rows are the
+        whole bill of materials and SKUs missing from it are dropped.
+        """
+        sku, material, mass, recycled = _normalize(bom, {**DEFAULT_COLUMNS, **columns})
+        codes, skus = pd.factorize(sku)
+        skus = pd.Index(skus, dtype=object)
+        material_codes, material_names = pd.factorize(material)
+        # Content hash per row; materials are hashed once per distinct name
+        row_hash = (pd.util.hash_array(np.asarray(material_names, dtype=object))[material_codes]
+                    ^ pd.util.hash_array(mass) * np.uint64(0x9E3779B97F4A7C15)
+                    ^ pd.util.hash_array(recycled) * np.uint64(0xC2B2AE3D27D4EB4F))
+        sku_hash = _grouped_sum(codes, row_hash, len(skus))
+
+        with self._lock:
+            existing = self.skus.get_indexer(skus)
+            changed = (existing < 0) | (np.append(self._sku_hash, np.uint64(0))[existing] != sku_hash)
+            if replace:
+                kept = self.skus.get_indexer(skus[~changed])
+                final = skus
+            else:
+                unchanged = np.ones(len(self.skus), dtype=bool)
+                unchanged[existing[changed & (existing >= 0)]] = False
+                kept = np.flatnonzero(unchanged)
+                final = self.skus.append(skus[existing < 0])
+            if not changed.any() and len(kept) == len(self.skus):
+                return 0
+
+            # Carry over the unchanged SKUs' lines and totals
+            position = np.full(len(self.skus), -1)
+            position[kept] = final.get_indexer(self.skus[kept])
+            keep_lines = position[self._line_sku] >= 0
+
+            material_index = self.materials.append(pd.Index(material_names, dtype=object)).unique()
+            if len(material_index) > len(self.materials):
+                primary, recycled_factor = self._factors_for(material_index[len(self.materials):])
+                self._material_primary = np.append(self._material_primary, primary)
+                self._material_recycled = np.append(self._material_recycled, recycled_factor)
+                self.materials = material_index
+
+            new_rows = np.flatnonzero(changed[codes])
+            new_sku = final.get_indexer(skus)[codes[new_rows]]
+            new_material = self.materials.get_indexer(material_names)[material_codes[new_rows]]
+            new_mass, new_recycled = mass[new_rows], recycled[new_rows]
+            new_emissions = self._emissions(new_material, new_mass, new_recycled)
+
+            self._line_sku = np.concatenate([position[self._line_sku[keep_lines]], new_sku])
+            self._line_material = np.concatenate([self._line_material[keep_lines], new_material])
+            self._line_mass = np.concatenate([self._line_mass[keep_lines], new_mass])
+            self._line_recycled = np.concatenate([self._line_recycled[keep_lines], new_recycled])
+            self._line_emissions = np.concatenate([self._line_emissions[keep_lines], new_emissions])
+            self._material_order = None
+
+            def carried(values, dtype=np.float64):
+                result = np.zeros(len(final), dtype=dtype)
+                result[position[kept]] = values[kept]
+                return result
+
+            recomputed = final.get_indexer(skus[changed])
+            n = len(final)
+            footprint = carried(self._footprint)
+            footprint[recomputed] = np.bincount(new_sku, weights=new_emissions, minlength=n)[recomputed]
+            total_mass = carried(self._mass)
+            total_mass[recomputed] = np.bincount(new_sku, weights=np.nan_to_num(new_mass), minlength=n)[recomputed]
+            recycled_mass = carried(self._recycled_mass)
+            recycled_mass[recomputed] = np.bincount(
+                new_sku, weights=np.nan_to_num(new_mass * new_recycled), minlength=n)[recomputed]
+            missing = carried(self._missing, np.int64)
+            missing[recomputed] = np.bincount(
+                new_sku, weights=self._missing_lines(new_material), minlength=n).astype(np.int64)[recomputed]
+            hashes = carried(self._sku_hash, np.uint64)
+            hashes[recomputed] = sku_hash[changed]
+
+            self.skus = final
+            self._footprint, self._mass, self._recycled_mass = footprint, total_mass, recycled_mass
+            self._missing, self._sku_hash = missing, hashes
+            self._search_keys = None
+            self.version += 1
+            return int(changed.sum())
+
+    def load(self, path, columns=DEFAULT_COLUMNS):
+        """Replace the bill of materials with a file's rows; returns the number of SKUs recomputed"""
+        columns = {**DEFAULT_COLUMNS, **columns}
+        return self.update_bom(read_bom(path, columns), replace=True, columns=columns)
+
+    # Results
+
+    def _frame(self, rows):
+        mass = self._mass[rows]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            recycled_share = np.where(mass > 0, self._recycled_mass[rows] / mass, 0.0)
+        missing = self._missing[rows] > 0
+        return pd.DataFrame({
+            "footprint_g": np.where(missing, np.nan, self._footprint[rows]),
+            "mass_g": mass,
+            "recycled_share": recycled_share,
+            "missing_factor": missing,
+        }, index=pd.Index(self.skus[rows], name="sku"))
+
+    def results(self):
+        """Footprint (g CO2e per can), can mass and recycled share of every SKU"""
+        with self._lock:
+            return self._frame(np.arange(len(self.skus)))
+
+    def top(self, n=10, largest=True):
+        """The ``n`` SKUs with the largest (or smallest) footprints"""
+        with self._lock:
+            valid = np.flatnonzero(self._missing == 0)
+            footprint = self._footprint[valid] if largest else -self._footprint[valid]
+            n = min(n, len(valid))
+            if not n:
+                return self._frame(valid[:0])
+            best = np.argpartition(-footprint, n - 1)[:n]
+            best = best[np.argsort(-footprint[best], kind="stable")]
+            return self._frame(valid[best])
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """(up to ``limit`` SKUs whose code contains ``query``, largest footprint first; match count)
+
+        The match is case-insensitive.
+        """
+        with self._lock:
+            if self._search_keys is None:
+                self._search_keys = self.skus.str.lower()
+            matches = np.flatnonzero(self._search_keys.str.contains(query.lower(), regex=False))
+            footprint = np.nan_to_num(self._footprint[matches], nan=-np.inf)
+            matches = matches[np.argsort(-footprint, kind="stable")][:limit]
+            return self._frame(matches), int(len(footprint))
+
+    def summary(self):
+        """SKU count and footprint mean, minimum and maximum (g CO2e per can)"""
+        with self._lock:
+            footprint = self._footprint[self._missing == 0]
+            if not len(footprint):
+                return {"skus": len(self.skus), "mean": np.nan, "min": np.nan, "max": np.nan}
+            return {"skus": len(self.skus), "mean": float(footprint.mean()),
+                    "min": float(footprint.min()), "max": float(footprint.max())}
+
+
+class SkuFootprintFile:
+    """A bill-of-materials file kept in sync with its file and the reference factors"""
+
+    def __init__(self, path, columns=DEFAULT_COLUMNS):
+        self.path = Path(path)
+        self.columns = {**DEFAULT_COLUMNS, **columns}
+        self.footprints = SkuFootprints()
+        self._stat = None
+
+    def sync(self):
+        """Pick up reloaded factors and a changed file; returns the SKUs recomputed"""
+        recomputed = self.footprints.set_factors()
+        stat = self.path.stat()
+        stat = (stat.st_mtime_ns, stat.st_size)
+        if stat != self._stat:
+            recomputed += self.footprints.load(self.path, self.columns)
+            self._stat = stat
+        return recomputed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calculate the footprint of every SKU in a bill of materials")
+    parser.add_argument("path", type=Path, help="bill of materials (.csv or .parquet)")
+    parser.add_argument("--top", type=int, default=10, help="show the N largest footprints")
+    parser.add_argument("--search", help="show SKUs whose code contains this text")
+    parser.add_argument("--output", type=Path, help="write every SKU's results as CSV")
+    args = parser.parse_args(argv)
+
+    footprints = SkuFootprints()
+    footprints.load(args.path)
+    summary = footprints.summary()
+    print(f"{summary['skus']:,} SKUs, {summary['mean']:.1f} g CO2e per can on average "
+          f"({summary['min']:.1f} to {summary['max']:.1f})")
+    table = footprints.search(args.search)[0] if args.search else footprints.top(args.top)
+    print(table.to_string(float_format=lambda value: f"{value:.2f}"))
+    if args.output:
+        footprints.results().to_csv(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
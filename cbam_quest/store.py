@@ -0,0 +1,246 @@
+"""Local SQLite store of named scenarios.
+
+Each saved scenario keeps its dashboard inputs, where its carbon price came
+from, the engine outputs and its simulated 2026-2034 trajectory, so listing, loading and comparing scenarios
+never recomputes them. Target regions live in their own table so a region
+filter is an index lookup. Summary queries never touch the trajectory
+column, which holds the yearly arrays as zlib-compressed float32.
+
+    store = ScenarioStore()
+    scenario_id = store.save("Baseline 2026", carbon_price=90, target_regions=["Europe"],
+                             recycled_content=60, renewable_energy=40, process_efficiency=50)
+    store.list(region="Europe", min_price=80)
+"""
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from cbam_quest import engine, trajectory
+
+DEFAULT_PATH = Path(os.environ.get(
+    "CBAM_QUEST_STORE",
+    Path(__file__).resolve().parent.parent / ".cache" / "scenarios.sqlite",
+))
+SCHEMA_VERSION = 2
+TRAJECTORY_FIELDS = ("carbon_price", "emissions", "baseline_fees", "fees", "net_savings")
+INPUT_FIELDS = ("carbon_price", "recycled_content", "renewable_energy", "process_efficiency",
+                "baseline_emissions")
+OUTPUT_FIELDS = ("footprint", "implementation_cost", "projected_fees", "net_savings",
+                 "fee_reduction", "total_fees")
+SUMMARY_COLUMNS = ("id", "name", "created_at", *INPUT_FIELDS, *OUTPUT_FIELDS, "price_source")
+# Where a scenario's carbon price came from: the manual slider or the auction history
+MANUAL, AUCTION = "manual", "auction"
+DEFAULTS = {
+    "carbon_price": 90,
+    "recycled_content": 60,
+    "renewable_energy": 40,
+    "process_efficiency": 50,
+    "baseline_emissions": engine.BASELINE_EMISSIONS,
+}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    {", ".join(f"{field} REAL NOT NULL" for field in INPUT_FIELDS + OUTPUT_FIELDS)},
+    price_source TEXT NOT NULL DEFAULT '{MANUAL}',
+    trajectory BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scenario_regions (
+    scenario_id INTEGER NOT NULL REFERENCES scenarios(id) ON DELETE CASCADE,
+    region TEXT NOT NULL,
+    PRIMARY KEY (region, scenario_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS scenarios_carbon_price ON scenarios (carbon_price);
+CREATE INDEX IF NOT EXISTS scenarios_created_at ON scenarios (created_at);
+CREATE INDEX IF NOT EXISTS scenario_regions_scenario ON scenario_regions (scenario_id);
+"""
+
+SavedScenario = namedtuple("SavedScenario", [*SUMMARY_COLUMNS, "regions", "trajectory"])
+
+
+def encode_trajectory(rows):
+    """Compress one scenario's ``(TRAJECTORY_FIELDS, years)`` array into a blob"""
+    return zlib.compress(np.ascontiguousarray(rows, dtype=np.float32).tobytes())
+
+
+def decode_trajectory(blob):
+    """Dict of field -> yearly array, plus ``years``, from a stored blob"""
+    rows = np.frombuffer(zlib.decompress(blob), dtype=np.float32).reshape(len(TRAJECTORY_FIELDS), -1)
+    return {"years": trajectory.YEARS, **dict(zip(TRAJECTORY_FIELDS, rows))}
+
+
+class ScenarioStore:
+    """Thread-safe handle on a scenario database, shared across Streamlit sessions"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, 1, SCHEMA_VERSION):
+            raise RuntimeError(f"{self.path} has schema version {version}, expected {SCHEMA_VERSION}")
+        with self._db:
+            if version == 1:
+                # Scenarios saved before price sources were recorded all came from the slider
+                self._db.execute(f"ALTER TABLE scenarios ADD COLUMN price_source TEXT NOT NULL DEFAULT '{MANUAL}'")
+            self._db.executescript(SCHEMA)
+            self._db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def save(self, name, carbon_price=DEFAULTS["carbon_price"], target_regions=(),
+             recycled_content=DEFAULTS["recycled_content"],
+             renewable_energy=DEFAULTS["renewable_energy"],
+             process_efficiency=DEFAULTS["process_efficiency"],
+             baseline_emissions=DEFAULTS["baseline_emissions"],
+             carbon_prices=None, price_source=MANUAL):
+        """Evaluate and store one scenario; returns its id
+
+        ``carbon_prices`` is the yearly price path the trajectory is simulated
+        on, by default ``carbon_price`` compounding as in ``trajectory.price_path``.
+        """
+        return self.save_many([{
+            "name": name,
+            "carbon_price": carbon_price,
+            "target_regions": target_regions,
+            "recycled_content": recycled_content,
+            "renewable_energy": renewable_energy,
+            "process_efficiency": process_efficiency,
+            "baseline_emissions": baseline_emissions,
+            "carbon_prices": carbon_prices,
+            "price_source": price_source,
+        }])[0]
+
+    def save_many(self, scenarios):
+        """Evaluate a list of scenario dicts in one batch and store them; returns their ids"""
+        if not scenarios:
+            return []
+        inputs = {
+            field: np.array([scenario.get(field, DEFAULTS[field]) for scenario in scenarios],
+                            dtype=np.float64)
+            for field in INPUT_FIELDS
+        }
+        results = engine.evaluate(**inputs)
+        # Each scenario's own price path, or its price compounding from the first year
+        carbon_prices = trajectory.price_path(inputs["carbon_price"])
+        for i, scenario in enumerate(scenarios):
+            if scenario.get("carbon_prices") is not None:
+                carbon_prices[i] = scenario["carbon_prices"]
+        paths = trajectory.simulate(**inputs, carbon_prices=carbon_prices)
+        outputs = {field: np.broadcast_to(getattr(results, field), len(scenarios))
+                   for field in OUTPUT_FIELDS[:-1]}
+        outputs["total_fees"] = paths.fees.sum(axis=1)
+        # (scenarios, TRAJECTORY_FIELDS, years)
+        yearly = np.stack([getattr(paths, field) for field in TRAJECTORY_FIELDS], axis=1)
+
+        created_at = time.time()
+        ids = []
+        with self._lock, self._db:
+            for i, scenario in enumerate(scenarios):
+                row = [scenario["name"], created_at]
+                row += [float(inputs[field][i]) for field in INPUT_FIELDS]
+                row += [float(outputs[field][i]) for field in OUTPUT_FIELDS]
+                row.append(scenario.get("price_source") or MANUAL)
+                row.append(encode_trajectory(yearly[i]))
+                cursor = self._db.execute(
+                    f"INSERT INTO scenarios ({', '.join(SUMMARY_COLUMNS[1:])}, trajectory) "
+                    f"VALUES ({', '.join('?' * (len(SUMMARY_COLUMNS)))})",
+                    row,
+                )
+                ids.append(cursor.lastrowid)
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO scenario_regions (scenario_id, region) VALUES (?, ?)",
+                    [(cursor.lastrowid, region) for region in scenario.get("target_regions") or ()],
+                )
+        return ids
+
+    def _regions(self, ids):
+        regions = {scenario_id: [] for scenario_id in ids}
+        if ids:
+            rows = self._db.execute(
+                f"SELECT scenario_id, region FROM scenario_regions "
+                f"WHERE scenario_id IN ({', '.join('?' * len(ids))}) ORDER BY region",
+                list(ids),
+            )
+            for scenario_id, region in rows:
+                regions[scenario_id].append(region)
+        return regions
+
+    def list(self, region=None, min_price=None, max_price=None, since=None, until=None,
+             limit=100, offset=0):
+        """Newest scenarios first, without trajectories, optionally filtered.
+
+        ``since`` and ``until`` bound the creation time (Unix seconds). Ids
+        grow with creation time, so results are walked newest first straight
+        off the region or primary key index instead of being sorted.
+        """
+        columns = ", ".join(f"s.{column}" for column in SUMMARY_COLUMNS)
+        where, params = [], []
+        if region is not None:
+            query = (f"SELECT {columns} FROM scenario_regions r "
+                     f"JOIN scenarios s ON s.id = r.scenario_id")
+            where.append("r.region = ?")
+            params.append(region)
+            order = "r.scenario_id DESC"
+        else:
+            query = f"SELECT {columns} FROM scenarios s"
+            order = "s.id DESC"
+        for condition, value in (("s.carbon_price >= ?", min_price), ("s.carbon_price <= ?", max_price),
+                                 ("s.created_at >= ?", since), ("s.created_at <= ?", until)):
+            if value is not None:
+                where.append(condition)
+                params.append(value)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += f" ORDER BY {order} LIMIT ? OFFSET ?"
+
+        with self._lock:
+            rows = self._db.execute(query, params + [limit, offset]).fetchall()
+            regions = self._regions([row[0] for row in rows])
+        return [SavedScenario(*row, regions=regions[row[0]], trajectory=None) for row in rows]
+
+    def load(self, scenario_id):
+        """One scenario with its decoded trajectory, or None if it doesn't exist"""
+        loaded = self.compare([scenario_id])
+        return loaded[0] if loaded else None
+
+    def compare(self, scenario_ids):
+        """Scenarios with decoded trajectories, in the order requested"""
+        scenario_ids = list(dict.fromkeys(scenario_ids))
+        if not scenario_ids:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(SUMMARY_COLUMNS)}, trajectory FROM scenarios "
+                f"WHERE id IN ({', '.join('?' * len(scenario_ids))})",
+                scenario_ids,
+            ).fetchall()
+            regions = self._regions([row[0] for row in rows])
+        by_id = {
+            row[0]: SavedScenario(*row[:-1], regions=regions[row[0]],
+                                  trajectory=decode_trajectory(row[-1]))
+            for row in rows
+        }
+        return [by_id[scenario_id] for scenario_id in scenario_ids if scenario_id in by_id]
+
+    def delete(self, scenario_id):
+        """Remove a scenario and its regions"""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM scenarios WHERE id = ?", (scenario_id,))
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM scenarios").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
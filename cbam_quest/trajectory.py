@@ -0,0 +1,104 @@
+"""Year-by-year CBAM trajectories over the 2026-2034 horizon.
+
+Each scenario ramps its levers from today's baseline towards the slider
+targets along a smoothstep curve, follows a carbon price path and pays CBAM
+on the share of embedded emissions no longer covered by free allocation
+(``CBAM_SHARE``, from the phase-out schedule in Regulation (EU) 2023/956,
+Art. 31). All scenarios are simulated together: inputs broadcast against
+each other and every output gains a trailing year axis, so one call returns
+an aligned ``(scenarios..., years)`` array per quantity.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from cbam_quest import engine
+from cbam_quest.cube import HORIZON
+
+YEARS = np.array(HORIZON)
+
+# Share of embedded emissions subject to CBAM as free allocation is phased out
+CBAM_SHARE = np.array([0.025, 0.05, 0.10, 0.225, 0.485, 0.61, 0.735, 0.86, 1.0])
+
+RAMP_YEARS = 5  # Years for the levers to reach their targets
+PRICE_GROWTH = 0.0  # Annual carbon price growth when no explicit path is given
+
+Trajectory = namedtuple(
+    "Trajectory",
+    [
+        "years",
+        "recycled_content",
+        "renewable_energy",
+        "process_efficiency",
+        "carbon_price",
+        "cbam_share",
+        "footprint",
+        "baseline_emissions",
+        "emissions",
+        "baseline_fees",
+        "fees",
+        "net_savings",
+    ],
+)
+
+
+def ramp(years=YEARS, ramp_years=RAMP_YEARS):
+    """Share of each lever target reached by the end of each year (smoothstep)"""
+    ramp_years = np.asarray(ramp_years, dtype=np.float64)[..., None]
+    progress = np.clip((years - years[0] + 1) / np.maximum(ramp_years, 1), 0, 1)
+    return progress * progress * (3 - 2 * progress)
+
+
+def price_path(carbon_price, price_growth=PRICE_GROWTH, years=YEARS):
+    """Carbon price per year, compounding ``price_growth`` from the first year"""
+    carbon_price = np.asarray(carbon_price, dtype=np.float64)[..., None]
+    growth = np.asarray(price_growth, dtype=np.float64)[..., None]
+    return carbon_price * (1 + growth) ** (years - years[0])
+
+
+def simulate(recycled_content, renewable_energy, process_efficiency, carbon_price,
+             baseline_emissions=engine.BASELINE_EMISSIONS, ramp_years=RAMP_YEARS,
+             price_growth=PRICE_GROWTH, carbon_prices=None, baseline_path=None):
+    """Simulate every scenario across the horizon.
+
+    Scalar or array inputs broadcast to the scenario shape. ``baseline_path``
+    and ``carbon_prices`` override the constant baseline and the price path
+    with explicit ``(..., years)`` arrays, e.g. cube totals per year. Fees
+    and savings are in €M per year.
+    """
+    share = ramp(YEARS, ramp_years)
+    recycled = engine.RECYCLED_BASELINE + (
+        np.asarray(recycled_content, dtype=np.float64)[..., None] - engine.RECYCLED_BASELINE
+    ) * share
+    renewable = np.asarray(renewable_energy, dtype=np.float64)[..., None] * share
+    efficiency = np.asarray(process_efficiency, dtype=np.float64)[..., None] * share
+
+    if carbon_prices is None:
+        prices = price_path(carbon_price, price_growth)
+    else:
+        prices = np.asarray(carbon_prices, dtype=np.float64)
+    if baseline_path is None:
+        baseline = np.asarray(baseline_emissions, dtype=np.float64)[..., None]
+    else:
+        baseline = np.asarray(baseline_path, dtype=np.float64)
+
+    results = engine.evaluate(recycled, renewable, efficiency, prices * CBAM_SHARE, baseline)
+    shape = np.broadcast(recycled, renewable, efficiency, prices, baseline).shape
+
+    def full(value):
+        return np.broadcast_to(value, shape)
+
+    return Trajectory(
+        years=YEARS,
+        recycled_content=full(recycled),
+        renewable_energy=full(renewable),
+        process_efficiency=full(efficiency),
+        carbon_price=full(prices),
+        cbam_share=CBAM_SHARE,
+        footprint=full(results.footprint),
+        baseline_emissions=full(baseline),
+        emissions=full(results.projected_emissions),
+        baseline_fees=full(results.baseline_fees),
+        fees=full(results.projected_fees),
+        net_savings=full(results.net_savings),
+    )
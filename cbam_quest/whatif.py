@@ -0,0 +1,142 @@
+"""Precomputed lever grid for the offline what-if mode.
+
+The IMPACT SIMULATOR outputs behind the scenario results and roadmap charts
+are simulated once for every combination of the three levers on a coarse
+grid, at the current carbon price path and baseline. Each field is then
+quantized to 8- or 16-bit codes with a per-field offset and scale, and the
+codes are shipped base64-encoded alongside the charts, so the browser can
+look up any grid state without a round trip to the server.
+
+The payload is bounded: the grid is coarsened until it fits in
+``MAX_PAYLOAD_BYTES``, and each field's worst-case quantization error is
+half its scale.
+
+    python -m cbam_quest.whatif --step 5 --bits 8
+"""
+import argparse
+import base64
+import json
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from cbam_quest import engine, trajectory
+
+WHAT_IF_STEP = 5  # Lever grid spacing in percentage points
+QUANTIZE_BITS = 8
+MAX_PAYLOAD_BYTES = 256 * 1024
+LEVER_RANGE = (0, 100)
+
+Quantized = namedtuple("Quantized", ["codes", "offset", "scale"])
+WhatIfGrid = namedtuple("WhatIfGrid", ["levels", "years", "baseline_emissions", "fields", "payload_bytes"])
+
+
+def quantize(values, bits=QUANTIZE_BITS):
+    """Unsigned ``bits``-bit codes spanning the values' range, with the offset and scale to decode them"""
+    values = np.asarray(values, dtype=np.float64)
+    dtype = {8: np.uint8, 16: np.uint16}[bits]
+    offset = float(values.min())
+    scale = (float(values.max()) - offset) / (2 ** bits - 1) or 1.0
+    codes = np.rint((values - offset) / scale).astype(dtype)
+    return Quantized(codes, offset, scale)
+
+
+def dequantize(quantized):
+    return quantized.offset + quantized.codes.astype(np.float64) * quantized.scale
+
+
+def _fields(levels, carbon_prices, baseline_emissions):
+    """Output arrays indexed ``[recycled, renewable, efficiency(, year)]``"""
+    r, e, p = np.ix_(levels, levels, levels)
+    path = trajectory.simulate(
+        recycled_content=r,
+        renewable_energy=e,
+        process_efficiency=p,
+        carbon_price=carbon_prices[0],
+        baseline_emissions=baseline_emissions,
+        carbon_prices=np.asarray(carbon_prices, dtype=np.float64),
+    )
+    scenario = engine.evaluate(r, e, p, carbon_prices[0], baseline_emissions)
+    shape = (len(levels),) * 3
+    return {
+        "projected_emissions": np.broadcast_to(scenario.projected_emissions, shape),
+        "emissions_percent": path.emissions / path.baseline_emissions * 100,
+        "fees": path.fees,
+    }
+
+
+def build_grid(carbon_prices, baseline_emissions=engine.BASELINE_EMISSIONS, step=WHAT_IF_STEP,
+               bits=QUANTIZE_BITS, max_bytes=MAX_PAYLOAD_BYTES):
+    """Quantized outputs for every lever combination, coarsening ``step`` until they fit ``max_bytes``"""
+    low, high = LEVER_RANGE
+    while True:
+        levels = np.arange(low, high + 1, step, dtype=np.float64)
+        # base64 turns every 3 bytes into 4
+        payload_bytes = 4 * -(-len(levels) ** 3 * (1 + 2 * len(trajectory.YEARS)) * bits // 8 // 3)
+        if payload_bytes <= max_bytes or step >= high - low:
+            break
+        # Next spacing that still lands on both ends of the lever range
+        step = next(size for size in range(step + 1, high - low + 1) if (high - low) % size == 0)
+    fields = {
+        name: quantize(values, bits)
+        for name, values in _fields(levels, carbon_prices, baseline_emissions).items()
+    }
+    return WhatIfGrid(levels, trajectory.YEARS, float(baseline_emissions), fields, payload_bytes)
+
+
+def nearest_state(grid, recycled_content, renewable_energy, process_efficiency):
+    """Grid index of each lever closest to the given setting"""
+    return tuple(
+        int(np.abs(grid.levels - value).argmin())
+        for value in (recycled_content, renewable_energy, process_efficiency)
+    )
+
+
+def max_errors(grid):
+    """Worst-case quantization error of each field, in the field's units"""
+    return {name: quantized.scale / 2 for name, quantized in grid.fields.items()}
+
+
+def encode(grid):
+    """JSON payload for the browser: lever levels, years and each field's base64 little-endian codes"""
+    return json.dumps({
+        "levels": grid.levels.tolist(),
+        "years": grid.years.tolist(),
+        "baseline_emissions": grid.baseline_emissions,
+        "fields": {
+            name: {
+                "data": base64.b64encode(quantized.codes.astype(quantized.codes.dtype.newbyteorder("<"))
+                                         .tobytes()).decode("ascii"),
+                "bits": quantized.codes.dtype.itemsize * 8,
+                "offset": quantized.offset,
+                "scale": quantized.scale,
+                "width": int(np.prod(quantized.codes.shape[3:], dtype=np.int64)),
+            }
+            for name, quantized in grid.fields.items()
+        },
+    }, separators=(",", ":"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the offline what-if payload for a lever grid")
+    parser.add_argument("--carbon-price", type=float, default=80.0)
+    parser.add_argument("--step", type=int, default=WHAT_IF_STEP, help="lever grid spacing in points")
+    parser.add_argument("--bits", type=int, choices=(8, 16), default=QUANTIZE_BITS)
+    parser.add_argument("--max-bytes", type=int, default=MAX_PAYLOAD_BYTES)
+    args = parser.parse_args(argv)
+
+    grid = build_grid(
+        tuple(trajectory.price_path(args.carbon_price).tolist()),
+        step=args.step, bits=args.bits, max_bytes=args.max_bytes,
+    )
+    step = grid.levels[1] - grid.levels[0]
+    print(f"{len(grid.levels) ** 3:,} lever states (step {step:.0f}), "
+          f"{len(encode(grid)) / 1024:.1f} KB payload at {args.bits} bits")
+    for name, error in max_errors(grid).items():
+        print(f"  {name:<20} max error {error:.4g}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())